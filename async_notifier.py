@@ -0,0 +1,110 @@
+"""
+AsyncNotifier - Chemin d'envoi asynchrone (asyncio).
+
+Les appels fournisseurs sont de l'attente I/O pure : une seule boucle
+asyncio peut mener des milliers d'envois en parallèle, là où le chemin
+synchrone bloque un thread par requête en vol.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Tuple
+
+from notifier_interface import INotifier
+
+
+class AsyncNotifier(ABC):
+    """Équivalent asynchrone de INotifier."""
+
+    @abstractmethod
+    async def send(self, recipient: str, message: str) -> bool:
+        pass
+
+    @abstractmethod
+    def get_channel_name(self) -> str:
+        pass
+
+    async def send_many(self, items: Iterable[Tuple[str, str]],
+                        concurrency: int = 100) -> List[bool]:
+        """
+        Envoie un lot de (recipient, message) en parallèle.
+
+        concurrency workers consomment l'itérable au fil de l'eau (comme
+        BulkSender.send_async) : un générateur de millions d'items n'est
+        pas matérialisé en autant de coroutines.
+
+        Args:
+            items: Itérable de (recipient, message)
+            concurrency: Nombre maximum d'envois simultanés
+
+        Returns:
+            list[bool]: Résultat de chaque envoi, dans l'ordre des items
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency doit être >= 1")
+        iterator = enumerate(items)
+        results: Dict[int, bool] = {}
+
+        async def worker():
+            for index, (recipient, message) in iterator:
+                try:
+                    results[index] = bool(await self.send(recipient, message))
+                except Exception:
+                    results[index] = False
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return [results[index] for index in range(len(results))]
+
+    async def close(self) -> None:
+        """Libère les ressources. Rien à faire par défaut."""
+
+
+class AsyncNotifierAdapter(AsyncNotifier):
+    """
+    Adapte un INotifier synchrone : chaque send() part dans un thread du
+    pool par défaut de la boucle, sans bloquer celle-ci.
+    """
+
+    def __init__(self, notifier: INotifier):
+        self.notifier = notifier
+
+    def get_channel_name(self) -> str:
+        return self.notifier.get_channel_name()
+
+    async def send(self, recipient: str, message: str) -> bool:
+        return await asyncio.to_thread(self.notifier.send, recipient, message)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.notifier.close)
+
+
+class AsyncConsoleNotifier(AsyncNotifier):
+    """Version native asyncio de ConsoleNotifier."""
+
+    def get_channel_name(self) -> str:
+        return "console"
+
+    async def send(self, recipient: str, message: str) -> bool:
+        print(f"[CONSOLE] À {recipient}: {message}")
+        return True
+
+
+# Test
+if __name__ == "__main__":
+    import time
+
+    class SlowAsyncNotifier(AsyncNotifier):
+        """Fournisseur simulé avec 50 ms de latence."""
+
+        def get_channel_name(self):
+            return "slow"
+
+        async def send(self, recipient, message):
+            await asyncio.sleep(0.05)
+            return True
+
+    items = [(f"user{i}@techflow.com", "Hello") for i in range(10_000)]
+    start = time.perf_counter()
+    results = asyncio.run(SlowAsyncNotifier().send_many(items, concurrency=5_000))
+    print(f"⚡ {sum(results)} envois en {time.perf_counter() - start:.2f}s "
+          f"(séquentiel : {len(items) * 0.05:.0f}s)")
@@ -1,9 +1,10 @@
 from notifier_interface import INotifier
 from config_singleton import NotificationConfig
+from recipient_validator import VALIDATOR
 
 class BaseNotifier(INotifier):
     def __init__(self):
         self.config = NotificationConfig()
     
     def validate(self, recipient: str, message: str) -> bool:
-        return bool(recipient and message)
\ No newline at end of file
+        return VALIDATOR.validate(self.get_channel_name(), recipient, message)[0]
\ No newline at end of file
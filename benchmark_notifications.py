@@ -0,0 +1,237 @@
+"""
+Benchmarks du pipeline de notification (chemin legacy vs chemin Factory).
+
+Scénarios :
+- legacy_send[<canal>]   : NotificationService.send_notification par canal
+- legacy_bulk[<taille>]  : NotificationService.send_bulk (1k / 100k / 1M)
+- factory_create[...]    : débit de NotificationFactory.create (avec/sans cache)
+- email_send / email_validate : EmailNotifier, stdout redirigé
+
+Chaque scénario tourne dans un processus séparé pour que le pic de RSS
+mesuré soit le sien. Résultats : msgs/s, latence p50/p99 (µs), pic RSS (Mo).
+
+Usage :
+    python benchmark_notifications.py --quick
+    python benchmark_notifications.py --save bench_baseline.json
+    python benchmark_notifications.py --compare bench_baseline.json
+
+Avec --compare, le code de sortie vaut 1 si un scénario régresse de plus
+de --tolerance (débit plus bas ou p99 plus haut), pour être visible en CI.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+LEGACY_CHANNELS = {
+    "email": "marie.dupont@techflow.com",
+    "sms": "0612345678",
+    "push": "user_token_abc123",
+    "slack": "#rh-notifications",
+    "teams": "#rh",
+    "whatsapp": "+33612345678",
+}
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+QUICK_SIZES = [1_000, 10_000]
+MESSAGE = "Votre demande de congés a été approuvée pour la période du 20 au 25 décembre."
+
+
+def _percentiles(samples_ns):
+    samples = sorted(samples_ns)
+    if not samples:
+        return None, None
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] / 1000
+    return pick(0.50), pick(0.99)
+
+
+def _timed_loop(func, iterations):
+    """Appelle func() iterations fois ; retourne (durée totale, latences ns)."""
+    samples = [0] * iterations
+    clock = time.perf_counter_ns
+    start = clock()
+    for i in range(iterations):
+        t0 = clock()
+        func()
+        samples[i] = clock() - t0
+    return (clock() - start) / 1e9, samples
+
+
+# ----------------------------------------------------------------------
+# Scénarios (exécutés dans le sous-processus)
+# ----------------------------------------------------------------------
+
+def bench_legacy_send(channel, iterations):
+    from notification_legacy import NotificationService
+    service = NotificationService()
+    recipient = LEGACY_CHANNELS[channel]
+    elapsed, samples = _timed_loop(
+        lambda: service.send_notification(recipient, MESSAGE, channel), iterations
+    )
+    return iterations, elapsed, _percentiles(samples)
+
+
+def bench_legacy_bulk(size, max_workers=None):
+    from notification_legacy import NotificationService
+    service = NotificationService()
+    recipients = (f"employee{i}@techflow.com" for i in range(size))
+    start = time.perf_counter()
+    service.send_bulk(recipients, MESSAGE, "email", max_workers=max_workers)
+    elapsed = time.perf_counter() - start
+    p50 = service.metrics.percentile("email", 50)
+    p99 = service.metrics.percentile("email", 99)
+    return size, elapsed, (p50 * 1e6, p99 * 1e6)
+
+
+def bench_factory_create(iterations, cached):
+    from notification_factory_complete import ChannelType, NotificationFactory, setup_factory
+    setup_factory()
+    if cached:
+        NotificationFactory.enable_cache()
+    elapsed, samples = _timed_loop(
+        lambda: NotificationFactory.create(ChannelType.EMAIL), iterations
+    )
+    NotificationFactory.shutdown()
+    return iterations, elapsed, _percentiles(samples)
+
+
+def bench_email(method, iterations):
+    from email_notifier import EmailNotifier
+    notifier = EmailNotifier()
+    func = getattr(notifier, method)
+    elapsed, samples = _timed_loop(
+        lambda: func("marie.dupont@techflow.com", MESSAGE), iterations
+    )
+    return iterations, elapsed, _percentiles(samples)
+
+
+def scenarios(sizes, iterations):
+    """Liste des (nom, fonction, arguments)."""
+    result = [(f"legacy_send[{ch}]", "bench_legacy_send", [ch, iterations])
+              for ch in LEGACY_CHANNELS]
+    result += [(f"legacy_bulk[{size}]", "bench_legacy_bulk", [size]) for size in sizes]
+    result += [(f"legacy_bulk_concurrent[{size}]", "bench_legacy_bulk", [size, 16])
+               for size in sizes]
+    result += [
+        ("factory_create[fresh]", "bench_factory_create", [iterations, False]),
+        ("factory_create[cached]", "bench_factory_create", [iterations, True]),
+        ("email_send", "bench_email", ["send", iterations]),
+        ("email_validate", "bench_email", ["validate", iterations]),
+    ]
+    return result
+
+
+def run_one(func_name, args):
+    """Point d'entrée du sous-processus : un scénario, résultat JSON sur stdout."""
+    func = globals()[func_name]
+    with contextlib.redirect_stdout(io.StringIO()):
+        count, elapsed, (p50, p99) = func(*args)
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    print(json.dumps({
+        "count": count,
+        "seconds": round(elapsed, 4),
+        "msgs_per_sec": round(count / elapsed, 1) if elapsed else None,
+        "p50_us": None if p50 is None else round(p50, 2),
+        "p99_us": None if p99 is None else round(p99, 2),
+        "peak_rss_mb": round(rss_mb, 1),
+    }))
+
+
+# ----------------------------------------------------------------------
+# Orchestration
+# ----------------------------------------------------------------------
+
+def run_all(sizes, iterations, only=None):
+    results = {}
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name, func_name, args in scenarios(sizes, iterations):
+        if only and only not in name:
+            continue
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-one", func_name, json.dumps(args)],
+            capture_output=True, text=True, cwd=here, check=True,
+        )
+        results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+        r = results[name]
+        print(f"{name:34} {r['msgs_per_sec'] or 0:>12,.0f} msg/s   "
+              f"p50 {r['p50_us'] or 0:>9.1f} µs   p99 {r['p99_us'] or 0:>9.1f} µs   "
+              f"RSS {r['peak_rss_mb']:>7.1f} Mo")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Retourne la liste des régressions par rapport à la baseline."""
+    regressions = []
+    for name, current in results.items():
+        ref = baseline.get("results", {}).get(name)
+        if not ref:
+            continue
+        if ref["msgs_per_sec"] and current["msgs_per_sec"] < ref["msgs_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: débit {current['msgs_per_sec']:,.0f} < "
+                               f"{ref['msgs_per_sec']:,.0f} msg/s")
+        if ref["p99_us"] and current["p99_us"] and current["p99_us"] > ref["p99_us"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {current['p99_us']:.1f} > {ref['p99_us']:.1f} µs")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline de notification")
+    parser.add_argument("--sizes", help="Tailles de send_bulk, ex: 1000,100000,1000000")
+    parser.add_argument("--iterations", type=int, default=20_000,
+                        help="Appels par scénario unitaire")
+    parser.add_argument("--quick", action="store_true", help="Tailles réduites (CI rapide)")
+    parser.add_argument("--only", help="Ne lance que les scénarios contenant ce texte")
+    parser.add_argument("--save", metavar="FICHIER", help="Écrit les résultats comme baseline")
+    parser.add_argument("--compare", metavar="FICHIER", help="Compare à une baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Écart toléré avant régression (0.2 = 20 %%)")
+    parser.add_argument("--run-one", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        run_one(args.run_one[0], json.loads(args.run_one[1]))
+        return 0
+
+    if args.sizes:
+        sizes = [int(s) for s in args.sizes.split(",")]
+    else:
+        sizes = QUICK_SIZES if args.quick else DEFAULT_SIZES
+    iterations = min(args.iterations, 2_000) if args.quick else args.iterations
+
+    print("📊 BENCHMARKS NOTIFICATIONS")
+    print("=" * 100)
+    results = run_all(sizes, iterations, args.only)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "sizes": sizes,
+                "iterations": iterations,
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+        print(f"\n💾 Baseline écrite dans {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Régressions détectées :")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print("\n✅ Aucune régression par rapport à la baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+"""
+BulkJob - Envois en masse reprenables après interruption.
+
+Si un send_bulk sur une grosse liste s'arrête en cours de route, il
+fallait tout relancer et renotifier les destinataires déjà servis. Un
+BulkJob note sa progression dans un point de reprise (checkpoint) :
+
+- offset : nombre de lignes traitées sans trou depuis le début ;
+- deux bitmaps d'un bit par ligne, traitée / envoyée avec succès (les
+  envois concurrents terminent dans le désordre), limitées à la fenêtre
+  autour d'offset : en dessous, tout est traité et seuls les échecs sont
+  gardés, par plages [début, fin). Un point de reprise coûte la taille de
+  la fenêtre et des plages d'échec, pas celle du job.
+
+Les points de reprise sont écrits par lot (toutes les checkpoint_every
+lignes ou checkpoint_interval secondes), dans SQLite ou dans un fichier.
+À la reprise, la source est relue et les lignes déjà traitées sont sautées.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+from bisect import bisect_right
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from bulk_sender import BulkSender
+from event_sink import INFO, emit
+from notifier_interface import channel_key
+
+_POPCOUNT = bytes(bin(i).count("1") for i in range(256))
+
+
+def _popcount(bitmap: bytes) -> int:
+    return sum(bitmap.translate(_POPCOUNT))
+
+
+class Checkpoint:
+    """
+    État d'avancement d'un job.
+
+    Les bitmaps done / ok commencent à la ligne base (multiple de 8, au
+    plus offset) ; failures liste les plages [début, fin) des lignes en
+    échec sous base.
+    """
+
+    __slots__ = ("job_id", "fingerprint", "offset", "done", "ok", "finished",
+                 "base", "failures")
+
+    def __init__(self, job_id: str, fingerprint: str, offset: int = 0,
+                 done: bytes = b"", ok: bytes = b"", finished: bool = False,
+                 base: int = 0, failures=()):
+        self.job_id = job_id
+        self.fingerprint = fingerprint
+        self.offset = offset
+        self.done = bytearray(done)
+        self.ok = bytearray(ok)
+        self.finished = finished
+        self.base = base
+        self.failures = [list(run) for run in failures]
+
+    @staticmethod
+    def _get(bitmap: bytearray, index: int) -> bool:
+        byte = index >> 3
+        return byte < len(bitmap) and bool(bitmap[byte] & (1 << (index & 7)))
+
+    @staticmethod
+    def _set(bitmap: bytearray, index: int):
+        byte = index >> 3
+        if byte >= len(bitmap):
+            bitmap.extend(bytes(byte - len(bitmap) + 1))
+        bitmap[byte] |= 1 << (index & 7)
+
+    def _failure_run(self, index: int) -> int:
+        """Position de la plage d'échec contenant index (sous base), -1 sinon."""
+        position = bisect_right(self.failures, [index, float("inf")]) - 1
+        if position >= 0 and index < self.failures[position][1]:
+            return position
+        return -1
+
+    def is_done(self, index: int) -> bool:
+        return index < self.base or self._get(self.done, index - self.base)
+
+    def is_ok(self, index: int) -> bool:
+        if index < self.base:
+            return self._failure_run(index) < 0
+        return self._get(self.ok, index - self.base)
+
+    def mark(self, index: int, ok: bool):
+        if index < self.base:
+            # Renvoi d'une ligne en échec (retry_failed) : on la retire des plages
+            position = self._failure_run(index)
+            if ok and position >= 0:
+                start, end = self.failures[position]
+                self.failures[position:position + 1] = [
+                    run for run in ([start, index], [index + 1, end]) if run[0] < run[1]]
+            return
+        self._set(self.done, index - self.base)
+        if ok:
+            self._set(self.ok, index - self.base)
+        while self._get(self.done, self.offset - self.base):
+            self.offset += 1
+
+    def compact(self):
+        """
+        Sort de la fenêtre les octets entièrement sous offset : leurs lignes
+        sont toutes traitées, seuls les échecs sont reportés dans failures.
+        """
+        size = (self.offset - self.base) >> 3
+        if size <= 0:
+            return
+        ok = self.ok
+        if len(ok) < size:
+            ok.extend(bytes(size - len(ok)))
+        failures = self.failures
+        for position in range(size):
+            byte = ok[position]
+            if byte == 0xFF:
+                continue
+            for bit in range(8):
+                if not byte & (1 << bit):
+                    index = self.base + (position << 3) + bit
+                    if failures and failures[-1][1] == index:
+                        failures[-1][1] = index + 1
+                    else:
+                        failures.append([index, index + 1])
+        del self.done[:size]
+        del ok[:size]
+        self.base += size << 3
+
+    @property
+    def failed_below(self) -> int:
+        return sum(end - start for start, end in self.failures)
+
+    @property
+    def success(self) -> int:
+        return self.base - self.failed_below + _popcount(self.ok)
+
+    @property
+    def failed(self) -> int:
+        return self.failed_below + _popcount(self.done) - _popcount(self.ok)
+
+    def copy(self) -> "Checkpoint":
+        return Checkpoint(self.job_id, self.fingerprint, self.offset,
+                          bytes(self.done), bytes(self.ok), self.finished,
+                          self.base, self.failures)
+
+
+class SQLiteCheckpointStore:
+    """Points de reprise dans une table SQLite (mode WAL)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS bulk_jobs (
+            job_id TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            base INTEGER NOT NULL,
+            failures TEXT NOT NULL,
+            done BLOB NOT NULL,
+            ok BLOB NOT NULL,
+            finished INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = "bulk_jobs.db"):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def load(self, job_id: str) -> Optional[Checkpoint]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint, offset, done, ok, finished, base, failures "
+                "FROM bulk_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return Checkpoint(job_id, row[0], row[1], row[2], row[3], bool(row[4]),
+                          row[5], json.loads(row[6]))
+
+    def save(self, checkpoint: Checkpoint):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO bulk_jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (checkpoint.job_id, checkpoint.fingerprint, checkpoint.offset,
+                 checkpoint.base, json.dumps(checkpoint.failures, separators=(",", ":")),
+                 bytes(checkpoint.done), bytes(checkpoint.ok), int(checkpoint.finished),
+                 time.time())
+            )
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM bulk_jobs WHERE job_id = ?", (job_id,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class FileCheckpointStore:
+    """Un fichier JSON par job, remplacé atomiquement à chaque écriture."""
+
+    def __init__(self, directory: str = "bulk_jobs"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        name = hashlib.sha1(job_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, job_id: str) -> Optional[Checkpoint]:
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        return Checkpoint(job_id, data["fingerprint"], data["offset"],
+                          base64.b64decode(data["done"]), base64.b64decode(data["ok"]),
+                          data["finished"], data["base"], data["failures"])
+
+    def save(self, checkpoint: Checkpoint):
+        path = self._path(checkpoint.job_id)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "job_id": checkpoint.job_id,
+                "fingerprint": checkpoint.fingerprint,
+                "offset": checkpoint.offset,
+                "base": checkpoint.base,
+                "failures": checkpoint.failures,
+                "done": base64.b64encode(bytes(checkpoint.done)).decode("ascii"),
+                "ok": base64.b64encode(bytes(checkpoint.ok)).decode("ascii"),
+                "finished": checkpoint.finished,
+            }, f)
+        os.replace(tmp, path)
+
+    def delete(self, job_id: str):
+        try:
+            os.remove(self._path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        pass
+
+
+class BulkJob:
+    """
+    Envoi en masse identifié par job_id, reprenable.
+
+    La source des destinataires doit être relisible dans le même ordre
+    (liste, fichier, RecipientStream...) : une reprise la relit et saute
+    les lignes déjà traitées.
+
+    Args:
+        job_id: Identifiant stable du job
+        send_func: send_func(recipient, message, channel, priority) -> bool
+        store: SQLiteCheckpointStore ou FileCheckpointStore ; par défaut un
+            SQLiteCheckpointStore propre au job, fermé par close()
+        max_workers: Taille du pool d'envoi (BulkSender)
+        checkpoint_every: Écrire un point de reprise toutes les N lignes...
+        checkpoint_interval: ... ou toutes les N secondes
+    """
+
+    def __init__(self, job_id: str, send_func: Callable, store=None, max_workers: int = 16,
+                 checkpoint_every: int = 10_000, checkpoint_interval: float = 1.0,
+                 rate_limiter=None):
+        self.job_id = job_id
+        self.send_func = send_func
+        self._owns_store = store is None
+        self.store = store if store is not None else SQLiteCheckpointStore()
+        self.max_workers = max_workers
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.rate_limiter = rate_limiter
+        self.checkpoint: Optional[Checkpoint] = None
+        self._lock = threading.Lock()
+        self._since_save = 0
+        self._last_save = 0.0
+        self.checkpoints_written = 0
+
+    @staticmethod
+    def fingerprint(message: str, channel, priority: str) -> str:
+        """Empreinte du contenu : une reprise avec un autre message est refusée."""
+        channel = channel_key(channel)
+        return hashlib.sha256(f"{channel}\x00{priority}\x00{message}".encode("utf-8")).hexdigest()
+
+    def _send_indexed(self, item, message, channel, priority) -> bool:
+        index, recipient = item
+        try:
+            ok = bool(self.send_func(recipient, message, channel, priority))
+        except Exception:
+            ok = False
+        with self._lock:
+            self.checkpoint.mark(index, ok)
+            self._since_save += 1
+        return ok
+
+    def _save(self, finished: bool = False):
+        with self._lock:
+            self.checkpoint.finished = finished
+            self.checkpoint.compact()
+            snapshot = self.checkpoint.copy()
+            self._since_save = 0
+        self.store.save(snapshot)
+        self._last_save = time.monotonic()
+        self.checkpoints_written += 1
+
+    def _pending_items(self, recipients: Iterable[str], retry_failed: bool, counters: dict):
+        checkpoint = self.checkpoint
+        for index, recipient in enumerate(recipients):
+            if checkpoint.is_done(index) and not (retry_failed and not checkpoint.is_ok(index)):
+                counters["skipped"] += 1
+                continue
+            yield index, recipient
+            # Écriture par lot, depuis le thread qui alimente les workers
+            if (self._since_save >= self.checkpoint_every
+                    or time.monotonic() - self._last_save >= self.checkpoint_interval):
+                self._save()
+
+    def run(self, recipients: Iterable[str], message: str, channel,
+            priority: str = "normal", retry_failed: bool = False) -> dict:
+        """
+        Lance ou reprend le job.
+
+        Args:
+            retry_failed: À la reprise, renvoyer aussi les lignes en échec
+
+        Returns:
+            dict: {"success", "failed"} (cumulés sur toutes les exécutions),
+                  "skipped" (lignes sautées), "resumed" (bool)
+        """
+        channel = channel_key(channel)
+        fingerprint = self.fingerprint(message, channel, priority)
+        checkpoint = self.store.load(self.job_id)
+        resumed = checkpoint is not None
+        if checkpoint is None:
+            checkpoint = Checkpoint(self.job_id, fingerprint)
+        elif checkpoint.fingerprint != fingerprint:
+            raise ValueError(f"Le job '{self.job_id}' existe avec un autre message ou canal")
+        self.checkpoint = checkpoint
+        self._since_save = 0
+        self._last_save = time.monotonic()
+        counters = {"skipped": 0}
+        if resumed:
+            emit(INFO, "bulk_job.resumed", job=self.job_id, offset=checkpoint.offset,
+                 success=checkpoint.success, failed=checkpoint.failed)
+
+        try:
+            with BulkSender(self._send_indexed, max_workers=self.max_workers,
+                            rate_limiter=self.rate_limiter) as sender:
+                sender.send(self._pending_items(recipients, retry_failed, counters),
+                            message, channel, priority, collect_results=False)
+        except BaseException:
+            # Erreur de la source ou interruption : on garde ce qui est fait.
+            # (Un arrêt brutal du processus repart du dernier checkpoint.)
+            self._save()
+            raise
+        self._save(finished=True)
+
+        result = {
+            "success": checkpoint.success,
+            "failed": checkpoint.failed,
+            "skipped": counters["skipped"],
+            "resumed": resumed,
+        }
+        emit(INFO, "bulk_job.completed", job=self.job_id, **result)
+        return result
+
+    def close(self):
+        """Ferme le store créé par le job (un store fourni reste à l'appelant)."""
+        if self._owns_store:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+
+    from event_sink import ConsoleSink, set_sink
+    set_sink(ConsoleSink())
+
+    sent = []
+
+    def send(recipient, message, channel, priority):
+        sent.append(recipient)
+        return True
+
+    def export(crash_after=None):
+        for i in range(10_000):
+            if crash_after is not None and i == crash_after:
+                raise IOError("Connexion à la base RH perdue")  # panne simulée
+            yield f"employee{i}@techflow.com"
+
+    store = SQLiteCheckpointStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    try:
+        BulkJob("newsletter-decembre", send, store, checkpoint_every=500).run(
+            export(crash_after=3_000), "Newsletter", "email"
+        )
+    except IOError as e:
+        print(f"💥 {e} après {len(sent)} envois "
+              f"(checkpoint à l'offset {store.load('newsletter-decembre').offset})")
+
+    result = BulkJob("newsletter-decembre", send, store).run(export(), "Newsletter", "email")
+    print(f"🔁 Reprise: {result}")
+    print(f"📨 Envois totaux: {len(sent)}, doublons: {len(sent) - len(set(sent))}")
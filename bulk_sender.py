@@ -0,0 +1,226 @@
+"""
+BulkSender - Moteur d'envoi en masse concurrent.
+
+Remplace la boucle séquentielle de NotificationService.send_bulk :
+les destinataires sont répartis sur un pool de threads borné (ou sur des
+coroutines asyncio), avec un plafond de requêtes en vol par canal.
+"""
+
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from notifier_interface import channel_key
+
+
+class BulkSender:
+    """
+    Moteur d'envoi en masse.
+
+    La fonction d'envoi a la signature de NotificationService.send_notification :
+    send_func(recipient, message, channel, priority) -> bool.
+    Elle peut aussi être une coroutine (utilisée telle quelle par send_async).
+    """
+
+    def __init__(self, send_func: Callable, max_workers: int = 16,
+                 max_in_flight: Optional[Dict[str, int]] = None, rate_limiter=None):
+        """
+        Args:
+            send_func: Fonction d'envoi unitaire
+            max_workers: Taille du pool de threads
+            max_in_flight: Plafond de requêtes en vol par canal
+                (par défaut : 2 x max_workers)
+            rate_limiter: RateLimiter optionnel, consulté avant chaque envoi
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers doit être >= 1")
+        self.send_func = send_func
+        self.max_workers = max_workers
+        self.max_in_flight = dict(max_in_flight or {})
+        self.rate_limiter = rate_limiter
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="bulk-sender"
+                )
+            return self._executor
+
+    def _channel_cap(self, channel) -> int:
+        return self.max_in_flight.get(channel_key(channel), 2 * self.max_workers)
+
+    def _channel_limit(self, channel) -> threading.BoundedSemaphore:
+        key = channel_key(channel)
+        with self._lock:
+            limit = self._limits.get(key)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self._channel_cap(channel))
+                self._limits[key] = limit
+            return limit
+
+    def _send_one(self, recipient, message, channel, priority) -> bool:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(channel)
+        try:
+            return bool(self.send_func(recipient, message, channel, priority))
+        except Exception:
+            # Un destinataire en erreur ne doit pas interrompre le lot
+            return False
+
+    @staticmethod
+    def _summary(outcomes: List[Tuple[str, bool]]) -> dict:
+        success = sum(1 for _, ok in outcomes if ok)
+        return {
+            "success": success,
+            "failed": len(outcomes) - success,
+            "results": outcomes,
+        }
+
+    def send(self, recipients: Iterable[str], message: str, channel,
+             priority: str = "normal", collect_results: bool = True) -> dict:
+        """
+        Envoie le message à tous les destinataires via le pool de threads.
+
+        Les destinataires sont consommés au fil de l'eau : au plus
+        max_in_flight[channel] envois sont en attente à un instant donné.
+        Avec collect_results=False, seuls les compteurs sont gardés : la
+        mémoire ne dépend plus du nombre de destinataires.
+
+        Returns:
+            dict: {"success": int, "failed": int,
+                   "results": [(recipient, bool), ...]} (ordre de complétion,
+                   absent si collect_results=False)
+        """
+        executor = self._get_executor()
+        limit = self._channel_limit(channel)
+        outcomes: List[Tuple[str, bool]] = []
+        counts = [0, 0]
+        counts_lock = threading.Lock()
+        pending = set()
+
+        def task(recipient):
+            try:
+                ok = self._send_one(recipient, message, channel, priority)
+                if collect_results:
+                    outcomes.append((recipient, ok))
+                else:
+                    with counts_lock:
+                        counts[0 if ok else 1] += 1
+            finally:
+                limit.release()
+
+        for recipient in recipients:
+            limit.acquire()
+            future = executor.submit(task, recipient)
+            pending.add(future)
+            future.add_done_callback(pending.discard)
+
+        wait(list(pending))
+        if not collect_results:
+            return {"success": counts[0], "failed": counts[1]}
+        return self._summary(outcomes)
+
+    def send_batch(self, batch, indexes: Optional[Iterable[int]] = None) -> dict:
+        """
+        Envoie un NotificationBatch (tous les envois en attente, ou les
+        index fournis). Chaque résultat est noté dans batch.outcomes : pas
+        de liste (recipient, bool) en mémoire, même pour des millions de lignes.
+
+        Returns:
+            dict: {"success": int, "failed": int, "pending": int}
+        """
+        executor = self._get_executor()
+        pending = set()
+
+        def task(index, channel, limit):
+            try:
+                batch.mark(index, self._send_one(batch.recipient(index), batch.message(index),
+                                                 channel, batch.priority(index).value))
+            finally:
+                limit.release()
+
+        for index in (batch.pending_indexes() if indexes is None else indexes):
+            channel = batch.channel(index).value
+            limit = self._channel_limit(channel)
+            limit.acquire()
+            future = executor.submit(task, index, channel, limit)
+            pending.add(future)
+            future.add_done_callback(pending.discard)
+
+        wait(list(pending))
+        return batch.summary()
+
+    async def send_async(self, recipients: Iterable[str], message: str, channel,
+                         priority: str = "normal") -> dict:
+        """
+        Variante asyncio de send().
+
+        Un nombre fixe de workers (max_in_flight[channel]) consomme
+        l'itérable : la mémoire reste bornée quel que soit le nombre de
+        destinataires. Une send_func synchrone est exécutée dans le pool.
+        """
+        loop = asyncio.get_running_loop()
+        is_coroutine = inspect.iscoroutinefunction(self.send_func)
+        iterator = iter(recipients)
+        outcomes: List[Tuple[str, bool]] = []
+
+        async def worker():
+            for recipient in iterator:
+                if is_coroutine:
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.acquire_async(channel)
+                    try:
+                        ok = bool(await self.send_func(recipient, message, channel, priority))
+                    except Exception:
+                        ok = False
+                else:
+                    ok = await loop.run_in_executor(
+                        self._get_executor(), self._send_one,
+                        recipient, message, channel, priority
+                    )
+                outcomes.append((recipient, ok))
+
+        await asyncio.gather(*(worker() for _ in range(self._channel_cap(channel))))
+        return self._summary(outcomes)
+
+    def close(self):
+        """Arrête le pool de threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Test
+if __name__ == "__main__":
+    import time
+
+    def fake_send(recipient, message, channel, priority):
+        time.sleep(0.01)  # Latence fournisseur simulée
+        return "@" in recipient
+
+    recipients = [f"user{i}@techflow.com" for i in range(500)] + ["invalide"]
+
+    with BulkSender(fake_send, max_workers=50) as sender:
+        start = time.perf_counter()
+        result = sender.send(recipients, "Newsletter", "email")
+        print(f"🧵 Threads: {result['success']} succès, {result['failed']} échecs "
+              f"en {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        result = asyncio.run(sender.send_async(recipients, "Newsletter", "email"))
+        print(f"⚡ Asyncio: {result['success']} succès, {result['failed']} échecs "
+              f"en {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,368 @@
+"""
+CircuitBreaker - Coupe-circuit et santé par canal.
+
+Quand un fournisseur est en panne, chaque envoi continue d'essayer et
+d'échouer (souvent après un timeout), en occupant un thread et le budget
+de relances. Un coupe-circuit par canal observe, sur une fenêtre
+glissante, le taux d'erreurs et le taux d'appels lents :
+
+- closed    : les envois passent ; au-delà des seuils le circuit s'ouvre ;
+- open      : les envois échouent immédiatement (ou partent sur le canal
+              de repli) pendant open_seconds ;
+- half_open : quelques envois d'essai ; s'ils réussissent le circuit se
+              referme, sinon il se rouvre.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from async_notifier import AsyncNotifier
+from event_sink import INFO, WARNING, emit
+from notifier_interface import INotifier, channel_key
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Envoi refusé : le circuit du canal est ouvert."""
+
+
+class CircuitBreaker:
+    """
+    Coupe-circuit à fenêtre glissante.
+
+    Args:
+        name: Nom du canal (pour les événements)
+        window: Durée de la fenêtre d'observation (secondes)
+        buckets: Nombre de tranches de la fenêtre
+        min_calls: Appels minimum dans la fenêtre avant de juger
+        error_rate: Taux d'échecs déclenchant l'ouverture (0-1)
+        slow_call: Durée (secondes) au-delà de laquelle un appel est lent,
+            None pour ignorer la latence
+        slow_rate: Taux d'appels lents déclenchant l'ouverture (0-1)
+        open_seconds: Durée d'ouverture avant les essais
+        half_open_calls: Envois d'essai en half_open
+    """
+
+    def __init__(self, name: str = "", window: float = 30.0, buckets: int = 10,
+                 min_calls: int = 20, error_rate: float = 0.5,
+                 slow_call: Optional[float] = None, slow_rate: float = 0.5,
+                 open_seconds: float = 30.0, half_open_calls: int = 3):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._bucket_width = window / buckets
+        # Par tranche : [appels, échecs, lents]
+        self._buckets: List[List[int]] = [[0, 0, 0] for _ in range(buckets)]
+        self._current = 0
+        self._bucket_start = time.monotonic()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    # ------------------------------------------------------------------
+    # Fenêtre glissante (appelé sous verrou)
+    # ------------------------------------------------------------------
+
+    def _rotate(self, now: float):
+        elapsed = int((now - self._bucket_start) / self._bucket_width)
+        if elapsed <= 0:
+            return
+        count = len(self._buckets)
+        for step in range(1, min(elapsed, count) + 1):
+            bucket = self._buckets[(self._current + step) % count]
+            bucket[0] = bucket[1] = bucket[2] = 0
+        self._current = (self._current + elapsed) % count
+        self._bucket_start += elapsed * self._bucket_width
+
+    def _totals(self):
+        calls = failures = slow = 0
+        for bucket_calls, bucket_failures, bucket_slow in self._buckets:
+            calls += bucket_calls
+            failures += bucket_failures
+            slow += bucket_slow
+        return calls, failures, slow
+
+    def _transition(self, state: str, now: float):
+        previous, self._state = self._state, state
+        if state == OPEN:
+            self._opened_at = now
+        if state in (HALF_OPEN, OPEN):
+            self._trials = self._trial_successes = 0
+        if state == CLOSED:
+            for bucket in self._buckets:
+                bucket[0] = bucket[1] = bucket[2] = 0
+        emit(WARNING if state == OPEN else INFO, "circuit.state",
+             channel=self.name, previous=previous, state=state)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """True si un envoi peut partir maintenant (réserve un essai en half_open)."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self._state == OPEN:
+                if now - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self._transition(HALF_OPEN, now)
+            if self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success: bool, latency: Optional[float] = None):
+        """Enregistre le résultat d'un envoi autorisé par allow()."""
+        slow = self.slow_call is not None and latency is not None and latency >= self.slow_call
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                if not success or slow:
+                    self._transition(OPEN, now)
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_calls:
+                        self._transition(CLOSED, now)
+                return
+            if self._state == OPEN:
+                return  # résultat d'un envoi parti avant l'ouverture
+            self._rotate(now)
+            bucket = self._buckets[self._current]
+            bucket[0] += 1
+            bucket[1] += not success
+            bucket[2] += slow
+            calls, failures, slow_calls = self._totals()
+            if calls >= self.min_calls and (failures >= calls * self.error_rate
+                                            or (self.slow_call is not None
+                                                and slow_calls >= calls * self.slow_rate)):
+                self._transition(OPEN, now)
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Exécute func sous la protection du circuit.
+        Un retour faux ou une exception comptent comme un échec.
+
+        Raises:
+            CircuitOpenError: Si le circuit est ouvert
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit ouvert pour '{self.name}'")
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = func(*args, **kwargs)
+            ok = bool(result)
+            return result
+        finally:
+            self.record(ok, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """État, volumes et taux sur la fenêtre courante."""
+        state = self.state
+        with self._lock:
+            self._rotate(time.monotonic())
+            calls, failures, slow = self._totals()
+            return {
+                "state": state,
+                "calls": calls,
+                "error_rate": round(failures / calls, 3) if calls else 0.0,
+                "slow_rate": round(slow / calls, 3) if calls else 0.0,
+                "rejected": self.rejected,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._transition(CLOSED, time.monotonic())
+
+
+class CircuitBreakerRegistry:
+    """
+    Un coupe-circuit par canal, créé à la demande.
+
+    Args:
+        overrides: {canal: {paramètre: valeur}} propres à un canal
+        **defaults: Paramètres de CircuitBreaker communs à tous les canaux
+    """
+
+    def __init__(self, overrides: Optional[Dict[str, dict]] = None, **defaults):
+        self.defaults = defaults
+        self.overrides = {channel_key(c): o for c, o in (overrides or {}).items()}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, channel) -> CircuitBreaker:
+        channel = channel_key(channel)
+        breaker = self._breakers.get(channel)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(channel)
+                if breaker is None:
+                    options = dict(self.defaults, **self.overrides.get(channel, {}))
+                    breaker = self._breakers[channel] = CircuitBreaker(channel, **options)
+        return breaker
+
+    def health(self) -> Dict[str, dict]:
+        """Instantané de santé de tous les canaux observés."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {channel: breaker.snapshot() for channel, breaker in breakers.items()}
+
+    def wrap(self, notifier: INotifier, channel,
+             fallback: Optional[Callable[[], INotifier]] = None) -> INotifier:
+        return CircuitBreakerNotifier(notifier, self.get(channel), fallback)
+
+    def wrap_async(self, notifier: AsyncNotifier, channel,
+                   fallback: Optional[Callable[[], AsyncNotifier]] = None) -> AsyncNotifier:
+        return AsyncCircuitBreakerNotifier(notifier, self.get(channel), fallback)
+
+
+class _CircuitBreakerWrapper:
+    """
+    Base des décorateurs : échec immédiat (ou canal de repli) quand le
+    circuit est ouvert.
+
+    fallback est un fournisseur de notifier, résolu au premier besoin.
+    Un envoi refusé par validate() du notifier (destinataire ou message
+    invalide) n'est pas une panne du fournisseur : il n'est ni compté par
+    le circuit, ni bloqué par lui.
+    """
+
+    def __init__(self, notifier, breaker: CircuitBreaker,
+                 fallback: Optional[Callable[[], object]] = None):
+        self.notifier = notifier
+        self.breaker = breaker
+        self._fallback_provider = fallback
+        self._fallback = None
+
+    def get_channel_name(self) -> str:
+        return self.notifier.get_channel_name()
+
+    def _degraded(self):
+        if self._fallback is None and self._fallback_provider is not None:
+            self._fallback = self._fallback_provider()
+        if self._fallback is not None:
+            emit(WARNING, "circuit.fallback", channel=self.breaker.name,
+                 fallback=self._fallback.get_channel_name())
+        else:
+            emit(WARNING, "circuit.rejected", channel=self.breaker.name)
+        return self._fallback
+
+    def _is_valid(self, recipient, message) -> bool:
+        validate = getattr(self.notifier, "validate", None)
+        if validate is None:
+            return True
+        result = validate(recipient, message)
+        # BaseNotifier.validate -> bool, EmailNotifier.validate -> (bool, raison)
+        return result[0] if isinstance(result, tuple) else bool(result)
+
+
+class CircuitBreakerNotifier(_CircuitBreakerWrapper, INotifier):
+    """Décorateur coupe-circuit d'un INotifier."""
+
+    def send(self, recipient, message, **kwargs) -> bool:
+        if not self._is_valid(recipient, message):
+            return self.notifier.send(recipient, message, **kwargs)  # rejet du notifier
+        if not self.breaker.allow():
+            fallback = self._degraded()
+            return fallback.send(recipient, message, **kwargs) if fallback is not None else False
+        start = time.perf_counter()
+        ok = False
+        try:
+            ok = self.notifier.send(recipient, message, **kwargs)
+            return ok
+        finally:
+            self.breaker.record(bool(ok), time.perf_counter() - start)
+
+    def send_batch(self, items, **kwargs):
+        items = list(items)
+        if not self.breaker.allow():
+            fallback = self._degraded()
+            if fallback is None:
+                return [False] * len(items)
+            return fallback.send_batch(items, **kwargs)
+        valid = [self._is_valid(recipient, message) for recipient, message in items]
+        start = time.perf_counter()
+        results = self.notifier.send_batch(items, **kwargs)
+        latency = (time.perf_counter() - start) / max(len(results), 1)
+        # Le lot est jugé comme un seul appel, sur ses seuls envois valides
+        self.breaker.record(all(ok for ok, is_valid in zip(results, valid) if is_valid), latency)
+        return results
+
+    def close(self) -> None:
+        self.notifier.close()
+
+    def __getattr__(self, name):
+        return getattr(self.notifier, name)
+
+
+class AsyncCircuitBreakerNotifier(_CircuitBreakerWrapper, AsyncNotifier):
+    """Équivalent asyncio de CircuitBreakerNotifier (le repli est un AsyncNotifier)."""
+
+    async def send(self, recipient: str, message: str) -> bool:
+        if not self._is_valid(recipient, message):
+            return await self.notifier.send(recipient, message)  # rejet du notifier
+        if not self.breaker.allow():
+            fallback = self._degraded()
+            return await fallback.send(recipient, message) if fallback is not None else False
+        start = time.perf_counter()
+        ok = False
+        try:
+            ok = await self.notifier.send(recipient, message)
+            return ok
+        finally:
+            self.breaker.record(bool(ok), time.perf_counter() - start)
+
+    async def close(self) -> None:
+        await self.notifier.close()
+
+
+# Test
+if __name__ == "__main__":
+    from event_sink import ConsoleSink, set_sink
+    set_sink(ConsoleSink())
+
+    breaker = CircuitBreaker("sms", min_calls=5, error_rate=0.5, open_seconds=0.2,
+                             half_open_calls=2)
+    provider_up = False
+
+    def send_sms():
+        time.sleep(0.01)
+        return provider_up
+
+    start = time.perf_counter()
+    for _ in range(100):
+        try:
+            breaker.call(send_sms)
+        except CircuitOpenError:
+            pass
+    print(f"⚡ 100 envois pendant la panne en {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({breaker.rejected} refusés sans appel)")
+    print(f"🩺 {breaker.snapshot()}")
+
+    provider_up = True
+    time.sleep(0.25)
+    for _ in range(3):
+        breaker.call(send_sms)
+    print(f"✅ Après rétablissement: {breaker.state}")
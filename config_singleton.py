@@ -1,3 +1,6 @@
+from notifier_interface import channel_key
+
+
 class NotificationConfig:
     _instance = None
     
@@ -10,13 +13,40 @@ class NotificationConfig:
     def _initialize(self):
         self.email_host = "smtp.techflow.com"
         self.email_port = 587
+        self.email_user = "notifications@techflow.com"
+        self.email_password = None
+        self.email_use_tls = True
+        self.email_pool_size = 4
+        self.email_idle_timeout = 60.0
         self.sms_api_key = "sk_live_xxxxx"
         self.push_api_key = "pk_xxxxx"
         self.slack_webhook = "https://hooks.slack.com/..."
+        # Quotas fournisseurs par canal : (envois/seconde, rafale max)
+        self.rate_limits = {
+            "sms": (10, 20),
+            "push": (500, 1000),
+            "slack": (1, 5),
+            "teams": (4, 10),
+            "whatsapp": (80, 80),
+        }
     
     def get_email_config(self):
         return {"host": self.email_host, "port": self.email_port}
     
+    def get_email_pool_config(self):
+        return {
+            "host": self.email_host,
+            "port": self.email_port,
+            "user": self.email_user,
+            "password": self.email_password,
+            "use_tls": self.email_use_tls,
+            "pool_size": self.email_pool_size,
+            "idle_timeout": self.email_idle_timeout,
+        }
+    
+    def get_rate_limit(self, channel):
+        return self.rate_limits.get(channel_key(channel))
+    
     def get_sms_config(self):
         return {"api_key": self.sms_api_key}
 
@@ -6,4 +6,11 @@ class ConsoleNotifier(INotifier):
     
     def send(self, recipient, message):
         print(f"[CONSOLE] À {recipient}: {message}")
-        return True
\ No newline at end of file
+        return True
+    
+    def send_batch(self, items):
+        # Une seule écriture sur stdout pour tout le lot
+        lines = [f"[CONSOLE] À {recipient}: {message}" for recipient, message in items]
+        if lines:
+            print("\n".join(lines))
+        return [True] * len(lines)
\ No newline at end of file
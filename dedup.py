@@ -0,0 +1,273 @@
+"""
+Déduplication et regroupement des notifications répétées.
+
+Le workflow des congés et les envois en masse peuvent envoyer plusieurs
+fois le même message au même destinataire (send_bulk relancé après un
+incident, transitions qui notifient les mêmes personnes...).
+
+- Deduplicator : clé d'idempotence (canal, destinataire, empreinte du
+  contenu) conservée pendant une fenêtre de temps, dans un ensemble
+  borné en mémoire (empreintes de 16 octets, expiration FIFO).
+- Coalescer : regroupe les messages d'un même destinataire en un seul
+  récapitulatif (digest) envoyé à la fin de la fenêtre.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from notifier_interface import channel_key
+
+
+def content_key(channel, recipient: str, message: str) -> bytes:
+    """Empreinte (16 octets) de (canal, destinataire, contenu)."""
+    channel = channel_key(channel)
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (channel, recipient, message):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.digest()
+
+
+class TTLSet:
+    """
+    Ensemble de clés expirant après ttl secondes, borné à max_entries.
+
+    Le ttl étant le même pour toutes les clés, l'ordre d'insertion du dict
+    est aussi l'ordre d'expiration : la purge ne parcourt que les clés
+    effectivement expirées, en tête. Au-delà de max_entries, les plus
+    anciennes sont évincées avant terme.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1_000_000):
+        if ttl <= 0 or max_entries < 1:
+            raise ValueError("ttl et max_entries doivent être positifs")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._expiry: Dict[bytes, float] = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _purge(self, now: float):
+        expiry = self._expiry
+        while expiry:
+            key = next(iter(expiry))
+            if expiry[key] > now and len(expiry) <= self.max_entries:
+                break
+            if expiry.pop(key) > now:
+                self.evicted += 1
+
+    def add(self, key: bytes) -> bool:
+        """Ajoute la clé. Retourne False si elle était déjà présente (et valide)."""
+        now = time.monotonic()
+        with self._lock:
+            expires = self._expiry.get(key)
+            if expires is not None and expires > now:
+                return False
+            self._expiry.pop(key, None)
+            self._expiry[key] = now + self.ttl
+            self._purge(now)
+            return True
+
+    def discard(self, key: bytes):
+        with self._lock:
+            self._expiry.pop(key, None)
+
+    def __contains__(self, key: bytes) -> bool:
+        with self._lock:
+            expires = self._expiry.get(key)
+            return expires is not None and expires > time.monotonic()
+
+    def __len__(self):
+        with self._lock:
+            self._purge(time.monotonic())
+            return len(self._expiry)
+
+    def clear(self):
+        with self._lock:
+            self._expiry.clear()
+
+
+class Deduplicator:
+    """
+    Filtre d'idempotence sur (canal, destinataire, contenu).
+
+    Usage type : claim() avant l'envoi, release() si l'envoi échoue pour
+    qu'une relance ne soit pas considérée comme un doublon.
+
+    Args:
+        window: Durée (secondes) pendant laquelle un envoi identique est ignoré
+        max_entries: Nombre maximal d'empreintes gardées en mémoire
+    """
+
+    def __init__(self, window: float = 3600.0, max_entries: int = 1_000_000):
+        self.window = window
+        self._keys = TTLSet(window, max_entries)
+        self.skipped = 0
+
+    def claim(self, channel, recipient: str, message: str) -> bool:
+        """True si l'envoi est nouveau (et le réserve), False si c'est un doublon."""
+        if self._keys.add(content_key(channel, recipient, message)):
+            return True
+        self.skipped += 1
+        return False
+
+    def release(self, channel, recipient: str, message: str):
+        """Oublie un envoi réservé (échec d'envoi)."""
+        self._keys.discard(content_key(channel, recipient, message))
+
+    def is_duplicate(self, channel, recipient: str, message: str) -> bool:
+        """Test sans réservation."""
+        return content_key(channel, recipient, message) in self._keys
+
+    def filter(self, channel, recipients: Iterable[str], message: str) -> Iterator[str]:
+        """Ne laisse passer que les destinataires pas encore servis (au fil de l'eau)."""
+        for recipient in recipients:
+            if self.claim(channel, recipient, message):
+                yield recipient
+
+    def clear(self):
+        self._keys.clear()
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class Coalescer:
+    """
+    Regroupe les messages d'un destinataire en un récapitulatif.
+
+    Les messages ajoutés pour un même (canal, destinataire) sont retenus
+    pendant window secondes (ou jusqu'à max_items), puis envoyés en un
+    seul appel. Un message seul est envoyé tel quel.
+
+    Avec auto_flush, un thread d'arrière-plan (démarré au premier ajout)
+    envoie chaque récapitulatif à son échéance, même sans nouvel ajout.
+    Sans auto_flush, le propriétaire doit appeler flush(expired_only=True)
+    périodiquement. close() (ou la sortie du with) envoie tout ce qui reste.
+
+    Args:
+        send_func: send_func(recipient, message, channel) -> bool
+        window: Délai de regroupement (secondes)
+        max_items: Taille maximale d'un récapitulatif
+        auto_flush: Envoi à échéance par un thread dédié
+    """
+
+    def __init__(self, send_func: Callable, window: float = 60.0, max_items: int = 20,
+                 header: str = "Vous avez {count} notifications :", auto_flush: bool = True):
+        self.send_func = send_func
+        self.window = window
+        self.max_items = max_items
+        self.header = header
+        self.auto_flush = auto_flush
+        self._pending: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._timer: Optional[threading.Thread] = None
+        self._closed = False
+
+    def add(self, channel, recipient: str, message: str):
+        """Ajoute un message ; envoie les récapitulatifs arrivés à échéance."""
+        key = (channel_key(channel), recipient)
+        full = None
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Coalescer fermé")
+            if key not in self._pending:
+                self._pending[key] = (time.monotonic(), [])
+                self._cond.notify()
+            messages = self._pending[key][1]
+            if message not in messages:
+                messages.append(message)
+            if len(messages) >= self.max_items:
+                full = self._pending.pop(key)[1]
+            if self.auto_flush and self._timer is None:
+                self._timer = threading.Thread(target=self._run, name="coalescer-flush",
+                                               daemon=True)
+                self._timer.start()
+        if full is not None:
+            self._send(key, full)
+        if not self.auto_flush:
+            self.flush(expired_only=True)
+
+    def _run(self):
+        """Thread d'envoi : dort jusqu'à la prochaine échéance."""
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if not self._pending:
+                        self._cond.wait()
+                        continue
+                    due = min(started for started, _ in self._pending.values()) + self.window
+                    delay = due - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if self._closed:
+                    return
+            self.flush(expired_only=True)
+
+    def digest(self, messages: List[str]) -> str:
+        if len(messages) == 1:
+            return messages[0]
+        lines = [self.header.format(count=len(messages))]
+        lines.extend(f"- {message}" for message in messages)
+        return "\n".join(lines)
+
+    def _send(self, key: Tuple[str, str], messages: List[str]) -> bool:
+        channel, recipient = key
+        try:
+            return bool(self.send_func(recipient, self.digest(messages), channel))
+        except Exception:
+            return False
+
+    def flush(self, expired_only: bool = False) -> int:
+        """Envoie les récapitulatifs (tous, ou seulement ceux échus). Retourne leur nombre."""
+        now = time.monotonic()
+        with self._lock:
+            ready = [key for key, (started, _) in self._pending.items()
+                     if not expired_only or now - started >= self.window]
+            batches = [(key, self._pending.pop(key)[1]) for key in ready]
+        for key, messages in batches:
+            self._send(key, messages)
+        return len(batches)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(messages) for _, messages in self._pending.values())
+
+    def close(self):
+        """Arrête le thread d'envoi et envoie les récapitulatifs restants."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            timer = self._timer
+        if timer is not None:
+            timer.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Test
+if __name__ == "__main__":
+    dedup = Deduplicator(window=60)
+    recipients = [f"employee{i}@techflow.com" for i in range(1_000)]
+    first = sum(1 for _ in dedup.filter("email", recipients, "Newsletter"))
+    second = sum(1 for _ in dedup.filter("email", recipients, "Newsletter"))
+    print(f"🔁 send_bulk relancé: {first} envois puis {second} (doublons ignorés: {dedup.skipped})")
+
+    def show(recipient, message, channel):
+        print(f"📧 [{channel}] {recipient}:\n{message}")
+        return True
+
+    with Coalescer(show, window=60) as coalescer:
+        coalescer.add("email", "manager@techflow.com", "Nouvelle demande de EMP001")
+        coalescer.add("email", "manager@techflow.com", "Nouvelle demande de EMP002")
+        coalescer.add("email", "manager@techflow.com", "Demande 42 annulée")
+        print(f"⏳ En attente de regroupement: {coalescer.pending()}")
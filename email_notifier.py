@@ -4,34 +4,57 @@ Implémentation concrète de INotifier.
 """
 
 import sys
+from email.message import EmailMessage
 sys.path.append('..')
 sys.path.append('../02-singleton')
 
 from notifier_interface import INotifier
 from config_singleton import NotificationConfig
+from event_sink import DEBUG, ERROR, INFO, WARNING, emit
+from recipient_validator import VALIDATOR
+from smtp_pool import SMTPConnectionPool
+from template_engine import TEMPLATES
 
 
 class EmailNotifier(INotifier):
     """Notifier pour les emails."""
     
-    def __init__(self):
+    def __init__(self, pool=None, use_pool: bool = False):
+        """
+        Args:
+            pool: SMTPConnectionPool optionnel, éventuellement partagé entre
+                notifiers : il reste à l'appelant, qui le ferme.
+            use_pool: Sans pool fourni, crée un pool propre au notifier
+                (NotificationConfig), fermé par close(). Sans pool du
+                tout, l'envoi est simulé.
+        """
         self.config = NotificationConfig()
         self.email_config = self.config.get_email_config()
+        self._owns_pool = pool is None and use_pool
+        if self._owns_pool:
+            pool = SMTPConnectionPool.from_config(self.config)
+        self.pool = pool
     
     def get_channel_name(self) -> str:
         return "email"
     
+    def close(self) -> None:
+        """Ferme le pool SMTP s'il a été créé par ce notifier (un pool fourni reste ouvert)."""
+        if self._owns_pool:
+            self.pool.close()
+    
     def validate(self, recipient: str, message: str) -> tuple[bool, str]:
         """Validation spécifique aux emails."""
         # Validation basique
         if not recipient or not recipient.strip():
             return False, "❌ Le destinataire est vide"
         
-        if not message or not message.strip():
-            return False, "❌ Le message est vide"
+        reason = VALIDATOR.check_message(message)
+        if reason:
+            return False, f"❌ {reason}"
         
-        # Validation du format email
-        if "@" not in recipient or "." not in recipient:
+        # Validation du format email (règle compilée, résultat en cache)
+        if VALIDATOR.normalize("email", recipient) is None:
             return False, f"❌ Format d'email invalide: '{recipient}'"
         
         return True, "✅ Validation réussie"
@@ -47,6 +70,7 @@ class EmailNotifier(INotifier):
                 - priority: 'low', 'normal', 'high', 'urgent'
                 - subject: Sujet personnalisé
                 - attachments: Liste de fichiers joints
+                - locale: Langue des gabarits ('fr' par défaut)
         
         Returns:
             bool: True si l'envoi a réussi
@@ -54,7 +78,7 @@ class EmailNotifier(INotifier):
         # Validation
         is_valid, error_message = self.validate(recipient, message)
         if not is_valid:
-            print(error_message)
+            emit(WARNING, "email.invalid", recipient=recipient, reason=error_message)
             return False
         
         # Récupération des options
@@ -63,37 +87,79 @@ class EmailNotifier(INotifier):
         attachments = kwargs.get('attachments', [])
         
         # Formatage selon la priorité
-        if priority == 'urgent':
-            subject = f"🚨 URGENT: {subject}"
-            priority_indicator = "🔴"
-        elif priority == 'high':
-            subject = f"⚠️ IMPORTANT: {subject}"
-            priority_indicator = "🟡"
-        elif priority == 'low':
-            subject = f"📎 NOTE: {subject}"
-            priority_indicator = "🟢"
-        else:
-            priority_indicator = "🔵"
+        subject = self._format_subject(subject, priority, kwargs.get('locale'))
+        
+        # Envoi réel via le pool de connexions SMTP persistantes
+        if self.pool is not None:
+            try:
+                self.pool.send_message(self._build_message(recipient, subject, message))
+            except Exception as e:
+                emit(ERROR, "email.failed", recipient=recipient, error=str(e))
+                return False
+            emit(INFO, "email.sent", recipient=recipient, subject=subject, priority=priority)
+            return True
         
         # Simulation d'envoi d'email
-        print("\n" + "=" * 60)
-        print("📧 EMAIL NOTIFICATION")
-        print("=" * 60)
-        print(f"{priority_indicator} Priorité: {priority}")
-        print(f"📨 De: notifications@{self.email_config['host']}")
-        print(f"📬 À: {recipient}")
-        print(f"🏢 Serveur SMTP: {self.email_config['host']}:{self.email_config['port']}")
-        print(f"📝 Sujet: {subject}")
-        print(f"📄 Pièces jointes: {len(attachments)} fichier(s)")
-        print("-" * 60)
-        print(f"📋 Message:")
-        print(f"{message}")
-        print("=" * 60)
-        print("✅ Email envoyé avec succès (simulation)")
-        print("=" * 60 + "\n")
+        emit(INFO, "email.sent", recipient=recipient, subject=subject, priority=priority,
+             server=f"{self.email_config['host']}:{self.email_config['port']}",
+             attachments=len(attachments), simulated=True)
         
         return True
     
+    def _format_subject(self, subject: str, priority: str, locale: str = None) -> str:
+        """Préfixe le sujet selon la priorité (gabarit 'email.subject')."""
+        return TEMPLATES.render("email.subject", priority, locale, subject=subject)
+    
+    def _build_message(self, recipient: str, subject: str, body: str) -> EmailMessage:
+        """Construit le message MIME à envoyer."""
+        msg = EmailMessage()
+        msg["From"] = self.config.email_user
+        msg["To"] = recipient
+        msg["Subject"] = subject
+        msg.set_content(body)
+        return msg
+    
+    def send_batch(self, items, **kwargs) -> list[bool]:
+        """
+        Envoie un lot d'emails dans une seule session SMTP.
+        
+        Args:
+            items: Itérable de (recipient, message)
+            **kwargs: Options communes au lot ('priority', 'subject')
+        
+        Returns:
+            list[bool]: Résultat de chaque envoi, dans l'ordre des items
+        """
+        priority = kwargs.get('priority', 'normal')
+        results = []
+        to_send = []  # (index dans results, message MIME)
+        
+        for recipient, message in items:
+            is_valid, error_message = self.validate(recipient, message)
+            if not is_valid:
+                emit(WARNING, "email.invalid", recipient=recipient, reason=error_message)
+                results.append(False)
+                continue
+            subject = self._format_subject(
+                kwargs.get('subject', message[:50] + "..."), priority, kwargs.get('locale')
+            )
+            emit(DEBUG, "email.queued", recipient=recipient, subject=subject)
+            if self.pool is not None:
+                to_send.append((len(results), self._build_message(recipient, subject, message)))
+            results.append(True)
+        
+        # Une connexion pour tout le lot (pipelining SMTP)
+        if to_send:
+            sent_flags = self.pool.send_messages(msg for _, msg in to_send)
+            for (index, _), ok in zip(to_send, sent_flags):
+                results[index] = ok
+        
+        emit(INFO, "email.batch_sent", sent=sum(results), total=len(results),
+             server=f"{self.email_config['host']}:{self.email_config['port']}",
+             simulated=self.pool is None)
+        
+        return results
+    
     def format_message(self, message: str, **kwargs) -> str:
         """Formate le message pour l'email."""
         signature = kwargs.get('signature', "\n\n--\nTechFlow Notifications")
@@ -108,6 +174,9 @@ class EmailNotifier(INotifier):
 
 # Tests unitaires
 if __name__ == "__main__":
+    from event_sink import ConsoleSink, set_sink
+    set_sink(ConsoleSink())
+    
     print("🧪 TEST EMAIL NOTIFIER")
     print("=" * 60)
     
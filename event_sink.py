@@ -0,0 +1,133 @@
+"""
+Event sinks - Journal d'événements structurés et levellés.
+
+Les notifiers, la Factory et le service legacy n'écrivent plus sur stdout
+pendant l'envoi : ils émettent des événements (nom + champs) vers un sink
+global. Le sink par défaut (NullSink) ne coûte qu'une comparaison d'entier.
+"""
+
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import List, Optional, Tuple
+
+# Mêmes valeurs que le module logging
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+# Niveau au-dessus de tous les autres : rien n'est émis
+DISABLED = 100
+
+
+class EventSink(ABC):
+    """Destination des événements. level = niveau minimum accepté."""
+
+    level = INFO
+
+    @abstractmethod
+    def emit(self, level: int, event: str, fields: dict) -> None:
+        pass
+
+    def close(self) -> None:
+        """Vide les tampons éventuels. Rien à faire par défaut."""
+
+
+class NullSink(EventSink):
+    """Ignore tout : sink de production par défaut."""
+
+    level = DISABLED
+
+    def emit(self, level, event, fields):
+        pass
+
+
+class ConsoleSink(EventSink):
+    """Affiche chaque événement sur une ligne (démos, développement)."""
+
+    def __init__(self, level: int = INFO):
+        self.level = level
+
+    def emit(self, level, event, fields):
+        details = " ".join(f"{key}={value}" for key, value in fields.items())
+        print(f"[{logging.getLevelName(level)}] {event} {details}".rstrip())
+
+
+class BufferedSink(EventSink):
+    """Garde les derniers événements en mémoire (tests, diagnostic)."""
+
+    def __init__(self, level: int = DEBUG, capacity: int = 10_000):
+        self.level = level
+        self.events = deque(maxlen=capacity)
+
+    def emit(self, level, event, fields):
+        self.events.append((time.time(), level, event, fields))
+
+    def names(self) -> List[str]:
+        return [event for _, _, event, _ in self.events]
+
+    def find(self, event: str) -> List[dict]:
+        return [fields for _, _, name, fields in self.events if name == event]
+
+
+class QueueSink(EventSink):
+    """
+    Délègue l'écriture à un thread de fond via une file bornée.
+
+    L'appelant ne fait qu'un put_nowait : un consommateur de logs lent
+    ne bloque jamais l'envoi. Si la file est pleine, l'événement est
+    abandonné et compté dans dropped.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None,
+                 level: int = INFO, maxsize: int = 100_000):
+        self.level = level
+        self.logger = logger or logging.getLogger("notifications")
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Tuple[int, str, dict]]]" = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._drain, name="event-sink", daemon=True)
+        self._thread.start()
+
+    def emit(self, level, event, fields):
+        try:
+            self._queue.put_nowait((level, event, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            level, event, fields = item
+            self.logger.log(level, "%s %s", event, fields)
+
+    def close(self):
+        """Écrit les événements en attente puis arrête le thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+
+_sink: EventSink = NullSink()
+
+
+def get_sink() -> EventSink:
+    return _sink
+
+
+def set_sink(sink: EventSink) -> EventSink:
+    """Installe un sink global et retourne le précédent."""
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def emit(level: int, event: str, **fields) -> None:
+    """Émet un événement vers le sink global s'il accepte ce niveau."""
+    sink = _sink
+    if level >= sink.level:
+        sink.emit(level, event, fields)
@@ -0,0 +1,309 @@
+"""
+EventStore - Journal d'événements append-only pour l'historique des demandes.
+
+Chaque LeaveRequest gardait une liste history de dicts (avec un
+datetime.now().isoformat() par transition) : des millions de demandes
+gardaient tout leur audit en mémoire. Le journal le déplace sur disque :
+
+- une ligne JSON compacte par événement : [id, horodatage, action, statut,
+  position de l'événement précédent de la même demande] ;
+- écritures bufferisées, fsync par lot (toutes les sync_every lignes, et
+  au plus sync_interval secondes après une écriture grâce à un thread de
+  synchronisation) ; fermeture automatique à la sortie du programme ;
+- lecture par mmap, sans charger le fichier ; l'historique d'une demande
+  part de son dernier événement (index id -> position) et remonte la
+  chaîne, sans parcourir le journal ;
+- snapshot des statuts + rejeu de la fin du journal pour reconstruire
+  l'état de toutes les demandes.
+"""
+
+import atexit
+import json
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+Event = Tuple[int, float, str, str]  # (id, horodatage, action, statut)
+
+NO_PREVIOUS = -1
+
+
+class EventStore:
+    """
+    Journal append-only (JSONL) avec snapshot.
+
+    Args:
+        path: Fichier du journal (le snapshot est écrit dans path + ".snapshot")
+        sync_every: fsync après N événements...
+        sync_interval: ... ou au plus N secondes après une écriture
+            (thread de synchronisation, même sans nouvelle écriture)
+    """
+
+    def __init__(self, path: str = "leave_events.jsonl", sync_every: int = 1000,
+                 sync_interval: float = 1.0):
+        self.path = path
+        self.snapshot_path = f"{path}.snapshot"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._repair()
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self.syncs = 0
+        self._last: Dict[int, int] = {}  # id -> position de son dernier événement
+        self._load_index()
+        self._closed = threading.Event()
+        self._syncer = threading.Thread(target=self._run_sync, name="event-store-sync",
+                                        daemon=True)
+        self._syncer.start()
+        atexit.register(self.close)
+
+    def _repair(self):
+        """Tronque une dernière ligne incomplète (arrêt pendant une écriture)."""
+        try:
+            if os.path.getsize(self.path) == 0:
+                return
+        except FileNotFoundError:
+            return
+        with open(self.path, "r+b") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[-1:] == b"\n":
+                    return
+                end = data.rfind(b"\n") + 1
+            f.truncate(end)
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def encode(stream_id: int, timestamp: float, action: str, status: str,
+               previous: int = NO_PREVIOUS) -> bytes:
+        return json.dumps([stream_id, round(timestamp, 3), action, status, previous],
+                          separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+
+    def _write(self, events: List[Tuple[int, float, str, str]]):
+        """
+        Écrit sous verrou (chaque ligne pointe sur l'événement précédent de
+        sa demande) et déclenche le fsync par lot.
+        """
+        with self._lock:
+            last, position, lines = self._last, self._size, []
+            for stream_id, timestamp, action, status in events:
+                line = self.encode(stream_id, timestamp, action, status,
+                                   last.get(stream_id, NO_PREVIOUS))
+                last[stream_id] = position
+                position += len(line)
+                lines.append(line)
+            self._file.write(b"".join(lines))
+            self._size = position
+            self._pending += len(lines)
+            if self._pending >= self.sync_every:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self.syncs += 1
+
+    def _run_sync(self):
+        """fsync des écritures en attente toutes les sync_interval secondes."""
+        while not self._closed.wait(self.sync_interval):
+            with self._lock:
+                if self._pending and not self._file.closed:
+                    self._sync()
+
+    def append(self, stream_id: int, action: str, status: str,
+               timestamp: Optional[float] = None):
+        """Ajoute un événement pour la demande stream_id."""
+        self._write([(stream_id, time.time() if timestamp is None else timestamp,
+                      action, status)])
+
+    def append_many(self, events: Iterable[Tuple[int, str, str]]):
+        """Ajoute des (id, action, statut) en une seule écriture."""
+        now = time.time()
+        batch = [(stream_id, now, action, status) for stream_id, action, status in events]
+        if batch:
+            self._write(batch)
+
+    def flush(self, sync: bool = True):
+        """Vide le buffer (et fsync si sync)."""
+        with self._lock:
+            if sync:
+                self._sync()
+            else:
+                self._file.flush()
+
+    def close(self):
+        """Arrête le thread de synchronisation, fsync et ferme (idempotent)."""
+        self._closed.set()
+        if self._syncer is not threading.current_thread():
+            self._syncer.join()
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Lecture (mmap)
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _mapped(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+            size = self._size
+        if size == 0:
+            yield b"", 0
+            return
+        with open(self.path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data, size
+
+    @staticmethod
+    def _decode(line: bytes) -> Event:
+        stream_id, timestamp, action, status = json.loads(line)[:4]
+        return stream_id, timestamp, action, status
+
+    def events(self, offset: int = 0) -> Iterator[Event]:
+        """Événements à partir de l'octet offset, dans l'ordre d'écriture."""
+        with self._mapped() as (data, size):
+            while offset < size:
+                end = data.find(b"\n", offset, size)
+                yield self._decode(data[offset:end])
+                offset = end + 1
+
+    def history(self, stream_id: int) -> List[dict]:
+        """
+        Historique d'une demande : lecture de son dernier événement (index
+        id -> position) puis remontée de la chaîne des événements précédents.
+        Coût proportionnel au nombre d'événements de la demande.
+        """
+        with self._lock:
+            position = self._last.get(stream_id, NO_PREVIOUS)
+        result = []
+        with self._mapped() as (data, size):
+            while position != NO_PREVIOUS:
+                _, timestamp, action, status, position = json.loads(
+                    data[position:data.find(b"\n", position, size)])
+                result.append({
+                    "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                    "action": action,
+                    "status": status,
+                })
+        result.reverse()
+        return result
+
+    # ------------------------------------------------------------------
+    # Snapshot et reconstruction
+    # ------------------------------------------------------------------
+
+    def _read_snapshot(self) -> Optional[dict]:
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        if snapshot["offset"] > self._size:
+            return None  # journal remplacé ou tronqué : snapshot ignoré
+        return snapshot
+
+    def _load_snapshot(self) -> Tuple[Dict[int, str], int]:
+        snapshot = self._read_snapshot()
+        if snapshot is None:
+            return {}, 0
+        return {int(k): v for k, v in snapshot["states"].items()}, snapshot["offset"]
+
+    def _load_index(self):
+        """
+        Index id -> dernier événement à l'ouverture : celui du snapshot,
+        complété par la fin du journal (tout le journal sans snapshot).
+        """
+        snapshot = self._read_snapshot()
+        offset = 0
+        if snapshot is not None and "last" in snapshot:
+            self._last = {int(k): v for k, v in snapshot["last"].items()}
+            offset = snapshot["offset"]
+        with self._mapped() as (data, size):
+            while offset < size:
+                end = data.find(b"\n", offset, size)
+                self._last[json.loads(data[offset:end])[0]] = offset
+                offset = end + 1
+
+    def rebuild(self) -> Dict[int, str]:
+        """Statut courant de chaque demande : snapshot + rejeu de la fin du journal."""
+        states, offset = self._load_snapshot()
+        for stream_id, _, _, status in self.events(offset):
+            states[stream_id] = status
+        return states
+
+    def snapshot(self) -> Dict[int, str]:
+        """
+        Écrit un snapshot couvrant tout le journal actuel (remplacement
+        atomique) : statuts et index id -> dernier événement.
+        """
+        snapshot = self._read_snapshot()
+        if snapshot is None or "last" not in snapshot:
+            states, last, offset = {}, {}, 0
+        else:
+            states = {int(k): v for k, v in snapshot["states"].items()}
+            last = {int(k): v for k, v in snapshot["last"].items()}
+            offset = snapshot["offset"]
+        with self._mapped() as (data, size):
+            while offset < size:
+                end = data.find(b"\n", offset, size)
+                stream_id, _, _, status = self._decode(data[offset:end])
+                states[stream_id] = status
+                last[stream_id] = offset
+                offset = end + 1
+        tmp = f"{self.snapshot_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"offset": offset, "states": states, "last": last}, f,
+                      separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        return states
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), "leave_events.jsonl")
+    store = EventStore(path)
+    start = time.perf_counter()
+    for request_id in range(1, 100_001):
+        store.append(request_id, "Création", "draft")
+    store.append_many((request_id, "submit (lot)", "submitted") for request_id in range(1, 50_001))
+    store.flush()
+    print(f"📝 150k événements en {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({store.syncs} fsync, {os.path.getsize(path) // 1024} Ko)")
+
+    start = time.perf_counter()
+    print(f"🔎 Historique de la demande 42: {store.history(42)} "
+          f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+    store.snapshot()
+    store.append(7, "cancel", "cancelled")
+    start = time.perf_counter()
+    states = store.rebuild()
+    print(f"♻️  {len(states)} demandes reconstruites (snapshot + 1 événement) en "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms, demande 7: {states[7]}")
+    store.close()
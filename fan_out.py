@@ -0,0 +1,160 @@
+"""
+FanOut - Envoi d'une même alerte sur plusieurs canaux en parallèle.
+
+send_multi_channel appelait les canaux l'un après l'autre : une alerte
+email + SMS + push + Slack attendait la somme des quatre latences
+fournisseur. Ici tous les canaux partent en même temps ; on rend la main
+quand tous ont répondu (mode "all") ou dès qu'assez de canaux ont réussi
+(modes "first_success" et "quorum"), avec un délai maximal par canal.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+from event_sink import DEBUG, WARNING, emit
+
+MODES = ("all", "first_success", "quorum")
+
+
+class FanOut:
+    """
+    Exécuteur de fan-out multi-canal.
+
+    Les tâches sont des callables sans argument retournant un bool ; le
+    résultat garde la forme historique {canal: bool}, dans l'ordre des
+    canaux demandés. Un canal qui n'a pas répondu à temps (timeout, ou
+    retour anticipé en mode quorum) vaut False : son appel continue en
+    arrière-plan mais n'est plus attendu.
+    """
+
+    def __init__(self, max_workers: int = 32):
+        if max_workers < 1:
+            raise ValueError("max_workers doit être >= 1")
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="fan-out"
+                )
+            return self._executor
+
+    @staticmethod
+    def _call(func: Callable[[], bool]) -> bool:
+        try:
+            return bool(func())
+        except Exception:
+            # Un canal en erreur ne doit pas faire échouer les autres
+            return False
+
+    def run(self, tasks: Dict[str, Callable[[], bool]], mode: str = "all",
+            quorum: int = 1, timeout: Optional[float] = None,
+            timeouts: Optional[Dict[str, float]] = None) -> Dict[str, bool]:
+        """
+        Lance toutes les tâches en parallèle.
+
+        Args:
+            tasks: {canal: callable}
+            mode: "all" (attendre tous les canaux), "first_success"
+                (premier succès) ou "quorum" (quorum succès)
+            quorum: Nombre de succès attendus en mode "quorum"
+            timeout: Délai maximal par défaut d'un canal (secondes)
+            timeouts: Délais spécifiques par canal
+
+        Returns:
+            dict: {canal: bool}
+        """
+        if mode not in MODES:
+            raise ValueError(f"Mode inconnu '{mode}' (attendu: {', '.join(MODES)})")
+        needed = {"all": None, "first_success": 1, "quorum": quorum}[mode]
+        timeouts = timeouts or {}
+        results = {channel: False for channel in tasks}
+        if not tasks:
+            return results
+
+        executor = self._get_executor()
+        start = time.monotonic()
+        futures = {executor.submit(self._call, func): channel
+                   for channel, func in tasks.items()}
+        deadlines = {}
+        for future, channel in futures.items():
+            limit = timeouts.get(channel, timeout)
+            if limit is not None:
+                deadlines[future] = start + limit
+
+        pending = set(futures)
+        successes = 0
+        while pending:
+            wait_for = None
+            pending_deadlines = [deadlines[f] for f in pending if f in deadlines]
+            if pending_deadlines:
+                wait_for = max(0.0, min(pending_deadlines) - time.monotonic())
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                ok = future.result()
+                results[futures[future]] = ok
+                successes += ok
+            if needed is not None and successes >= needed:
+                break
+            now = time.monotonic()
+            expired = {f for f in pending if deadlines.get(f, now + 1) <= now}
+            for future in expired:
+                future.cancel()
+                emit(WARNING, "fanout.timeout", channel=futures[future],
+                     timeout=round(deadlines[future] - start, 3))
+            pending -= expired
+
+        emit(DEBUG, "fanout.completed", mode=mode, channels=len(tasks),
+             success=successes, abandoned=len(pending),
+             ms=round((time.monotonic() - start) * 1000, 1))
+        return results
+
+    def close(self):
+        """Arrête le pool de threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Test
+if __name__ == "__main__":
+    from event_sink import ConsoleSink, set_sink
+    set_sink(ConsoleSink(DEBUG))
+
+    def provider(latency, ok=True):
+        def send():
+            time.sleep(latency)
+            return ok
+        return send
+
+    tasks = {
+        "email": provider(0.20),
+        "sms": provider(0.05),
+        "push": provider(0.10),
+        "slack": provider(0.30),
+    }
+
+    with FanOut() as fan_out:
+        start = time.perf_counter()
+        print(f"📡 all: {fan_out.run(tasks)} en {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        print(f"⚡ first_success: {fan_out.run(tasks, mode='first_success')} "
+              f"en {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        print(f"⏱️  timeout slack=0.15s: {fan_out.run(tasks, timeouts={'slack': 0.15})} "
+              f"en {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,265 @@
+"""
+IdGenerator - Identifiants uniques, croissants et triables (style snowflake).
+
+LeaveRequest utilisait id(self) : une adresse mémoire, réutilisée dès que
+l'objet est libéré. Deux demandes successives pouvaient donc avoir le même
+id, inutilisable comme clé de cache, d'index ou de stockage.
+
+Un identifiant tient dans un entier de 63 bits :
+
+    | 41 bits : millisecondes depuis EPOCH_MS | 10 bits : worker | 12 bits : séquence |
+
+- triable par date de création ;
+- unique entre processus : chaque générateur détient un bail exclusif sur
+  son worker id (fichier verrouillé dans TECHFLOW_WORKER_LEASE_DIR, libéré
+  par le système à la mort du processus). TECHFLOW_WORKER_ID choisit l'id
+  du processus principal ; un id déjà détenu par un autre processus lève
+  une erreur au lieu de produire des doublons, et un enfant forké prend
+  automatiquement un autre id libre ;
+- 4096 ids par milliseconde et par worker ; au-delà, l'horloge logique
+  avance d'une milliseconde au lieu d'attendre.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+EPOCH_MS = 1_704_067_200_000  # 2024-01-01 00:00:00 UTC
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+WORKER_ENV = "TECHFLOW_WORKER_ID"
+LEASE_DIR_ENV = "TECHFLOW_WORKER_LEASE_DIR"
+
+
+class WorkerIdConflict(RuntimeError):
+    """Le worker id demandé est déjà détenu par un autre générateur."""
+
+
+def configured_worker_id() -> Optional[int]:
+    """Worker id imposé par TECHFLOW_WORKER_ID, None s'il n'est pas défini."""
+    value = os.environ.get(WORKER_ENV)
+    if value is None:
+        return None
+    worker_id = int(value)
+    if not 0 <= worker_id <= MAX_WORKER_ID:
+        raise ValueError(f"{WORKER_ENV} doit être compris entre 0 et {MAX_WORKER_ID}")
+    return worker_id
+
+
+class WorkerLease:
+    """
+    Bail exclusif sur un worker id : un fichier par id, verrouillé
+    (flock / msvcrt) tant que le bail est tenu. Le système libère le
+    verrou à la mort du processus : pas de bail orphelin.
+
+    Args:
+        worker_id: Id demandé (WorkerIdConflict s'il est pris), None pour
+            le premier id libre
+        directory: Dossier des baux, partagé par les processus de la machine
+    """
+
+    def __init__(self, worker_id: Optional[int] = None, directory: Optional[str] = None):
+        self.directory = directory or os.environ.get(LEASE_DIR_ENV) or os.path.join(
+            tempfile.gettempdir(), "techflow_worker_ids")
+        os.makedirs(self.directory, exist_ok=True)
+        self.pid = os.getpid()
+        self._fd = None
+        if worker_id is not None:
+            if not 0 <= worker_id <= MAX_WORKER_ID:
+                raise ValueError(f"worker_id doit être compris entre 0 et {MAX_WORKER_ID}")
+            if not self._try(worker_id):
+                raise WorkerIdConflict(f"Worker id {worker_id} déjà utilisé "
+                                       f"(bail dans {self.directory})")
+        elif not any(self._try(candidate) for candidate in range(MAX_WORKER_ID + 1)):
+            raise WorkerIdConflict(f"Aucun des {MAX_WORKER_ID + 1} worker ids n'est libre")
+
+    def _try(self, worker_id: int) -> bool:
+        fd = os.open(os.path.join(self.directory, f"worker-{worker_id}.lock"),
+                     os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(self.pid).encode("ascii"))
+        self._fd = fd
+        self.worker_id = worker_id
+        return True
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            # Dans un enfant forké, fermer la copie du descripteur ne libère
+            # pas le verrou : le bail reste au parent qui a encore le sien.
+            os.close(fd)
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            pass
+
+
+class IdGenerator:
+    """
+    Générateur thread-safe ; le verrou ne couvre que quelques opérations
+    entières, et next_ids() réserve un bloc en une seule prise du verrou.
+
+    Chaque générateur tient un bail (WorkerLease) sur son worker id : deux
+    générateurs, dans un même processus ou non, n'ont jamais le même id.
+
+    Args:
+        worker_id: 0-1023, None pour le premier id libre
+        epoch_ms: Origine des horodatages (millisecondes Unix)
+        lease_dir: Dossier des baux (TECHFLOW_WORKER_LEASE_DIR par défaut)
+
+    Raises:
+        WorkerIdConflict: Si worker_id est déjà détenu
+    """
+
+    def __init__(self, worker_id: Optional[int] = None, epoch_ms: int = EPOCH_MS,
+                 lease_dir: Optional[str] = None):
+        self._lease = WorkerLease(worker_id, lease_dir)
+        self.worker_id = worker_id = self._lease.worker_id
+        self.epoch_ms = epoch_ms
+        self._worker_bits = worker_id << SEQUENCE_BITS
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _now_ms(self) -> int:
+        return time.time_ns() // 1_000_000 - self.epoch_ms
+
+    def _reserve(self, count: int) -> Tuple[int, int]:
+        """Réserve count séquences consécutives dans une même milliseconde (sous verrou)."""
+        now = self._now_ms()
+        if now > self._last_ms:
+            self._last_ms = now
+            self._sequence = 0
+        elif self._sequence + count > MAX_SEQUENCE + 1:
+            # Milliseconde épuisée (ou horloge qui recule) : on avance
+            # l'horloge logique pour rester croissant sans attendre.
+            self._last_ms += 1
+            self._sequence = 0
+        first = self._sequence
+        self._sequence += count
+        return self._last_ms, first
+
+    def _check_owner(self):
+        if os.getpid() != self._lease.pid:
+            raise WorkerIdConflict(f"Générateur du worker {self.worker_id} hérité d'un fork : "
+                                   "créer un IdGenerator dans le processus enfant")
+
+    def next_id(self) -> int:
+        self._check_owner()
+        with self._lock:
+            ms, sequence = self._reserve(1)
+        return (ms << TIMESTAMP_SHIFT) | self._worker_bits | sequence
+
+    def next_ids(self, count: int) -> List[int]:
+        """count identifiants croissants (pour les créations en masse)."""
+        self._check_owner()
+        ids: List[int] = []
+        while count > 0:
+            size = min(count, MAX_SEQUENCE + 1)
+            with self._lock:
+                ms, first = self._reserve(size)
+            base = (ms << TIMESTAMP_SHIFT) | self._worker_bits
+            ids.extend(range(base | first, (base | first) + size))
+            count -= size
+        return ids
+
+    def parse(self, value: int) -> dict:
+        """Décompose un identifiant : horodatage (ms Unix), worker, séquence."""
+        return parse_id(value, self.epoch_ms)
+
+    def close(self):
+        """Rend le worker id (le générateur ne doit plus servir)."""
+        self._lease.release()
+
+
+def parse_id(value: int, epoch_ms: int = EPOCH_MS) -> dict:
+    return {
+        "timestamp_ms": (value >> TIMESTAMP_SHIFT) + epoch_ms,
+        "worker_id": (value >> SEQUENCE_BITS) & MAX_WORKER_ID,
+        "sequence": value & MAX_SEQUENCE,
+    }
+
+
+# Générateur partagé du processus, créé au premier id
+_generator: Optional[IdGenerator] = None
+_generator_lock = threading.Lock()
+_forked = False
+
+
+def _shared() -> IdGenerator:
+    global _generator
+    generator = _generator
+    if generator is None:
+        with _generator_lock:
+            if _generator is None:
+                # TECHFLOW_WORKER_ID désigne le processus principal ; un
+                # enfant forké hérite de la variable mais pas du bail
+                _generator = IdGenerator(None if _forked else configured_worker_id())
+            generator = _generator
+    return generator
+
+
+def _reset_after_fork():
+    global _generator, _generator_lock, _forked
+    inherited, _generator = _generator, None
+    _generator_lock = threading.Lock()
+    _forked = True
+    if inherited is not None:
+        inherited.close()  # ferme la copie du descripteur, le bail reste au parent
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def next_id() -> int:
+    """Identifiant suivant du générateur partagé du processus."""
+    return _shared().next_id()
+
+
+def next_ids(count: int) -> List[int]:
+    return _shared().next_ids(count)
+
+
+def worker_id() -> int:
+    """Worker id du générateur partagé."""
+    return _shared().worker_id
+
+
+# Test
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    start = time.perf_counter()
+    ids = [next_id() for _ in range(200_000)]
+    print(f"⚡ 200k ids en {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"croissants: {ids == sorted(ids)}, uniques: {len(set(ids)) == len(ids)}")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        batches = list(pool.map(lambda _: [next_id() for _ in range(10_000)], range(8)))
+    merged = [i for batch in batches for i in batch]
+    print(f"🧵 8 threads: {len(set(merged))} ids uniques sur {len(merged)}")
+    print(f"🔎 {ids[-1]} → {parse_id(ids[-1])}")
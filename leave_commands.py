@@ -0,0 +1,331 @@
+"""
+Commandes des actions du workflow de congés, avec journal undo/redo.
+
+Les méthodes de LeaveRequest (submit, manager_approve, hr_reject,
+cancel...) modifient l'état directement, sans retour arrière possible.
+Ici chaque action est une commande (execute / undo), et les commandes
+exécutées sont notées dans un CommandLog compact :
+
+- une entrée = id de demande, action, état précédent, commentaire,
+  horodatage, rangés en colonnes (array / bytearray), les commentaires
+  étant dédupliqués ;
+- undo() / redo() déplacent un curseur dans le journal ;
+- replay() rejoue toutes les commandes d'une journée sur un snapshot
+  des statuts (EventStore.rebuild() par exemple) en une seule passe sur
+  les colonnes et la table de transitions, sans créer d'objet.
+"""
+
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from event_sink import WARNING, emit
+from leave_state_machine import ACTIONS, LEAVE_MACHINE, NO_TRANSITION, STATES
+
+
+class LeaveCommand:
+    """
+    Action sur une demande, annulable.
+
+    Sous-classes : action (nom de la méthode de LeaveRequest) et
+    comment_attr (attribut du commentaire, None si l'action n'en prend pas).
+    """
+
+    action = ""
+    comment_attr: Optional[str] = None
+
+    def __init__(self, request, comment: str = ""):
+        self.request = request
+        self.comment = comment
+        self.previous_state: Optional[int] = None
+        self.previous_comment = ""
+
+    def execute(self) -> bool:
+        request = self.request
+        previous_state = request.state_id
+        previous_comment = getattr(request, self.comment_attr) if self.comment_attr else ""
+        method = getattr(request, self.action)
+        ok = method(self.comment) if self.comment_attr else method()
+        if ok:
+            self.previous_state = previous_state
+            self.previous_comment = previous_comment
+        return ok
+
+    def undo(self):
+        """
+        Raises:
+            ValueError: Si la commande n'a pas été exécutée
+        """
+        if self.previous_state is None:
+            raise ValueError(f"Commande '{self.action}' non exécutée")
+        restore(self.request, self.action, self.previous_state, self.previous_comment)
+        self.previous_state = None
+
+
+class SubmitCommand(LeaveCommand):
+    action = "submit"
+
+
+class StartManagerReviewCommand(LeaveCommand):
+    action = "start_manager_review"
+
+
+class ManagerApproveCommand(LeaveCommand):
+    action = "manager_approve"
+    comment_attr = "manager_comment"
+
+
+class ManagerRejectCommand(LeaveCommand):
+    action = "manager_reject"
+    comment_attr = "manager_comment"
+
+
+class HrApproveCommand(LeaveCommand):
+    action = "hr_approve"
+    comment_attr = "hr_comment"
+
+
+class HrRejectCommand(LeaveCommand):
+    action = "hr_reject"
+    comment_attr = "hr_comment"
+
+
+class CancelCommand(LeaveCommand):
+    action = "cancel"
+
+
+COMMANDS = {command.action: command for command in (
+    SubmitCommand, StartManagerReviewCommand, ManagerApproveCommand, ManagerRejectCommand,
+    HrApproveCommand, HrRejectCommand, CancelCommand,
+)}
+
+
+def make_command(action: str, request, comment: str = "") -> LeaveCommand:
+    """
+    Raises:
+        ValueError: Si l'action est inconnue
+    """
+    try:
+        return COMMANDS[action](request, comment)
+    except KeyError:
+        raise ValueError(f"Action inconnue: {action}") from None
+
+
+def restore(request, action: str, previous_state: int, previous_comment: str = ""):
+    """
+    Remet une demande dans l'état précédant l'action (sans notification).
+
+    Raises:
+        ValueError: Si la demande n'est plus dans l'état produit par l'action
+            (modifiée depuis : l'undo effacerait cette modification)
+    """
+    expected = LEAVE_MACHINE.next_state(previous_state, action)
+    if request.state_id != expected:
+        raise ValueError(f"Undo de '{action}' impossible: demande {request.id} en "
+                         f"{request.status}, attendu {STATES[expected]}")
+    request.state_id = previous_state
+    comment_attr = COMMANDS[action].comment_attr
+    if comment_attr:
+        setattr(request, comment_attr, previous_comment)
+    request._log_change(f"Annulation: {action}", request.status)
+
+
+class CommandLog:
+    """
+    Journal compact des commandes exécutées.
+
+    Args:
+        requests: Objet exposant get(id) pour retrouver les demandes lors
+            d'un undo/redo (LeaveRepository, dict...). Par défaut, le journal
+            garde lui-même les demandes qu'il a vues. Une entrée dont la
+            demande a disparu du dépôt est sautée (événement
+            command_log.skipped) au lieu de bloquer l'undo.
+    """
+
+    def __init__(self, requests=None):
+        self._owned = requests is None
+        self._requests = {} if requests is None else requests
+        self._ids = array("q")
+        self._actions = bytearray()
+        self._previous = bytearray()
+        self._comments = array("I")
+        self._previous_comments = array("I")
+        self._times = array("d")
+        self._texts: List[str] = [""]
+        self._text_codes: Dict[str, int] = {"": 0}
+        self._cursor = 0
+        self._lock = threading.RLock()
+
+    def _code(self, text: str) -> int:
+        code = self._text_codes.get(text)
+        if code is None:
+            code = self._text_codes[text] = len(self._texts)
+            self._texts.append(text)
+        return code
+
+    def _request(self, index: int, operation: str):
+        """Demande de l'entrée index, None (et événement) si elle a disparu."""
+        request = self._requests.get(self._ids[index])
+        if request is None:
+            emit(WARNING, "command_log.skipped", operation=operation,
+                 request_id=self._ids[index], action=ACTIONS[self._actions[index]])
+        return request
+
+    def _truncate(self):
+        """Une nouvelle commande efface les commandes annulées (plus de redo)."""
+        for column in (self._ids, self._actions, self._previous, self._comments,
+                       self._previous_comments, self._times):
+            del column[self._cursor:]
+
+    # ------------------------------------------------------------------
+    # Exécution, undo, redo
+    # ------------------------------------------------------------------
+
+    def execute(self, action: str, request, comment: str = "") -> bool:
+        """Exécute l'action sur la demande et l'inscrit au journal si elle réussit."""
+        command = make_command(action, request, comment)
+        with self._lock:
+            if not command.execute():
+                return False
+            self.record(request.id, action, command.previous_state, comment,
+                        command.previous_comment)
+            if self._owned:
+                self._requests[request.id] = request
+            return True
+
+    def record(self, request_id: int, action: str, previous_state, comment: str = "",
+               previous_comment: str = "", timestamp: Optional[float] = None):
+        """Inscrit une commande déjà exécutée (import d'un autre journal...)."""
+        with self._lock:
+            self._truncate()
+            self._ids.append(request_id)
+            self._actions.append(LEAVE_MACHINE.action_id(action))
+            self._previous.append(LEAVE_MACHINE.state_id(previous_state))
+            self._comments.append(self._code(comment))
+            self._previous_comments.append(self._code(previous_comment))
+            self._times.append(time.time() if timestamp is None else timestamp)
+            self._cursor += 1
+
+    def undo(self):
+        """
+        Annule la dernière commande ; retourne la demande concernée (None si
+        rien à annuler).
+
+        Raises:
+            ValueError: Si la demande a changé d'état depuis la commande
+        """
+        with self._lock:
+            while self._cursor > 0:
+                index = self._cursor - 1
+                request = self._request(index, "undo")
+                if request is None:
+                    self._cursor = index
+                    continue
+                restore(request, ACTIONS[self._actions[index]], self._previous[index],
+                        self._texts[self._previous_comments[index]])
+                self._cursor = index
+                return request
+            return None
+
+    def redo(self):
+        """Réexécute la dernière commande annulée ; retourne la demande (None si rien à refaire)."""
+        with self._lock:
+            while self._cursor < len(self._ids):
+                index = self._cursor
+                request = self._request(index, "redo")
+                if request is None:
+                    self._cursor += 1
+                    continue
+                command = make_command(ACTIONS[self._actions[index]], request,
+                                       self._texts[self._comments[index]])
+                if not command.execute():
+                    return None
+                self._cursor += 1
+                return request
+            return None
+
+    def __len__(self):
+        """Nombre de commandes en vigueur (hors commandes annulées)."""
+        return self._cursor
+
+    def entries(self, start: int = 0, end: Optional[int] = None) -> List[dict]:
+        end = self._cursor if end is None else end
+        return [{
+            "request_id": self._ids[i],
+            "action": ACTIONS[self._actions[i]],
+            "previous_status": STATES[self._previous[i]],
+            "comment": self._texts[self._comments[i]],
+            "timestamp": self._times[i],
+        } for i in range(start, end)]
+
+    def since(self, timestamp: float) -> int:
+        """Index de la première commande exécutée à partir de timestamp."""
+        times = self._times
+        for index in range(self._cursor):
+            if times[index] >= timestamp:
+                return index
+        return self._cursor
+
+    # ------------------------------------------------------------------
+    # Rejeu
+    # ------------------------------------------------------------------
+
+    def replay(self, snapshot: Dict[int, str], start: int = 0,
+               end: Optional[int] = None) -> Tuple[Dict[int, str], List[int]]:
+        """
+        Rejoue les commandes [start, end) sur un snapshot {id: statut}.
+
+        Returns:
+            (statuts après rejeu, index des commandes refusées : demande
+             absente du snapshot ou transition impossible)
+        """
+        states = {key: LEAVE_MACHINE.state_id(value) for key, value in snapshot.items()}
+        targets = [LEAVE_MACHINE.targets(action) for action in range(len(ACTIONS))]
+        refused: List[int] = []
+        with self._lock:
+            end = self._cursor if end is None else end
+            ids, actions = self._ids, self._actions
+            for index in range(start, end):
+                request_id = ids[index]
+                state = states.get(request_id)
+                target = NO_TRANSITION if state is None else targets[actions[index]][state]
+                if target == NO_TRANSITION:
+                    refused.append(index)
+                else:
+                    states[request_id] = target
+        return {key: STATES[state] for key, state in states.items()}, refused
+
+
+# Test
+if __name__ == "__main__":
+    import contextlib
+    import io
+
+    from workflow_legacy import LeaveRequest
+
+    log = CommandLog()
+    request = LeaveRequest("EMP001", "2024-12-20", "2024-12-25", "CP", "Vacances")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for action, comment in (("submit", ""), ("start_manager_review", ""),
+                                ("manager_approve", "OK"), ("hr_reject", "Période chargée")):
+            log.execute(action, request, comment)
+    print(f"📋 {request.status} ({request.hr_comment})")
+    log.undo()
+    print(f"↩️  Undo → {request.status} (commentaire RH: {request.hr_comment!r})")
+    with contextlib.redirect_stdout(io.StringIO()):
+        log.redo()
+    print(f"↪️  Redo → {request.status}")
+
+    # Rejeu d'une journée de 300k commandes sur un snapshot
+    day = CommandLog(requests={})
+    snapshot = {}
+    for request_id in range(100_000):
+        snapshot[request_id] = "draft"
+        for previous, action in (("draft", "submit"), ("submitted", "start_manager_review"),
+                                 ("manager_review", "manager_approve")):
+            day.record(request_id, action, previous)
+    start = time.perf_counter()
+    states, refused = day.replay(snapshot)
+    print(f"⚡ {len(day)} commandes rejouées en {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({sum(s == 'hr_review' for s in states.values())} en hr_review, {len(refused)} refusées)")
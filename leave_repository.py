@@ -0,0 +1,292 @@
+"""
+LeaveRepository - Stockage des demandes de congés avec index secondaires.
+
+Les demandes ne vivaient qu'en mémoire, identifiées par id(self) :
+trouver « toutes les demandes en hr_review » ou « les demandes de EMP001
+qui chevauchent le 20-25 décembre » demandait de parcourir tous les
+objets. Le dépôt range les demandes par identifiant (id_generator.py) et tient
+à jour :
+
+- statut -> ids (mis à jour à chaque transition de la demande) ;
+- employé -> ids ;
+- un index d'intervalles sur (start_date, end_date) : débuts triés par
+  classe de durée, interrogés par bisect.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from leave_state_machine import LEAVE_MACHINE, STATES
+
+
+def _day(value) -> Optional[int]:
+    """Ordinal d'une date (objet date ou chaîne AAAA-MM-JJ), None si absente."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(value).toordinal()
+
+
+def _period(request) -> Tuple[Optional[int], Optional[int]]:
+    """
+    (début, fin) d'une demande ; (None, None) tant qu'elle n'a pas ses deux
+    dates (un brouillon peut être créé sans dates).
+
+    Raises:
+        ValueError: Date mal formée, ou fin avant début
+    """
+    start, end = _day(request.start_date), _day(request.end_date)
+    if start is None or end is None:
+        return None, None
+    if end < start:
+        raise ValueError(f"Demande {request.id}: la date de fin précède la date de début")
+    return start, end
+
+
+class IntervalIndex:
+    """
+    Intervalles [début, fin] (jours inclus) indexés par leur début, rangés
+    par classe de durée : la classe k contient les durées de 2^(k-1) à
+    2^k - 1 jours.
+
+    Un intervalle chevauche [a, b] si début <= b et fin >= a. Dans la classe
+    k, les candidats ont leur début dans [a - (2^k - 1), b] : une recherche
+    par bisect par classe, puis un filtre sur la fin. Une demande très
+    longue (congé sans solde d'un an, date mal saisie) ne rallonge que la
+    recherche de sa propre classe, pas celle des congés courants.
+    """
+
+    def __init__(self):
+        self._classes: Dict[int, List[Tuple[int, int]]] = {}  # classe -> (début, id) triés
+        self._spans: Dict[int, Tuple[int, int]] = {}
+
+    def add(self, key: int, start: int, end: int):
+        if end < start:
+            raise ValueError("La date de fin précède la date de début")
+        insort(self._classes.setdefault((end - start).bit_length(), []), (start, key))
+        self._spans[key] = (start, end)
+
+    def add_many(self, items: Iterable[Tuple[int, int, int]]):
+        """Ajout en lot : un seul tri par classe au lieu d'une insertion triée par élément."""
+        touched = set()
+        for key, start, end in items:
+            if end < start:
+                raise ValueError("La date de fin précède la date de début")
+            span_class = (end - start).bit_length()
+            self._classes.setdefault(span_class, []).append((start, key))
+            self._spans[key] = (start, end)
+            touched.add(span_class)
+        for span_class in touched:
+            self._classes[span_class].sort()
+
+    def remove(self, key: int):
+        start, end = self._spans.pop(key)
+        starts = self._classes[(end - start).bit_length()]
+        del starts[bisect_left(starts, (start, key))]
+
+    def overlapping(self, start: int, end: int) -> List[int]:
+        spans = self._spans
+        result = []
+        for span_class, starts in self._classes.items():
+            longest = (1 << span_class) - 1
+            low = bisect_left(starts, (start - longest, float("-inf")))
+            high = bisect_right(starts, (end, float("inf")))
+            result.extend(key for _, key in starts[low:high] if spans[key][1] >= start)
+        return result
+
+    def __len__(self):
+        return len(self._spans)
+
+
+class LeaveRepository:
+    """
+    Dépôt en mémoire des demandes de congés.
+
+    Les demandes sont rangées par leur id (unique, voir id_generator.py).
+    Une demande ajoutée signale elle-même ses changements d'état ;
+    après modification des dates ou de l'employé, appeler update().
+    Les dates sont validées avant toute écriture : un ajout refusé ne
+    laisse rien dans les index. Une demande sans dates n'est pas dans
+    l'index des périodes.
+    """
+
+    def __init__(self):
+        self._requests: Dict[int, object] = {}
+        self._by_status: List[Set[int]] = [set() for _ in STATES]
+        self._by_employee: Dict[str, Set[int]] = {}
+        self._dates = IntervalIndex()
+        self._indexed: Dict[int, Tuple[str, int, int]] = {}  # id -> (employé, début, fin)
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def _attach(self, request, start: Optional[int], end: Optional[int]):
+        """Indexe une demande déjà validée (appelé sous verrou)."""
+        request._repository = self
+        self._requests[request.id] = request
+        self._by_status[request.state_id].add(request.id)
+        self._by_employee.setdefault(request.employee_id, set()).add(request.id)
+        self._indexed[request.id] = (request.employee_id, start, end)
+
+    def add(self, request) -> int:
+        """
+        Ajoute une demande et retourne son identifiant.
+
+        Raises:
+            ValueError: Demande déjà présente, ou dates invalides
+        """
+        with self._lock:
+            if request.id in self._requests:
+                raise ValueError(f"Demande {request.id} déjà dans le dépôt")
+            start, end = _period(request)
+            self._attach(request, start, end)
+            if start is not None:
+                self._dates.add(request.id, start, end)
+            return request.id
+
+    def add_many(self, requests: Iterable) -> List[int]:
+        """
+        Ajoute un lot de demandes (index de dates trié une seule fois).
+        Le lot est validé en entier avant d'être indexé : tout ou rien.
+        """
+        requests = list(requests)
+        with self._lock:
+            periods = []
+            seen = set()
+            for request in requests:
+                if request.id in self._requests or request.id in seen:
+                    raise ValueError(f"Demande {request.id} déjà dans le dépôt")
+                seen.add(request.id)
+                periods.append(_period(request))
+            for request, (start, end) in zip(requests, periods):
+                self._attach(request, start, end)
+            self._dates.add_many((request.id, start, end)
+                                 for request, (start, end) in zip(requests, periods)
+                                 if start is not None)
+            return [request.id for request in requests]
+
+    def remove(self, request_id: int):
+        with self._lock:
+            request = self._requests.pop(request_id)
+            employee_id, start, _ = self._indexed.pop(request_id)
+            self._by_status[request.state_id].discard(request_id)
+            self._by_employee[employee_id].discard(request_id)
+            if start is not None:
+                self._dates.remove(request_id)
+            request._repository = None
+
+    def update(self, request):
+        """
+        Réindexe employé et dates d'une demande modifiée.
+
+        Raises:
+            ValueError: Dates invalides (les index restent inchangés)
+        """
+        with self._lock:
+            start, end = _period(request)
+            employee_id, old_start, _ = self._indexed[request.id]
+            self._by_employee[employee_id].discard(request.id)
+            self._by_employee.setdefault(request.employee_id, set()).add(request.id)
+            if old_start is not None:
+                self._dates.remove(request.id)
+            if start is not None:
+                self._dates.add(request.id, start, end)
+            self._indexed[request.id] = (request.employee_id, start, end)
+
+    def _state_changed(self, request, old_state: int, new_state: int):
+        """Appelé par LeaveRequest à chaque changement d'état."""
+        with self._lock:
+            self._by_status[old_state].discard(request.id)
+            self._by_status[new_state].add(request.id)
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def get(self, request_id: int):
+        return self._requests.get(request_id)
+
+    def __len__(self):
+        return len(self._requests)
+
+    def __contains__(self, request_id) -> bool:
+        return request_id in self._requests
+
+    def _load(self, ids: Iterable[int]) -> list:
+        requests = self._requests
+        return [requests[key] for key in sorted(ids)]
+
+    def ids_by_status(self, status) -> Set[int]:
+        return set(self._by_status[LEAVE_MACHINE.state_id(status)])
+
+    def by_status(self, status) -> list:
+        """Demandes dans un état, par id croissant."""
+        with self._lock:
+            return self._load(self._by_status[LEAVE_MACHINE.state_id(status)])
+
+    def by_employee(self, employee_id: str) -> list:
+        with self._lock:
+            return self._load(self._by_employee.get(employee_id, ()))
+
+    def overlapping(self, start, end, employee_id: Optional[str] = None,
+                    status=None) -> list:
+        """
+        Demandes dont la période chevauche [start, end] (dates incluses),
+        éventuellement filtrées par employé et par statut.
+        """
+        first, last = _day(start), _day(end)
+        with self._lock:
+            if employee_id is not None:
+                # Peu de demandes par employé : filtre direct sur ses dates
+                ids = set()
+                for key in self._by_employee.get(employee_id, ()):
+                    _, request_start, request_end = self._indexed[key]
+                    if request_start is not None and request_start <= last and request_end >= first:
+                        ids.add(key)
+            else:
+                ids = set(self._dates.overlapping(first, last))
+            if status is not None:
+                ids &= self._by_status[LEAVE_MACHINE.state_id(status)]
+            return self._load(ids)
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Volumes par statut (tableau de bord RH)."""
+        with self._lock:
+            return {STATES[state]: len(ids) for state, ids in enumerate(self._by_status)}
+
+
+# Test
+if __name__ == "__main__":
+    import random
+    import time
+
+    from workflow_legacy import LeaveRequest
+
+    random.seed(42)
+    repository = LeaveRepository()
+    requests = []
+    for i in range(200_000):
+        start = date(2024, 1, 1).toordinal() + random.randrange(365)
+        requests.append(LeaveRequest(
+            f"EMP{i % 20_000:05}", date.fromordinal(start).isoformat(),
+            date.fromordinal(start + random.randrange(15)).isoformat(), "CP"
+        ))
+    start_time = time.perf_counter()
+    repository.add_many(requests)
+    print(f"📥 200k demandes indexées en {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    LeaveRequest.apply_bulk("submit", requests[:50_000])
+    LeaveRequest.apply_bulk("start_manager_review", requests[:20_000])
+    print(f"📊 {repository.count_by_status()}")
+
+    start_time = time.perf_counter()
+    noel = repository.overlapping("2024-12-20", "2024-12-25")
+    emp = repository.overlapping("2024-12-20", "2024-12-25", employee_id="EMP00001")
+    review = repository.by_status("manager_review")
+    print(f"🔎 {len(noel)} demandes sur Noël, {len(emp)} pour EMP00001, "
+          f"{len(review)} en manager_review, en {(time.perf_counter() - start_time) * 1000:.1f} ms")
@@ -0,0 +1,289 @@
+"""
+DeliveryMetrics - Compteurs d'envoi et histogrammes de latence par canal.
+
+Chaque thread écrit dans son propre fragment (shard) : un incrément est
+une simple écriture locale, sans verrou partagé entre threads. Les
+fragments sont additionnés à la lecture (snapshot, percentile). Le
+fragment d'un thread terminé est replié dans un total de base : le nombre
+de fragments suit les threads vivants, pas tous ceux qui ont existé.
+
+Les latences sont rangées dans un histogramme log-linéaire façon HDR :
+16 sous-intervalles par puissance de 2, soit une erreur relative
+inférieure à 6,25 % sur toute la plage (de la microseconde à l'heure).
+"""
+
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from async_notifier import AsyncNotifier
+from notifier_interface import INotifier, channel_key
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS  # 16
+BUCKET_COUNT = SUB_BUCKETS + 40 * SUB_BUCKETS  # jusqu'à 2**44 µs
+
+
+def bucket_index(micros: int) -> int:
+    """Index de l'intervalle contenant une latence en microsecondes."""
+    if micros < SUB_BUCKETS:
+        return max(micros, 0)
+    shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+    return min(SUB_BUCKETS + shift * SUB_BUCKETS + (micros >> shift) - SUB_BUCKETS,
+               BUCKET_COUNT - 1)
+
+
+def bucket_value(index: int) -> int:
+    """Borne basse (µs) de l'intervalle index."""
+    if index < SUB_BUCKETS:
+        return index
+    shift, offset = divmod(index - SUB_BUCKETS, SUB_BUCKETS)
+    return (SUB_BUCKETS + offset) << shift
+
+
+class _Shard:
+    """Compteurs d'un thread : {canal: [envoyés, échecs]} et histogrammes."""
+
+    __slots__ = ("counts", "histograms")
+
+    def __init__(self):
+        self.counts: Dict[str, List[int]] = {}
+        self.histograms: Dict[str, List[int]] = {}
+
+    def merge(self, other: "_Shard"):
+        for channel, (sent, failed) in other.counts.items():
+            total = self.counts.setdefault(channel, [0, 0])
+            total[0] += sent
+            total[1] += failed
+        for channel, histogram in other.histograms.items():
+            merged = self.histograms.setdefault(channel, [0] * BUCKET_COUNT)
+            for i, count in enumerate(histogram):
+                if count:
+                    merged[i] += count
+
+
+class _ThreadToken:
+    """Objet rangé dans les données locales d'un thread, libéré à sa fin."""
+
+    __slots__ = ("__weakref__",)
+
+
+class DeliveryMetrics:
+    """
+    Statistiques d'envoi sans sérialisation des écritures.
+
+    record() est appelé depuis n'importe quel thread ; seules la création
+    du fragment d'un nouveau thread et son repli à la fin du thread
+    prennent le verrou.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._base = _Shard()  # fragments des threads terminés
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            self._local.shard = shard
+            # Les données locales du thread sont libérées à sa fin : le
+            # finaliseur du jeton replie alors le fragment dans la base
+            self._local.token = token = _ThreadToken()
+            weakref.finalize(token, DeliveryMetrics._retire, weakref.ref(self), shard)
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    @staticmethod
+    def _retire(metrics_ref, shard: _Shard):
+        metrics = metrics_ref()
+        if metrics is None:
+            return
+        with metrics._lock:
+            # Nouvelle base plutôt que modification en place : une lecture
+            # en cours (base + fragments) ne compte pas deux fois le fragment
+            base = _Shard()
+            base.merge(metrics._base)
+            base.merge(shard)
+            metrics._base = base
+            metrics._shards.remove(shard)
+
+    def record(self, channel, success: bool, latency: Optional[float] = None):
+        """
+        Enregistre un envoi.
+
+        Args:
+            channel: ChannelType ou nom du canal
+            success: Résultat de l'envoi
+            latency: Durée en secondes (optionnelle)
+        """
+        channel = channel_key(channel)
+        shard = self._shard()
+        counts = shard.counts.get(channel)
+        if counts is None:
+            counts = shard.counts[channel] = [0, 0]
+        counts[0 if success else 1] += 1
+        if latency is not None:
+            histogram = shard.histograms.get(channel)
+            if histogram is None:
+                histogram = shard.histograms[channel] = [0] * BUCKET_COUNT
+            histogram[bucket_index(int(latency * 1_000_000))] += 1
+
+    @contextmanager
+    def measure(self, channel):
+        """
+        Mesure un bloc d'envoi : with metrics.measure("sms") as outcome: ...
+        outcome["success"] vaut True par défaut, False si une exception sort.
+        """
+        outcome = {"success": True}
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except Exception:
+            outcome["success"] = False
+            raise
+        finally:
+            self.record(channel, outcome["success"], time.perf_counter() - start)
+
+    # ------------------------------------------------------------------
+    # Lecture (agrégation des fragments)
+    # ------------------------------------------------------------------
+
+    def _shards_snapshot(self) -> List[_Shard]:
+        with self._lock:
+            return [self._base] + self._shards
+
+    def counts(self) -> Dict[str, List[int]]:
+        """{canal: [envoyés, échecs]} tous threads confondus."""
+        totals: Dict[str, List[int]] = {}
+        for shard in self._shards_snapshot():
+            for channel, (sent, failed) in list(shard.counts.items()):
+                total = totals.setdefault(channel, [0, 0])
+                total[0] += sent
+                total[1] += failed
+        return totals
+
+    def histogram(self, channel) -> List[int]:
+        channel = channel_key(channel)
+        merged = [0] * BUCKET_COUNT
+        for shard in self._shards_snapshot():
+            histogram = shard.histograms.get(channel)
+            if histogram is not None:
+                for i, count in enumerate(histogram):
+                    if count:
+                        merged[i] += count
+        return merged
+
+    def percentile(self, channel, q: float) -> Optional[float]:
+        """Latence (secondes) au quantile q (0-100), None sans mesure."""
+        histogram = self.histogram(channel)
+        total = sum(histogram)
+        if not total:
+            return None
+        rank = max(1, round(total * q / 100))
+        seen = 0
+        for index, count in enumerate(histogram):
+            seen += count
+            if seen >= rank:
+                return bucket_value(index) / 1_000_000
+        return bucket_value(BUCKET_COUNT - 1) / 1_000_000
+
+    def snapshot(self) -> dict:
+        """Totaux et, par canal, compteurs et latences p50/p99 (ms)."""
+        counts = self.counts()
+        by_channel = {}
+        for channel, (sent, failed) in counts.items():
+            p50 = self.percentile(channel, 50)
+            p99 = self.percentile(channel, 99)
+            by_channel[channel] = {
+                "sent": sent,
+                "failed": failed,
+                "p50_ms": None if p50 is None else p50 * 1000,
+                "p99_ms": None if p99 is None else p99 * 1000,
+            }
+        return {
+            "total_sent": sum(sent for sent, _ in counts.values()),
+            "total_failed": sum(failed for _, failed in counts.values()),
+            "by_channel": by_channel,
+        }
+
+    def reset(self):
+        """
+        Remet les compteurs à zéro. Un incrément concurrent peut être
+        perdu : à utiliser entre deux campagnes, pas pendant.
+        """
+        with self._lock:
+            self._base = _Shard()
+        for shard in self._shards_snapshot():
+            shard.counts.clear()
+            shard.histograms.clear()
+
+    def wrap(self, notifier: INotifier, channel) -> INotifier:
+        return MeteredNotifier(notifier, self, channel)
+
+    def wrap_async(self, notifier: AsyncNotifier, channel) -> AsyncNotifier:
+        return AsyncMeteredNotifier(notifier, self, channel)
+
+
+class MeteredNotifier(INotifier):
+    """Décorateur : mesure résultat et latence de chaque envoi."""
+
+    def __init__(self, notifier: INotifier, metrics: DeliveryMetrics, channel):
+        self.notifier = notifier
+        self.metrics = metrics
+        self.channel = channel_key(channel)
+
+    def get_channel_name(self) -> str:
+        return self.notifier.get_channel_name()
+
+    def send(self, recipient, message, **kwargs) -> bool:
+        start = time.perf_counter()
+        ok = False
+        try:
+            ok = self.notifier.send(recipient, message, **kwargs)
+            return ok
+        finally:
+            self.metrics.record(self.channel, bool(ok), time.perf_counter() - start)
+
+    def send_batch(self, items, **kwargs):
+        start = time.perf_counter()
+        results = self.notifier.send_batch(items, **kwargs)
+        # Latence du lot répartie sur ses messages
+        latency = (time.perf_counter() - start) / max(len(results), 1)
+        for ok in results:
+            self.metrics.record(self.channel, ok, latency)
+        return results
+
+    def close(self) -> None:
+        self.notifier.close()
+
+    def __getattr__(self, name):
+        return getattr(self.notifier, name)
+
+
+class AsyncMeteredNotifier(AsyncNotifier):
+    """Équivalent asyncio de MeteredNotifier."""
+
+    def __init__(self, notifier: AsyncNotifier, metrics: DeliveryMetrics, channel):
+        self.notifier = notifier
+        self.metrics = metrics
+        self.channel = channel_key(channel)
+
+    def get_channel_name(self) -> str:
+        return self.notifier.get_channel_name()
+
+    async def send(self, recipient: str, message: str) -> bool:
+        start = time.perf_counter()
+        ok = False
+        try:
+            ok = await self.notifier.send(recipient, message)
+            return ok
+        finally:
+            self.metrics.record(self.channel, bool(ok), time.perf_counter() - start)
+
+    async def close(self) -> None:
+        await self.notifier.close()
@@ -4,10 +4,13 @@ Remplace le if/elif géant du code legacy.
 """
 
 from enum import Enum
-from typing import Dict, Type
 import sys
 import os
 
+from event_sink import DEBUG
+from async_notifier import AsyncConsoleNotifier
+from notification_factory_base import NotificationFactoryBase
+
 # CORRECTION : Deux points, pas trois
 sys.path.append('..')  # Remonter d'un dossier
 sys.path.append('../02-singleton')  # Aller dans singleton
@@ -26,6 +29,8 @@ except ImportError as e:
             pass
         def get_channel_name(self):
             pass
+        def send_batch(self, items):
+            return [self.send(recipient, message) for recipient, message in items]
     
     class ConsoleNotifier(INotifier):
         def get_channel_name(self):
@@ -41,34 +46,17 @@ class ChannelType(Enum):
     SMS = "sms"
     PUSH = "push"
     SLACK = "slack"
+    TEAMS = "teams"
+    WHATSAPP = "whatsapp"
     CONSOLE = "console"
 
 
-class NotificationFactory:
+class NotificationFactory(NotificationFactoryBase):
     """
     Factory pour créer des instances de notifiers.
+    (cache, couches et création asynchrone : NotificationFactoryBase)
     """
     
-    _registry: Dict[ChannelType, Type[INotifier]] = {}
-    
-    @classmethod
-    def register(cls, channel_type: ChannelType, notifier_class: Type[INotifier]):
-        """Enregistre un nouveau type de notifier."""
-        cls._registry[channel_type] = notifier_class
-        print(f"✅ Enregistré: {channel_type.value} -> {notifier_class.__name__}")
-    
-    @classmethod
-    def create(cls, channel_type: ChannelType) -> INotifier:
-        """Crée une instance de notifier."""
-        if channel_type not in cls._registry:
-            available = [c.value for c in cls._registry.keys()]
-            raise ValueError(
-                f"Canal '{channel_type.value}' non supporté. "
-                f"Canaux disponibles: {available}"
-            )
-        
-        return cls._registry[channel_type]()
-    
     @classmethod
     def get_available_channels(cls):
         """Retourne les canaux disponibles."""
@@ -89,11 +77,15 @@ class SimpleNotificationFactory:
 def setup_factory():
     """Configure la factory."""
     NotificationFactory.register(ChannelType.CONSOLE, ConsoleNotifier)
+    NotificationFactory.register_async(ChannelType.CONSOLE, AsyncConsoleNotifier)
     print("✅ Factory configurée avec ConsoleNotifier")
 
 
 # Test
 if __name__ == "__main__":
+    from event_sink import ConsoleSink, set_sink
+    set_sink(ConsoleSink(DEBUG))
+    
     print("🧪 TEST FACTORY")
     print("=" * 50)
     
@@ -0,0 +1,237 @@
+"""
+NotificationFactoryBase - Mécanique commune aux factories de notifiers.
+
+notification_factory.py et notification_factory_complete.py ont chacune
+leur ChannelType et leur registre, mais partagent le cache d'instances,
+les couches ajoutées autour des notifiers créés (mesure, quotas,
+coupe-circuit) et la création asynchrone. Elles héritent toutes deux de
+cette classe : une correction ici vaut pour les deux.
+"""
+
+import atexit
+from typing import Dict, Optional, Type
+
+from async_notifier import AsyncNotifier, AsyncNotifierAdapter
+from event_sink import DEBUG, emit
+from notifier_cache import NotifierCache, options_key
+from notifier_interface import INotifier
+
+
+class NotificationFactoryBase:
+    """
+    Factory avec registre, à sous-classer.
+
+    Chaque sous-classe reçoit son propre état (registres, cache, couches) :
+    deux factories ne partagent jamais leurs notifiers.
+    """
+
+    _registry: Dict[object, Type[INotifier]]
+    _async_registry: Dict[object, Type[AsyncNotifier]]
+    _cache: Optional[NotifierCache]
+    _fallbacks: Dict[object, object]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._registry = {}
+        cls._async_registry = {}
+        cls._cache = None
+        cls._rate_limiter = None
+        cls._metrics = None
+        cls._circuit_breakers = None
+        cls._fallbacks = {}
+
+    @classmethod
+    def register(cls, channel_type, notifier_class: Type[INotifier]):
+        """Enregistre un nouveau type de notifier."""
+        cls._registry[channel_type] = notifier_class
+        if cls._cache is not None:
+            cls._cache.invalidate(channel_type)
+        emit(DEBUG, "factory.registered", channel=channel_type.value,
+             notifier=notifier_class.__name__)
+
+    @classmethod
+    def register_async(cls, channel_type, notifier_class: Type[AsyncNotifier]):
+        """Enregistre une implémentation asyncio native pour un canal."""
+        cls._async_registry[channel_type] = notifier_class
+        emit(DEBUG, "factory.registered", channel=channel_type.value,
+             notifier=notifier_class.__name__, mode="async")
+
+    # ------------------------------------------------------------------
+    # Cache et couches
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def enable_cache(cls, max_size: Optional[int] = None):
+        """
+        Active le mode cache : create() réutilise une instance par
+        (canal, config_key, options) au lieu d'en construire une à chaque appel.
+
+        Args:
+            max_size: Nombre maximum d'instances (éviction LRU), illimité par défaut
+        """
+        if cls._cache is None:
+            atexit.register(cls.shutdown)
+        else:
+            cls._cache.close()
+        cls._cache = NotifierCache(max_size)
+
+    @classmethod
+    def _renew_cache(cls):
+        """
+        Cache vide après un changement de couches (quotas, mesure,
+        coupe-circuit). Les notifiers déjà distribués ne sont pas fermés :
+        leurs détenteurs s'en servent peut-être encore.
+        """
+        if cls._cache is not None:
+            cls._cache = NotifierCache(cls._cache.max_size)
+
+    @classmethod
+    def shutdown(cls):
+        """Ferme les notifiers en cache et désactive le mode cache."""
+        cache, cls._cache = cls._cache, None
+        if cache is not None:
+            cache.close()
+            atexit.unregister(cls.shutdown)
+
+    @classmethod
+    def set_rate_limiter(cls, rate_limiter):
+        """
+        Fait respecter les quotas par canal à tous les notifiers créés
+        (RateLimiter, par ex. RateLimiter.from_config(NotificationConfig())).
+        None désactive la limitation.
+        """
+        cls._rate_limiter = rate_limiter
+        cls._renew_cache()
+
+    @classmethod
+    def set_metrics(cls, metrics):
+        """
+        Mesure résultat et latence des notifiers créés (DeliveryMetrics).
+        None désactive la mesure.
+        """
+        cls._metrics = metrics
+        cls._renew_cache()
+
+    @classmethod
+    def set_circuit_breakers(cls, registry, fallbacks: Optional[Dict] = None):
+        """
+        Protège les notifiers créés par un coupe-circuit par canal
+        (CircuitBreakerRegistry). Circuit ouvert : échec immédiat, ou envoi
+        sur le canal de repli s'il est donné dans fallbacks
+        (ex. {ChannelType.SMS: ChannelType.EMAIL}). None désactive.
+        """
+        cls._circuit_breakers = registry
+        cls._fallbacks = dict(fallbacks or {})
+        cls._renew_cache()
+
+    @classmethod
+    def health(cls) -> Dict[str, dict]:
+        """État des coupe-circuits par canal ({} s'ils ne sont pas activés)."""
+        if cls._circuit_breakers is None:
+            return {}
+        return cls._circuit_breakers.health()
+
+    @classmethod
+    def _fallback_provider(cls, channel_type):
+        fallback = cls._fallbacks.get(channel_type)
+        if fallback is None or fallback not in cls._registry:
+            return None
+        # Le notifier de repli n'a pas lui-même de repli (pas de cycle)
+        return lambda: cls._build(fallback, {}, with_fallback=False)
+
+    @classmethod
+    def _async_fallback_provider(cls, channel_type):
+        fallback = cls._fallbacks.get(channel_type)
+        if fallback is None:
+            return None
+        if fallback in cls._async_registry:
+            return lambda: cls._build_async(fallback, {}, with_fallback=False)
+        if fallback in cls._registry:
+            return lambda: AsyncNotifierAdapter(cls._build(fallback, {}, with_fallback=False))
+        return None
+
+    @classmethod
+    def _build(cls, channel_type, options: dict, with_fallback: bool = True) -> INotifier:
+        notifier = cls._registry[channel_type](**options)
+        # La mesure est au plus près du notifier : l'attente du rate limiter n'est pas comptée
+        if cls._metrics is not None:
+            notifier = cls._metrics.wrap(notifier, channel_type)
+        if cls._rate_limiter is not None:
+            notifier = cls._rate_limiter.wrap(notifier, channel_type)
+        # Le coupe-circuit est à l'extérieur : un circuit ouvert n'attend pas de jeton
+        if cls._circuit_breakers is not None:
+            notifier = cls._circuit_breakers.wrap(
+                notifier, channel_type,
+                cls._fallback_provider(channel_type) if with_fallback else None
+            )
+        return notifier
+
+    @classmethod
+    def _build_async(cls, channel_type, options: dict,
+                     with_fallback: bool = True) -> AsyncNotifier:
+        # Mêmes couches, dans le même ordre, que _build
+        notifier = cls._async_registry[channel_type](**options)
+        if cls._metrics is not None:
+            notifier = cls._metrics.wrap_async(notifier, channel_type)
+        if cls._rate_limiter is not None:
+            notifier = cls._rate_limiter.wrap_async(notifier, channel_type)
+        if cls._circuit_breakers is not None:
+            notifier = cls._circuit_breakers.wrap_async(
+                notifier, channel_type,
+                cls._async_fallback_provider(channel_type) if with_fallback else None
+            )
+        return notifier
+
+    # ------------------------------------------------------------------
+    # Création
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _unknown_channel(cls, channel_type) -> ValueError:
+        available = [c.value for c in cls._registry.keys()]
+        return ValueError(f"Canal '{channel_type.value}' non supporté. "
+                          f"Canaux disponibles: {available}")
+
+    @classmethod
+    def create(cls, channel_type, config_key=None, **options) -> INotifier:
+        """
+        Crée une instance de notifier.
+
+        Args:
+            channel_type: Type de canal (EMAIL, SMS, etc.)
+            config_key: En mode cache, distingue plusieurs instances d'un
+                même canal configurées différemment
+            **options: Arguments passés au constructeur du notifier ; ils
+                font partie de la clé de cache (options non hachables :
+                instance non partagée)
+
+        Returns:
+            Instance du notifier correspondant (partagée en mode cache)
+
+        Raises:
+            ValueError: Si le canal n'est pas enregistré
+        """
+        if channel_type not in cls._registry:
+            raise cls._unknown_channel(channel_type)
+
+        key = options_key(options)
+        if cls._cache is None or key is None:
+            return cls._build(channel_type, options)
+        return cls._cache.get_or_create(
+            (channel_type, config_key, key), lambda: cls._build(channel_type, options)
+        )
+
+    @classmethod
+    def create_async(cls, channel_type, **options) -> AsyncNotifier:
+        """
+        Crée un notifier asynchrone.
+
+        Utilise l'implémentation native si elle est enregistrée, sinon
+        adapte le notifier synchrone du registre (envoi dans un thread).
+
+        Raises:
+            ValueError: Si le canal n'est enregistré dans aucun registre
+        """
+        if channel_type in cls._async_registry:
+            return cls._build_async(channel_type, options)
+        return AsyncNotifierAdapter(cls.create(channel_type, **options))
@@ -4,7 +4,6 @@ Version finale pour le TP.
 """
 
 from enum import Enum
-from typing import Dict, Type
 import sys
 
 # Chemins d'import
@@ -14,6 +13,9 @@ sys.path.append('../02-singleton')
 # Imports de base
 from notifier_interface import INotifier
 from console_notifier import ConsoleNotifier
+from event_sink import DEBUG
+from async_notifier import AsyncConsoleNotifier
+from notification_factory_base import NotificationFactoryBase
 
 # Import conditionnel d'EmailNotifier
 try:
@@ -41,48 +43,26 @@ class ChannelType(Enum):
     SMS = "sms"
     PUSH = "push"
     SLACK = "slack"
+    TEAMS = "teams"
+    WHATSAPP = "whatsapp"
     CONSOLE = "console"
 
 
-class NotificationFactory:
+class NotificationFactory(NotificationFactoryBase):
     """
     Factory avec registre - Pattern Factory Method.
     Permet d'ajouter de nouveaux canaux sans modifier le code existant.
+    (cache, couches et création asynchrone : NotificationFactoryBase)
     """
     
-    _registry: Dict[ChannelType, Type[INotifier]] = {}
-    
-    @classmethod
-    def register(cls, channel_type: ChannelType, notifier_class: Type[INotifier]):
-        """Enregistre un nouveau type de notifier."""
-        cls._registry[channel_type] = notifier_class
-        print(f"📝 {channel_type.value} -> {notifier_class.__name__}")
-    
     @classmethod
-    def create(cls, channel_type: ChannelType) -> INotifier:
-        """
-        Crée une instance de notifier.
-        
-        Args:
-            channel_type: Type de canal (EMAIL, SMS, etc.)
-            
-        Returns:
-            Instance du notifier correspondant
-            
-        Raises:
-            ValueError: Si le canal n'est pas enregistré
-        """
-        if channel_type not in cls._registry:
-            available = [c.value for c in cls._registry.keys()]
-            error_msg = (
-                f"🚫 Erreur: Canal '{channel_type.value}' non disponible.\n"
-                f"   Canaux disponibles: {available}\n"
-                f"   Pour ajouter un canal: NotificationFactory.register(ChannelType.NOUVEAU, NouveauNotifier)"
-            )
-            raise ValueError(error_msg)
-        
-        notifier_class = cls._registry[channel_type]
-        return notifier_class()
+    def _unknown_channel(cls, channel_type) -> ValueError:
+        available = [c.value for c in cls._registry.keys()]
+        return ValueError(
+            f"🚫 Erreur: Canal '{channel_type.value}' non disponible.\n"
+            f"   Canaux disponibles: {available}\n"
+            f"   Pour ajouter un canal: NotificationFactory.register(ChannelType.NOUVEAU, NouveauNotifier)"
+        )
     
     @classmethod
     def available_channels(cls):
@@ -136,6 +116,7 @@ def setup_factory():
     
     # Enregistrement des notifiers
     NotificationFactory.register(ChannelType.CONSOLE, ConsoleNotifier)
+    NotificationFactory.register_async(ChannelType.CONSOLE, AsyncConsoleNotifier)
     
     if EMAIL_NOTIFIER_AVAILABLE:
         NotificationFactory.register(ChannelType.EMAIL, EmailNotifier)
@@ -342,6 +323,9 @@ def run_tests():
 
 
 if __name__ == "__main__":
+    from event_sink import ConsoleSink, set_sink
+    set_sink(ConsoleSink(DEBUG))
+    
     print("🔧 INITIALISATION DU SYSTÈME DE NOTIFICATION")
     print("=" * 70)
     
@@ -19,6 +19,19 @@ Code Smells présents :
 - Magic Strings ("email", "sms", "push")
 """
 
+import time
+from concurrent.futures import Future
+
+from bulk_job import BulkJob
+from bulk_sender import BulkSender
+from dedup import Deduplicator
+from fan_out import FanOut
+from metrics import DeliveryMetrics
+from priority_scheduler import PriorityScheduler
+from recipient_validator import VALIDATOR
+from template_engine import TEMPLATES
+from event_sink import DEBUG, ERROR, INFO, WARNING, emit
+
 # ❌ Configuration dupliquée partout (pas de Singleton)
 EMAIL_HOST = "smtp.techflow.com"
 EMAIL_PORT = 587
@@ -46,7 +59,10 @@ class NotificationService:
     - Ajouter un canal = modifier cette classe
     """
 
-    def __init__(self):
+    CHANNELS = ("email", "sms", "push", "slack", "teams", "whatsapp")
+
+    def __init__(self, retry_scheduler=None, rate_limiter=None, scheduler_workers=None,
+                 dedup_window=None, circuit_breakers=None):
         # ❌ Configuration dupliquée depuis les variables globales
         self.email_host = EMAIL_HOST
         self.email_port = EMAIL_PORT
@@ -58,13 +74,24 @@ class NotificationService:
         self.push_url = PUSH_API_URL
         self.slack_url = SLACK_WEBHOOK_URL
 
-        # Compteurs (mélangés avec la logique métier)
-        self.sent_count = 0
-        self.failed_count = 0
-        self.email_count = 0
-        self.sms_count = 0
-        self.push_count = 0
-        self.slack_count = 0
+        # Compteurs par thread, agrégés à la lecture (DeliveryMetrics)
+        self.metrics = DeliveryMetrics()
+
+        # Relances avec backoff (RetryScheduler), désactivées si None
+        self.retry_scheduler = retry_scheduler
+        # Quotas par canal (RateLimiter), pas de limite si None
+        self.rate_limiter = rate_limiter
+        # Envoi multi-canal en parallèle (pool créé au premier usage)
+        self.fan_out = FanOut()
+        # Files par priorité devant les canaux (PriorityScheduler), si activé
+        self.scheduler = None
+        if scheduler_workers:
+            self.scheduler = PriorityScheduler(self.send_notification, workers=scheduler_workers)
+            self.scheduler.start()
+        # Envois identiques ignorés pendant dedup_window secondes, si activé
+        self.dedup = Deduplicator(dedup_window) if dedup_window else None
+        # Coupe-circuits par canal (CircuitBreakerRegistry), désactivés si None
+        self.circuit_breakers = circuit_breakers
 
     def send_notification(self, recipient, message, channel, priority="normal",
                           attachments=None, retry_count=3):
@@ -74,112 +101,140 @@ class NotificationService:
         ❌ ÉNORME if/elif - viole Open/Closed Principle
         ❌ Chaque nouveau canal = modifier cette méthode
         ❌ Logique de chaque canal mélangée ici
+
+        Si un retry_scheduler est configuré, un échec d'envoi est relancé
+        en arrière-plan jusqu'à retry_count fois (backoff exponentiel).
+
+        Avec circuit_breakers, un canal dont le circuit est ouvert échoue
+        immédiatement, sans appel au fournisseur ni relance.
+
+        Avec dedup_window, un envoi identique (canal, destinataire, message)
+        déjà réussi dans la fenêtre n'est pas refait et retourne True.
         """
         # ❌ Validation dupliquée pour chaque appel
         if not recipient:
-            print("ERREUR: Destinataire manquant")
-            self.failed_count += 1
+            emit(WARNING, "notification.invalid", channel=channel, reason="Destinataire manquant")
+            self.metrics.record(channel, False)
             return False
 
-        if not message:
-            print("ERREUR: Message manquant")
-            self.failed_count += 1
+        reason = VALIDATOR.check_message(message)
+        if reason:
+            emit(WARNING, "notification.invalid", channel=channel, reason=reason)
+            self.metrics.record(channel, False)
             return False
 
-        if len(message) > 5000:
-            print("ERREUR: Message trop long (max 5000 caractères)")
-            self.failed_count += 1
+        # Rejet de format (tout canal ayant une règle dans VALIDATOR) avant
+        # le coupe-circuit et les relances : un destinataire invalide n'est
+        # pas une panne du fournisseur
+        if channel in VALIDATOR.rules and VALIDATOR.normalize(channel, recipient) is None:
+            emit(WARNING, "notification.invalid", channel=channel,
+                 reason="Format de destinataire invalide", recipient=recipient)
+            self.metrics.record(channel, False)
             return False
 
+        if self.dedup is not None and not self.dedup.claim(channel, recipient, message):
+            emit(DEBUG, "notification.duplicate", channel=channel, recipient=recipient)
+            return True
+
+        breaker = None
+        if self.circuit_breakers is not None and channel in self.CHANNELS:
+            breaker = self.circuit_breakers.get(channel)
+            if not breaker.allow():
+                # Fournisseur en panne : échec immédiat, sans relance
+                emit(WARNING, "notification.circuit_open", channel=channel)
+                self.metrics.record(channel, False)
+                if self.dedup is not None:
+                    self.dedup.release(channel, recipient, message)
+                return False
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(channel)
+        start = time.perf_counter()
+
         # ❌ PROBLÈME MAJEUR : if/elif géant
         if channel == "email":
-            return self._send_email(recipient, message, priority, attachments)
+            sent = self._send_email(recipient, message, priority, attachments)
 
         elif channel == "sms":
-            return self._send_sms(recipient, message, priority)
+            sent = self._send_sms(recipient, message, priority)
 
         elif channel == "push":
-            return self._send_push(recipient, message, priority)
+            sent = self._send_push(recipient, message, priority)
 
         elif channel == "slack":
-            return self._send_slack(recipient, message, priority)
+            sent = self._send_slack(recipient, message, priority)
 
         elif channel == "teams":
             # ❌ Ajouté plus tard - le if/elif grandit...
-            return self._send_teams(recipient, message, priority)
+            sent = self._send_teams(recipient, message, priority)
 
         elif channel == "whatsapp":
             # ❌ Encore un canal ajouté...
-            return self._send_whatsapp(recipient, message, priority)
+            sent = self._send_whatsapp(recipient, message, priority)
 
         else:
             # ❌ Si on se trompe de canal, erreur silencieuse
-            print(f"ERREUR: Canal inconnu '{channel}'")
-            self.failed_count += 1
+            emit(WARNING, "notification.invalid", channel=channel, reason="Canal inconnu")
+            self.metrics.record(channel, False)
+            if self.dedup is not None:
+                self.dedup.release(channel, recipient, message)
             return False
 
+        latency = time.perf_counter() - start
+        self.metrics.record(channel, sent, latency)
+        if breaker is not None:
+            breaker.record(sent, latency)
+        if not sent and self.dedup is not None:
+            # Échec : une relance ne doit pas être prise pour un doublon
+            self.dedup.release(channel, recipient, message)
+
+        if not sent and retry_count and self.retry_scheduler is not None:
+            self.retry_scheduler.schedule(
+                lambda: self.send_notification(recipient, message, channel, priority,
+                                               attachments, retry_count=0),
+                max_retries=retry_count,
+            )
+        return sent
+
     def _send_email(self, recipient, message, priority, attachments):
         """❌ Logique email mélangée dans la God Class"""
         try:
             # Construction du sujet selon priorité
-            if priority == "urgent":
-                subject = "[URGENT] " + message[:50]
-            elif priority == "high":
-                subject = "[IMPORTANT] " + message[:50]
-            else:
-                subject = message[:50]
+            subject = TEMPLATES.render("legacy.email.subject", priority, subject=message[:50])
 
             # ❌ Simulation connexion SMTP (en vrai, ça serait smtplib)
-            print(f"📧 Connexion SMTP à {self.email_host}:{self.email_port}")
-            print(f"📧 Authentification: {self.email_user}")
-            print(f"📧 Envoi à: {recipient}")
-            print(f"📧 Sujet: {subject}")
-            print(f"📧 Corps: {message[:100]}...")
-
-            if attachments:
-                for att in attachments:
-                    print(f"📧 Pièce jointe: {att}")
-
-            self.sent_count += 1
-            self.email_count += 1
-            print("📧 Email envoyé avec succès ✓")
+            emit(INFO, "email.sent", recipient=recipient, subject=subject,
+                 server=f"{self.email_host}:{self.email_port}",
+                 attachments=len(attachments or ()))
             return True
 
         except Exception as e:
-            print(f"📧 ERREUR envoi email: {e}")
-            self.failed_count += 1
+            emit(ERROR, "email.failed", recipient=recipient, error=str(e))
             return False
 
     def _send_sms(self, recipient, message, priority):
         """❌ Logique SMS mélangée dans la God Class"""
         try:
-            # ❌ Validation spécifique SMS dupliquée
-            if not recipient.startswith("+"):
-                print("⚠️ Numéro doit commencer par + (format international)")
-                recipient = "+33" + recipient.lstrip("0")
+            # Normalisation E.164 (+33 par défaut), mise en cache
+            normalized = VALIDATOR.normalize("sms", recipient)
+            if normalized is None:
+                emit(WARNING, "sms.invalid", recipient=recipient)
+                return False
+            recipient = normalized
 
             # ❌ Troncature message SMS
             if len(message) > 160:
-                print(f"⚠️ Message tronqué (160 car. max pour SMS)")
+                emit(DEBUG, "sms.truncated", recipient=recipient, length=len(message))
                 message = message[:157] + "..."
 
             # Ajout préfixe urgence
-            if priority == "urgent":
-                message = "🚨 URGENT: " + message
-
-            print(f"📱 Appel API SMS: {self.sms_url}")
-            print(f"📱 Clé API: {self.sms_key[:10]}...")
-            print(f"📱 Destinataire: {recipient}")
-            print(f"📱 Message: {message}")
+            message = TEMPLATES.render("sms", priority, message=message)
 
-            self.sent_count += 1
-            self.sms_count += 1
-            print("📱 SMS envoyé avec succès ✓")
+            emit(INFO, "sms.sent", recipient=recipient, api=self.sms_url)
             return True
 
         except Exception as e:
-            print(f"📱 ERREUR envoi SMS: {e}")
-            self.failed_count += 1
+            emit(ERROR, "sms.failed", recipient=recipient, error=str(e))
             return False
 
     def _send_push(self, recipient, message, priority):
@@ -197,95 +252,99 @@ class NotificationService:
                 payload["sound"] = "alarm"
                 payload["badge"] = 1
 
-            print(f"🔔 Appel API Push: {self.push_url}")
-            print(f"🔔 Clé API: {self.push_key[:10]}...")
-            print(f"🔔 Payload: {payload}")
-
-            self.sent_count += 1
-            self.push_count += 1
-            print("🔔 Push envoyé avec succès ✓")
+            emit(INFO, "push.sent", recipient=recipient, api=self.push_url, payload=payload)
             return True
 
         except Exception as e:
-            print(f"🔔 ERREUR envoi Push: {e}")
-            self.failed_count += 1
+            emit(ERROR, "push.failed", recipient=recipient, error=str(e))
             return False
 
     def _send_slack(self, recipient, message, priority):
         """❌ Logique Slack mélangée dans la God Class"""
         try:
             # Construction message Slack
-            if priority == "urgent":
-                slack_message = f"🚨 *URGENT* 🚨\n{message}"
-            elif priority == "high":
-                slack_message = f"⚠️ *Important*\n{message}"
-            else:
-                slack_message = message
-
-            print(f"💬 Envoi Slack webhook")
-            print(f"💬 Canal/User: {recipient}")
-            print(f"💬 Message: {slack_message}")
+            slack_message = TEMPLATES.render("slack", priority, message=message)
 
-            self.sent_count += 1
-            self.slack_count += 1
-            print("💬 Slack envoyé avec succès ✓")
+            emit(INFO, "slack.sent", recipient=recipient, message=slack_message)
             return True
 
         except Exception as e:
-            print(f"💬 ERREUR envoi Slack: {e}")
-            self.failed_count += 1
+            emit(ERROR, "slack.failed", recipient=recipient, error=str(e))
             return False
 
     def _send_teams(self, recipient, message, priority):
         """❌ Ajouté plus tard - code dupliqué de Slack"""
         try:
-            if priority == "urgent":
-                teams_message = f"🚨 **URGENT** 🚨\n\n{message}"
-            elif priority == "high":
-                teams_message = f"⚠️ **Important**\n\n{message}"
-            else:
-                teams_message = message
+            teams_message = TEMPLATES.render("teams", priority, message=message)
 
-            print(f"👥 Envoi Teams webhook")
-            print(f"👥 Canal: {recipient}")
-            print(f"👥 Message: {teams_message}")
-
-            self.sent_count += 1
-            print("👥 Teams envoyé avec succès ✓")
+            emit(INFO, "teams.sent", recipient=recipient, message=teams_message)
             return True
 
         except Exception as e:
-            print(f"👥 ERREUR envoi Teams: {e}")
-            self.failed_count += 1
+            emit(ERROR, "teams.failed", recipient=recipient, error=str(e))
             return False
 
     def _send_whatsapp(self, recipient, message, priority):
         """❌ Encore un canal ajouté - le code grandit..."""
         try:
-            if not recipient.startswith("+"):
-                recipient = "+33" + recipient.lstrip("0")
-
-            if priority == "urgent":
-                message = "🚨 " + message
+            normalized = VALIDATOR.normalize("whatsapp", recipient)
+            if normalized is None:
+                emit(WARNING, "whatsapp.invalid", recipient=recipient)
+                return False
+            recipient = normalized
 
-            print(f"📲 Envoi WhatsApp")
-            print(f"📲 Numéro: {recipient}")
-            print(f"📲 Message: {message}")
+            message = TEMPLATES.render("whatsapp", priority, message=message)
 
-            self.sent_count += 1
-            print("📲 WhatsApp envoyé avec succès ✓")
+            emit(INFO, "whatsapp.sent", recipient=recipient, message=message)
             return True
 
         except Exception as e:
-            print(f"📲 ERREUR envoi WhatsApp: {e}")
-            self.failed_count += 1
+            emit(ERROR, "whatsapp.failed", recipient=recipient, error=str(e))
             return False
 
-    def send_bulk(self, recipients, message, channel, priority="normal"):
+    def send_bulk(self, recipients, message, channel, priority="normal",
+                  max_workers=None, collect_results=True, job_id=None,
+                  checkpoint_store=None):
         """
         Envoi en masse.
         ❌ Logique dupliquée, pas de gestion d'erreurs propre
+
+        Avec max_workers, l'envoi passe par le moteur concurrent BulkSender
+        et le résultat contient aussi "results" : [(recipient, bool), ...]
+        (sauf avec collect_results=False, pour les très gros volumes).
+        Sinon, si le scheduler est activé, le lot passe par sa file de
+        priorité : un envoi urgent soumis pendant ce temps passe devant.
+
+        recipients peut être un itérable quelconque, par exemple un
+        RecipientStream lu depuis un fichier : il est consommé au fil de l'eau.
+
+        Avec job_id, l'envoi est un BulkJob reprenable : relancé avec le
+        même job_id après une interruption, il saute les destinataires déjà
+        traités (points de reprise dans checkpoint_store, bulk_jobs.db par
+        défaut). Le résultat contient alors aussi "skipped" et "resumed".
         """
+        if job_id is not None:
+            with BulkJob(job_id, self.send_notification, checkpoint_store,
+                         max_workers=max_workers or 16) as job:
+                result = job.run(recipients, message, channel, priority)
+            emit(INFO, "bulk.completed", channel=channel,
+                 success=result["success"], failed=result["failed"])
+            return result
+
+        if max_workers:
+            with BulkSender(self.send_notification, max_workers=max_workers) as sender:
+                result = sender.send(recipients, message, channel, priority,
+                                     collect_results=collect_results)
+            emit(INFO, "bulk.completed", channel=channel,
+                 success=result["success"], failed=result["failed"])
+            return result
+
+        if self.scheduler is not None:
+            result = self.scheduler.submit_many(recipients, message, channel, priority).result()
+            emit(INFO, "bulk.completed", channel=channel,
+                 success=result["success"], failed=result["failed"])
+            return result
+
         success = 0
         failed = 0
 
@@ -295,40 +354,89 @@ class NotificationService:
             else:
                 failed += 1
 
-        print(f"\n📊 Résultat bulk: {success} succès, {failed} échecs")
+        emit(INFO, "bulk.completed", channel=channel, success=success, failed=failed)
         return {"success": success, "failed": failed}
 
-    def send_multi_channel(self, recipient, message, channels, priority="normal"):
+    def send_multi_channel(self, recipient, message, channels, priority="normal",
+                           parallel=False, mode="all", quorum=1, timeout=None,
+                           timeouts=None):
         """
         Envoi sur plusieurs canaux.
         ❌ Encore de la duplication
+
+        Avec parallel=True, les canaux partent en même temps (FanOut) :
+        la latence est celle du canal le plus lent, ou du premier succès
+        avec mode="first_success" / mode="quorum". timeout et timeouts
+        bornent l'attente par canal ; un canal non attendu vaut False.
         """
+        if parallel:
+            tasks = {
+                channel: (lambda channel=channel: self.send_notification(
+                    recipient, message, channel, priority))
+                for channel in channels
+            }
+            return self.fan_out.run(tasks, mode=mode, quorum=quorum,
+                                    timeout=timeout, timeouts=timeouts)
+
         results = {}
         for channel in channels:
             results[channel] = self.send_notification(recipient, message, channel, priority)
         return results
 
+    def enqueue(self, recipient, message, channel, priority="normal"):
+        """
+        Envoi asynchrone ordonné par priorité (Future -> bool).
+        Sans scheduler, l'envoi est fait immédiatement sur ce thread.
+        """
+        if self.scheduler is not None:
+            return self.scheduler.submit(recipient, message, channel, priority)
+        future = Future()
+        future.set_result(self.send_notification(recipient, message, channel, priority))
+        return future
+
+    def close(self):
+        """Arrête le scheduler (après avoir vidé ses files) et le pool multi-canal"""
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.fan_out.close()
+
     def get_stats(self):
-        """Statistiques d'envoi"""
+        """Statistiques d'envoi (tous canaux, latences p50/p99 en ms)"""
+        snapshot = self.metrics.snapshot()
         return {
-            "total_sent": self.sent_count,
-            "total_failed": self.failed_count,
+            "total_sent": snapshot["total_sent"],
+            "total_failed": snapshot["total_failed"],
             "by_channel": {
-                "email": self.email_count,
-                "sms": self.sms_count,
-                "push": self.push_count,
-                "slack": self.slack_count
-            }
+                channel: snapshot["by_channel"].get(channel, {}).get("sent", 0)
+                for channel in self.CHANNELS
+            },
+            "latency_ms": {
+                channel: {"p50": stats["p50_ms"], "p99": stats["p99_ms"]}
+                for channel, stats in snapshot["by_channel"].items()
+                if stats["p50_ms"] is not None
+            },
         }
 
     def reset_stats(self):
         """Reset des compteurs"""
-        self.sent_count = 0
-        self.failed_count = 0
-        self.email_count = 0
-        self.sms_count = 0
-        self.push_count = 0
-        self.slack_count = 0
+        self.metrics.reset()
+
+    # Compteurs historiques, calculés depuis les métriques
+    @property
+    def sent_count(self):
+        return sum(sent for sent, _ in self.metrics.counts().values())
+
+    @property
+    def failed_count(self):
+        return sum(failed for _, failed in self.metrics.counts().values())
+
+    def _channel_sent(self, channel):
+        return self.metrics.counts().get(channel, [0, 0])[0]
+
+    email_count = property(lambda self: self._channel_sent("email"))
+    sms_count = property(lambda self: self._channel_sent("sms"))
+    push_count = property(lambda self: self._channel_sent("push"))
+    slack_count = property(lambda self: self._channel_sent("slack"))
 
 
 # ============================================================
@@ -336,6 +444,9 @@ class NotificationService:
 # ============================================================
 
 if __name__ == "__main__":
+    from event_sink import ConsoleSink, set_sink
+    set_sink(ConsoleSink(DEBUG))
+
     print("=" * 60)
     print("DÉMONSTRATION DU CODE LEGACY TECHFLOW")
     print("=" * 60)
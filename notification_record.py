@@ -0,0 +1,224 @@
+"""
+Représentation compacte des notifications en file.
+
+Les messages circulaient en arguments libres et en dicts ad hoc : environ
+300 octets par message en attente (dict, clés, chaînes). Pour des
+millions d'envois en file :
+
+- NotificationRecord : un envoi, en __slots__, avec canal et priorité
+  partagés (membres d'enum, jamais recopiés) ;
+- NotificationBatch : lot en colonnes. Les destinataires sont concaténés
+  en UTF-8 dans un seul tampon, les messages dédoublonnés dans une
+  table, et canal / priorité / résultat tiennent sur un octet chacun.
+  On descend ainsi à une quarantaine d'octets par message.
+"""
+
+import sys
+from array import array
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from id_generator import next_id
+from notification_factory_complete import ChannelType
+from notifier_interface import channel_key
+
+
+class Priority(Enum):
+    """Priorités d'envoi."""
+    URGENT = "urgent"
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+
+CHANNELS = tuple(ChannelType)
+PRIORITIES = tuple(Priority)
+_CHANNEL_CODES = {member: code for code, member in enumerate(CHANNELS)}
+_PRIORITY_CODES = {member: code for code, member in enumerate(PRIORITIES)}
+
+PENDING, SENT, FAILED = 0, 1, 2
+
+
+def channel_of(channel) -> ChannelType:
+    """ChannelType depuis un membre d'enum ou son nom ("email")."""
+    if isinstance(channel, ChannelType):
+        return channel
+    return ChannelType(channel_key(channel))
+
+
+def priority_of(priority) -> Priority:
+    """Priority depuis un membre d'enum ou son nom ; inconnue -> NORMAL."""
+    if isinstance(priority, Priority):
+        return priority
+    try:
+        return Priority(getattr(priority, "value", priority))
+    except ValueError:
+        return Priority.NORMAL
+
+
+class NotificationRecord:
+    """Un envoi : destinataire, message, canal, priorité."""
+
+    __slots__ = ("id", "recipient", "message", "channel", "priority", "attempts")
+
+    def __init__(self, recipient: str, message: str, channel, priority="normal",
+                 id: Optional[int] = None, attempts: int = 0):
+        self.id = next_id() if id is None else id
+        self.recipient = recipient
+        self.message = message
+        self.channel = channel_of(channel)
+        self.priority = priority_of(priority)
+        self.attempts = attempts
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "recipient": self.recipient,
+            "message": self.message,
+            "channel": self.channel.value,
+            "priority": self.priority.value,
+            "attempts": self.attempts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NotificationRecord":
+        return cls(data["recipient"], data["message"], data["channel"],
+                   data.get("priority", "normal"), data.get("id"), data.get("attempts", 0))
+
+    def __eq__(self, other):
+        if not isinstance(other, NotificationRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (f"NotificationRecord(id={self.id}, recipient={self.recipient!r}, "
+                f"channel={self.channel.value}, priority={self.priority.value})")
+
+
+class NotificationBatch:
+    """
+    Lot de notifications stocké en colonnes.
+
+    Les enregistrements ne sont matérialisés (NotificationRecord) qu'à la
+    lecture ; le résultat de chaque envoi est noté dans la colonne
+    outcomes (PENDING / SENT / FAILED).
+    """
+
+    def __init__(self):
+        self._recipients = bytearray()
+        self._offsets = array("I", [0])  # tampon limité à 4 Go
+        self._messages: List[str] = []
+        self._message_codes: Dict[str, int] = {}
+        self._message_ids = array("I")
+        self._channels = array("B")
+        self._priorities = array("B")
+        self.outcomes = bytearray()
+
+    def _message_code(self, message: str) -> int:
+        code = self._message_codes.get(message)
+        if code is None:
+            code = self._message_codes[message] = len(self._messages)
+            self._messages.append(message)
+        return code
+
+    def append(self, recipient: str, message: str, channel, priority="normal"):
+        self.extend((recipient,), message, channel, priority)
+
+    def extend(self, recipients: Iterable[str], message: str, channel, priority="normal"):
+        """Ajoute un même message pour plusieurs destinataires (cas du send_bulk)."""
+        message_code = self._message_code(message)
+        channel_code = _CHANNEL_CODES[channel_of(channel)]
+        priority_code = _PRIORITY_CODES[priority_of(priority)]
+        buffer = self._recipients
+        offsets = self._offsets
+        count = 0
+        for recipient in recipients:
+            buffer += recipient.encode("utf-8")
+            offsets.append(len(buffer))
+            count += 1
+        self._message_ids.extend([message_code] * count)
+        self._channels.extend([channel_code] * count)
+        self._priorities.extend([priority_code] * count)
+        self.outcomes.extend(bytes(count))
+
+    def __len__(self):
+        return len(self._message_ids)
+
+    def recipient(self, index: int) -> str:
+        return self._recipients[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def message(self, index: int) -> str:
+        return self._messages[self._message_ids[index]]
+
+    def channel(self, index: int) -> ChannelType:
+        return CHANNELS[self._channels[index]]
+
+    def priority(self, index: int) -> Priority:
+        return PRIORITIES[self._priorities[index]]
+
+    def __getitem__(self, index: int) -> NotificationRecord:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("index hors du lot")
+        return NotificationRecord(self.recipient(index), self.message(index),
+                                  self.channel(index), self.priority(index), id=index)
+
+    def __iter__(self) -> Iterator[NotificationRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def mark(self, index: int, ok: bool):
+        self.outcomes[index] = SENT if ok else FAILED
+
+    def pending_indexes(self) -> Iterator[int]:
+        """Index des envois pas encore faits (reprise après interruption)."""
+        outcomes = self.outcomes
+        start = 0
+        while True:
+            index = outcomes.find(PENDING, start)
+            if index < 0:
+                return
+            yield index
+            start = index + 1
+
+    def summary(self) -> dict:
+        return {
+            "success": self.outcomes.count(SENT),
+            "failed": self.outcomes.count(FAILED),
+            "pending": self.outcomes.count(PENDING),
+        }
+
+    def memory_bytes(self) -> int:
+        """Taille mémoire approximative du lot (hors objets enum partagés)."""
+        columns = (self._recipients, self._offsets, self._message_ids,
+                   self._channels, self._priorities, self.outcomes)
+        return (sum(sys.getsizeof(column) for column in columns)
+                + sys.getsizeof(self._messages) + sys.getsizeof(self._message_codes)
+                + sum(sys.getsizeof(message) for message in self._messages))
+
+
+# Test
+if __name__ == "__main__":
+    import tracemalloc
+
+    size = 200_000
+    message = "Votre demande de congés a été approuvée pour la période du 20 au 25 décembre."
+
+    tracemalloc.start()
+    as_dicts = [{"recipient": f"employee{i}@techflow.com", "message": message,
+                 "channel": "email", "priority": "normal", "status": "pending"}
+                for i in range(size)]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    del as_dicts
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    batch = NotificationBatch()
+    batch.extend((f"employee{i}@techflow.com" for i in range(size)), message, "email")
+    batch_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"📦 dict par message : {dict_bytes / size:6.1f} octets/message")
+    print(f"🗜️  NotificationBatch : {batch_bytes / size:6.1f} octets/message")
+    print(f"🔎 {batch[42]}")
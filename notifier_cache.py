@@ -0,0 +1,106 @@
+"""
+NotifierCache - Cache d'instances de notifiers pour la Factory.
+
+Évite de reconstruire un notifier (lecture de config, ouverture de
+connexions...) à chaque NotificationFactory.create().
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from event_sink import ERROR, emit
+
+
+def close_notifier(notifier):
+    """Appelle notifier.close() s'il existe, sans propager d'erreur."""
+    close = getattr(notifier, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as e:
+        emit(ERROR, "notifier.close_failed", notifier=type(notifier).__name__, error=str(e))
+
+
+def options_key(options: dict) -> Optional[Tuple]:
+    """
+    Partie de la clé de cache issue des options du constructeur ; None si
+    une valeur n'est pas hachable (l'instance ne peut alors pas être partagée).
+    """
+    key = tuple(sorted(options.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class NotifierCache:
+    """
+    Cache thread-safe d'instances, avec éviction LRU optionnelle.
+
+    Les clés sont des tuples (channel_type, config_key, options). La
+    création est paresseuse et faite une seule fois par clé, même si
+    plusieurs threads demandent la même instance en même temps.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size doit être >= 1")
+        self.max_size = max_size
+        self._instances: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], object]):
+        """Retourne l'instance associée à key, en la créant si besoin."""
+        with self._lock:
+            notifier = self._instances.get(key)
+            if notifier is not None:
+                self._instances.move_to_end(key)
+                return notifier
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # La construction se fait hors du verrou global : seuls les appels
+        # sur la même clé attendent.
+        with key_lock:
+            with self._lock:
+                notifier = self._instances.get(key)
+                if notifier is not None:
+                    return notifier
+            notifier = factory()
+            evicted = []
+            with self._lock:
+                self._instances[key] = notifier
+                while self.max_size is not None and len(self._instances) > self.max_size:
+                    old_key, old = self._instances.popitem(last=False)
+                    self._key_locks.pop(old_key, None)
+                    evicted.append(old)
+
+        for old in evicted:
+            close_notifier(old)
+        return notifier
+
+    def invalidate(self, channel_type) -> int:
+        """Ferme et retire toutes les instances d'un canal."""
+        with self._lock:
+            keys = [k for k in self._instances if k[0] == channel_type]
+            removed = [self._instances.pop(k) for k in keys]
+            for k in keys:
+                self._key_locks.pop(k, None)
+        for notifier in removed:
+            close_notifier(notifier)
+        return len(removed)
+
+    def close(self):
+        """Ferme toutes les instances en cache."""
+        with self._lock:
+            removed: List[object] = list(self._instances.values())
+            self._instances.clear()
+            self._key_locks.clear()
+        for notifier in removed:
+            close_notifier(notifier)
+
+    def __len__(self):
+        return len(self._instances)
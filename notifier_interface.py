@@ -1,4 +1,11 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, List, Tuple
+
+
+def channel_key(channel) -> str:
+    """Nom du canal depuis un membre de ChannelType ou une chaîne ("email")."""
+    return getattr(channel, "value", channel)
+
 
 class INotifier(ABC):
     @abstractmethod
@@ -7,4 +14,15 @@ class INotifier(ABC):
     
     @abstractmethod
     def get_channel_name(self) -> str:
-        pass
\ No newline at end of file
+        pass
+    
+    def send_batch(self, items: Iterable[Tuple[str, str]]) -> List[bool]:
+        """
+        Envoie un lot de (recipient, message) en un seul appel.
+        Par défaut : un send() par élément. Les notifiers dont le
+        fournisseur accepte des lots surchargent cette méthode.
+        """
+        return [self.send(recipient, message) for recipient, message in items]
+    
+    def close(self) -> None:
+        """Libère les ressources (connexions...). Rien à faire par défaut."""
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Outbox - File d'envoi durable avec workers de dispatch en arrière-plan.
+
+Le chemin de la requête ne paie plus qu'une insertion SQLite : les
+notifications sont livrées plus tard par des workers qui vident l'outbox
+via les notifiers de NotificationFactory.
+
+Garanties :
+- at-least-once : un message réclamé par un worker est "loué" pour
+  lease_seconds ; si le worker meurt avant l'acquittement, le message
+  redevient disponible et sera renvoyé.
+- backpressure : au-delà de max_pending messages en attente, enqueue()
+  bloque puis lève OutboxFull.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from event_sink import ERROR, INFO, WARNING, emit
+from notifier_interface import channel_key
+
+
+class OutboxFull(Exception):
+    """L'outbox a atteint max_pending et ne s'est pas vidée à temps."""
+
+
+class OutboxMessage:
+    """Message réclamé par un worker."""
+
+    __slots__ = ("id", "channel", "recipient", "message", "priority", "attempts")
+
+    def __init__(self, id, channel, recipient, message, priority, attempts):
+        self.id = id
+        self.channel = channel
+        self.recipient = recipient
+        self.message = message
+        self.priority = priority
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"OutboxMessage(id={self.id}, channel={self.channel}, recipient={self.recipient})"
+
+
+class Outbox:
+    """
+    Stockage durable (SQLite en mode WAL) des notifications à envoyer.
+
+    Args:
+        path: Fichier SQLite (":memory:" pour les tests)
+        max_pending: Seuil de backpressure
+        max_attempts: Au-delà, le message passe en statut 'dead'
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            message TEXT NOT NULL,
+            priority TEXT NOT NULL DEFAULT 'normal',
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_outbox_available
+            ON outbox(status, available_at, id);
+    """
+
+    def __init__(self, path: str = "outbox.db", max_pending: int = 1_000_000,
+                 max_attempts: int = 5):
+        self.path = path
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._pending = self._db.execute(
+            "SELECT COUNT(*) FROM outbox WHERE status = 'pending'"
+        ).fetchone()[0]
+        self.wakeup = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Côté producteur
+    # ------------------------------------------------------------------
+
+    def enqueue(self, recipient: str, message: str, channel, priority: str = "normal",
+                timeout: Optional[float] = None) -> int:
+        """Ajoute une notification et retourne son id."""
+        return self.enqueue_many([(recipient, message)], channel, priority, timeout)[0]
+
+    def enqueue_many(self, items: Sequence[Tuple[str, str]], channel,
+                     priority: str = "normal", timeout: Optional[float] = None) -> List[int]:
+        """
+        Ajoute un lot de (recipient, message) en une transaction.
+
+        Raises:
+            OutboxFull: Si l'outbox reste pleine au-delà de timeout
+        """
+        items = list(items)
+        channel = channel_key(channel)
+        now = time.time()
+        with self._not_full:
+            if not self._not_full.wait_for(
+                lambda: self._pending + len(items) <= self.max_pending
+                or self._pending == 0,
+                timeout,
+            ):
+                raise OutboxFull(
+                    f"Outbox pleine ({self._pending}/{self.max_pending} en attente)"
+                )
+            ids = []
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for recipient, message in items:
+                    ids.append(self._db.execute(
+                        "INSERT INTO outbox (channel, recipient, message, priority, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (channel, recipient, message, priority, now),
+                    ).lastrowid)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._pending += len(items)
+        self.wakeup.set()
+        return ids
+
+    # ------------------------------------------------------------------
+    # Côté workers
+    # ------------------------------------------------------------------
+
+    def claim(self, limit: int = 100, lease_seconds: float = 30.0) -> List[OutboxMessage]:
+        """Réclame jusqu'à limit messages disponibles pour lease_seconds."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT id, channel, recipient, message, priority, attempts FROM outbox "
+                    "WHERE status = 'pending' AND available_at <= ? ORDER BY id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE outbox SET available_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    [(now + lease_seconds, row[0]) for row in rows],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return [OutboxMessage(*row[:5], row[5] + 1) for row in rows]
+
+    def ack(self, ids: Iterable[int]):
+        """Supprime les messages livrés."""
+        ids = list(ids)
+        if not ids:
+            return
+        with self._not_full:
+            # rowcount : un message relivré après expiration du bail n'est compté qu'une fois
+            deleted = self._db.executemany(
+                "DELETE FROM outbox WHERE id = ?", [(i,) for i in ids]
+            ).rowcount
+            self._pending -= deleted
+            self._not_full.notify_all()
+
+    def nack(self, messages: Iterable[OutboxMessage], retry_delay: float = 1.0):
+        """Remet les messages en attente, ou les passe en 'dead' après max_attempts."""
+        now = time.time()
+        retry, dead = [], []
+        for msg in messages:
+            (dead if msg.attempts >= self.max_attempts else retry).append(msg)
+        with self._not_full:
+            self._db.executemany(
+                "UPDATE outbox SET available_at = ? WHERE id = ?",
+                [(now + retry_delay * msg.attempts, msg.id) for msg in retry],
+            )
+            self._db.executemany(
+                "UPDATE outbox SET status = 'dead' WHERE id = ?", [(msg.id,) for msg in dead]
+            )
+            self._pending -= len(dead)
+            if dead:
+                self._not_full.notify_all()
+        for msg in dead:
+            emit(ERROR, "outbox.dead", id=msg.id, channel=msg.channel, recipient=msg.recipient)
+
+    def pending_count(self) -> int:
+        return self._pending
+
+    def dead_letters(self) -> List[Tuple[int, str, str]]:
+        """Retourne (id, channel, recipient) des messages abandonnés."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, channel, recipient FROM outbox WHERE status = 'dead' ORDER BY id"
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class OutboxDispatcher:
+    """
+    Pool de workers qui vident l'outbox par lots.
+
+    Args:
+        outbox: Outbox à vider
+        notifier_provider: channel (str) -> INotifier ; par défaut
+            NotificationFactory.create (à combiner avec enable_cache())
+        workers: Nombre de threads
+        batch_size: Messages réclamés par tour
+    """
+
+    def __init__(self, outbox: Outbox, notifier_provider: Optional[Callable] = None,
+                 workers: int = 4, batch_size: int = 100, lease_seconds: float = 30.0,
+                 retry_delay: float = 1.0, poll_interval: float = 0.5):
+        self.outbox = outbox
+        self.notifier_provider = notifier_provider or self._factory_provider
+        self.workers = workers
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @staticmethod
+    def _factory_provider(channel: str):
+        from notification_factory_complete import ChannelType, NotificationFactory
+        return NotificationFactory.create(ChannelType(channel))
+
+    def dispatch_once(self) -> int:
+        """Réclame et livre un lot. Retourne le nombre de messages traités."""
+        messages = self.outbox.claim(self.batch_size, self.lease_seconds)
+        by_channel = {}
+        for msg in messages:
+            by_channel.setdefault(msg.channel, []).append(msg)
+
+        for channel, batch in by_channel.items():
+            try:
+                notifier = self.notifier_provider(channel)
+                results = notifier.send_batch([(m.recipient, m.message) for m in batch])
+            except Exception as e:
+                emit(WARNING, "outbox.batch_failed", channel=channel, size=len(batch), error=str(e))
+                self.outbox.nack(batch, self.retry_delay)
+                continue
+            self.outbox.ack(m.id for m, ok in zip(batch, results) if ok)
+            self.outbox.nack([m for m, ok in zip(batch, results) if not ok], self.retry_delay)
+        return len(messages)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.dispatch_once()
+            except Exception as e:
+                emit(ERROR, "outbox.worker_error", error=str(e))
+                processed = 0
+            if not processed:
+                self.outbox.wakeup.wait(self.poll_interval)
+                self.outbox.wakeup.clear()
+
+    def start(self):
+        """Démarre les workers."""
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"outbox-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        emit(INFO, "outbox.started", workers=self.workers)
+
+    def stop(self, drain: bool = True, timeout: float = 30.0):
+        """Arrête les workers, après avoir vidé l'outbox si drain=True."""
+        deadline = time.monotonic() + timeout
+        while drain and self.outbox.pending_count() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self._stop.set()
+        self.outbox.wakeup.set()
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+        emit(INFO, "outbox.stopped", pending=self.outbox.pending_count())
+
+
+# Test
+if __name__ == "__main__":
+    from event_sink import ConsoleSink, set_sink
+    from notification_factory_complete import NotificationFactory, setup_factory
+
+    set_sink(ConsoleSink())
+    setup_factory()
+    NotificationFactory.enable_cache()
+
+    outbox = Outbox(":memory:")
+    dispatcher = OutboxDispatcher(outbox, workers=2, batch_size=50)
+    dispatcher.start()
+
+    start = time.perf_counter()
+    for i in range(5):
+        outbox.enqueue(f"user{i}@techflow.com", f"Votre demande #{i} a été validée", "console")
+    print(f"📥 5 notifications en file en {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    dispatcher.stop()
+    print(f"📊 En attente: {outbox.pending_count()}, abandonnés: {len(outbox.dead_letters())}")
@@ -0,0 +1,298 @@
+"""
+PriorityScheduler - Ordonnancement des envois selon leur priorité.
+
+La priorité ("urgent", "high", "normal", "low") ne changeait que la mise
+en forme : les envois partaient dans l'ordre d'arrivée, sur le thread de
+l'appelant. Le scheduler place une file par priorité devant les
+notifiers. Les workers servent d'abord les files strictes ("urgent"),
+puis les autres au prorata de leur poids (round-robin pondéré lissé) :
+une newsletter de 500k destinataires en "low" ne retarde pas un code de
+vérification "urgent", et ne se retrouve pas non plus affamée par un flux
+continu de "normal".
+
+Un envoi en masse est une seule entrée de file qui consomme son itérable
+au fil de l'eau : la mémoire ne dépend pas du nombre de destinataires.
+"""
+
+import inspect
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+
+from event_sink import ERROR, INFO, emit
+from notifier_interface import channel_key
+
+PRIORITIES = ("urgent", "high", "normal", "low")
+DEFAULT_WEIGHTS = {"urgent": 8, "high": 4, "normal": 2, "low": 1}
+DEFAULT_PRIORITY = "normal"
+
+_END = object()
+
+
+@lru_cache(maxsize=None)
+def _send_takes_kwargs(notifier_class) -> bool:
+    parameters = inspect.signature(notifier_class.send).parameters.values()
+    return any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters)
+
+
+def _accepts_priority(notifier) -> bool:
+    """
+    True si le notifier réel (sous les couches de la factory : mesure,
+    quotas, coupe-circuit) accepte des options dans send, comme EmailNotifier.
+    """
+    inner = vars(notifier).get("notifier")
+    while inner is not None:
+        notifier, inner = inner, vars(inner).get("notifier")
+    return _send_takes_kwargs(type(notifier))
+
+
+class _Job:
+    """Entrée de file : un envoi unitaire ou un lot (itérable consommé à la demande)."""
+
+    __slots__ = ("recipients", "lock", "message", "channel", "priority", "future",
+                 "single", "in_flight", "success", "failed", "exhausted")
+
+    def __init__(self, recipients, message, channel, priority, single):
+        self.recipients = iter(recipients)
+        self.lock = threading.Lock()  # lecture de l'itérable, hors verrou global
+        self.message = message
+        self.channel = channel
+        self.priority = priority
+        self.future: Future = Future()
+        self.single = single
+        self.in_flight = 0
+        self.success = 0
+        self.failed = 0
+        self.exhausted = False
+
+    def result(self):
+        if self.single:
+            return self.success > 0
+        return {"success": self.success, "failed": self.failed}
+
+
+class PriorityScheduler:
+    """
+    Files par priorité servies par un pool de workers.
+
+    Args:
+        send_func: send_func(recipient, message, channel, priority) -> bool ;
+            par défaut NotificationFactory.create(channel).send
+        workers: Nombre de threads d'envoi
+        weights: Poids par priorité pour le partage équitable
+        strict: Priorités servies avant toutes les autres dès qu'elles ont
+            des envois en attente
+    """
+
+    def __init__(self, send_func: Optional[Callable] = None, workers: int = 4,
+                 weights: Optional[Dict[str, int]] = None, strict: Iterable[str] = ("urgent",)):
+        if workers < 1:
+            raise ValueError("workers doit être >= 1")
+        self.send_func = send_func or self._factory_send
+        self.workers = workers
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        if any(weight < 1 for weight in self.weights.values()):
+            raise ValueError("Les poids doivent être >= 1")
+        self.strict = tuple(p for p in PRIORITIES if p in set(strict))
+        self._queues: Dict[str, deque] = {p: deque() for p in PRIORITIES}
+        self._current = {p: 0 for p in PRIORITIES}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+        self.stats = {p: 0 for p in PRIORITIES}
+
+    @staticmethod
+    def _factory_send(recipient, message, channel, priority) -> bool:
+        from notification_factory_complete import ChannelType, NotificationFactory
+        notifier = NotificationFactory.create(ChannelType(channel))
+        # INotifier.send ne prend pas de priorité ; EmailNotifier s'en sert pour le sujet
+        if _accepts_priority(notifier):
+            return notifier.send(recipient, message, priority=priority)
+        return notifier.send(recipient, message)
+
+    @staticmethod
+    def _priority_key(priority) -> str:
+        priority = getattr(priority, "value", priority)
+        return priority if priority in PRIORITIES else DEFAULT_PRIORITY
+
+    # ------------------------------------------------------------------
+    # Soumission
+    # ------------------------------------------------------------------
+
+    def _enqueue(self, job: _Job) -> Future:
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Scheduler arrêté")
+            self._queues[job.priority].append(job)
+            self._cond.notify()
+        return job.future
+
+    def submit(self, recipient, message, channel, priority="normal") -> Future:
+        """Met un envoi en file. La Future porte le résultat (bool)."""
+        return self._enqueue(_Job((recipient,), message, channel_key(channel),
+                                  self._priority_key(priority), single=True))
+
+    def submit_many(self, recipients: Iterable[str], message, channel,
+                    priority="normal") -> Future:
+        """
+        Met un envoi en masse en file, comme une seule entrée.
+
+        La Future porte {"success": int, "failed": int}.
+        """
+        return self._enqueue(_Job(recipients, message, channel_key(channel),
+                                  self._priority_key(priority), single=False))
+
+    def pending(self) -> Dict[str, int]:
+        """Nombre d'entrées en file par priorité (un lot compte pour une)."""
+        with self._cond:
+            return {p: len(queue) for p, queue in self._queues.items()}
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _pick(self) -> Optional[str]:
+        """Priorité à servir (appelé sous verrou), None si tout est vide."""
+        for priority in self.strict:
+            if self._queues[priority]:
+                return priority
+        best = None
+        total = 0
+        for priority in PRIORITIES:
+            if self._queues[priority] and priority not in self.strict:
+                weight = self.weights[priority]
+                self._current[priority] += weight
+                total += weight
+                if best is None or self._current[priority] > self._current[best]:
+                    best = priority
+        if best is not None:
+            self._current[best] -= total
+        return best
+
+    def _next(self):
+        """
+        Prochain (job, destinataire) à envoyer, ou None pour arrêter le worker.
+
+        Le job est choisi sous le verrou global, mais son destinataire est lu
+        hors de ce verrou, sous celui du job : un itérable lent (curseur de
+        base, générateur paginé) ne bloque ni les soumissions ni les workers
+        des autres jobs.
+        """
+        while True:
+            with self._cond:
+                priority = self._pick()
+                while priority is None:
+                    if self._stopping:
+                        return None
+                    self._cond.wait()
+                    priority = self._pick()
+                job = self._queues[priority][0]
+                if job.single:
+                    self._queues[priority].popleft()
+                    job.exhausted = True
+                job.in_flight += 1  # le job ne peut pas se terminer pendant la lecture
+            recipient = self._fetch(job)
+            with self._cond:
+                if recipient is not _END:
+                    self.stats[priority] += 1
+                    return job, recipient
+                job.in_flight -= 1
+                if not job.exhausted:
+                    job.exhausted = True
+                    self._queues[priority].remove(job)
+                self._finish_if_done(job)
+
+    @staticmethod
+    def _fetch(job: _Job):
+        """Destinataire suivant du job (_END s'il est épuisé ou en erreur)."""
+        with job.lock:
+            if job.exhausted and not job.single:
+                return _END
+            try:
+                return next(job.recipients, _END)
+            except Exception as e:
+                emit(ERROR, "scheduler.source_error", channel=job.channel, error=str(e))
+                return _END
+
+    def _finish_if_done(self, job: _Job):
+        if job.exhausted and not job.in_flight and not job.future.done():
+            job.future.set_result(job.result())
+
+    def _run(self):
+        while True:
+            task = self._next()
+            if task is None:
+                return
+            job, recipient = task
+            try:
+                ok = bool(self.send_func(recipient, job.message, job.channel, job.priority))
+            except Exception:
+                ok = False
+            with self._cond:
+                job.in_flight -= 1
+                if ok:
+                    job.success += 1
+                else:
+                    job.failed += 1
+                self._finish_if_done(job)
+
+    def start(self):
+        """Démarre les workers."""
+        with self._cond:
+            self._stopping = False
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"priority-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        emit(INFO, "scheduler.started", workers=self.workers)
+
+    def stop(self, drain: bool = True, timeout: float = 30.0):
+        """
+        Arrête les workers. Avec drain=True, les files sont vidées d'abord ;
+        sinon les entrées restantes sont annulées.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._stopping = True
+            if not drain:
+                for queue in self._queues.values():
+                    while queue:
+                        job = queue.popleft()
+                        job.exhausted = True
+                        if not job.in_flight:
+                            job.future.cancel()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+        emit(INFO, "scheduler.stopped", pending=sum(self.pending().values()))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# Test
+if __name__ == "__main__":
+    def fake_send(recipient, message, channel, priority):
+        time.sleep(0.001)  # Latence fournisseur simulée
+        return True
+
+    with PriorityScheduler(fake_send, workers=2) as scheduler:
+        newsletter = scheduler.submit_many(
+            (f"employee{i}@techflow.com" for i in range(5_000)), "Newsletter", "email", "low"
+        )
+        time.sleep(0.05)
+        start = time.perf_counter()
+        code = scheduler.submit("0612345678", "Code de vérification: 847291", "sms", "urgent")
+        code.result()
+        print(f"🚨 SMS urgent livré en {(time.perf_counter() - start) * 1000:.1f} ms "
+              f"derrière la newsletter")
+        print(f"📰 Newsletter: {newsletter.result()}")
+        print(f"📊 Envois par priorité: {scheduler.stats}")
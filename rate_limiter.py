@@ -0,0 +1,164 @@
+"""
+RateLimiter - Limitation de débit par canal (token bucket).
+
+Chaque fournisseur (SMS, push, Slack, Teams, WhatsApp...) impose un quota.
+Un seau de jetons par canal laisse passer les rafales jusqu'à `burst`
+puis lisse le débit à `rate` envois par seconde.
+
+Le verrou d'un seau ne protège qu'une réservation de quelques
+opérations arithmétiques : l'attente se fait hors verrou (time.sleep
+ou asyncio.sleep), les threads ne se bloquent donc jamais entre eux
+pendant qu'ils attendent leur jeton.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from async_notifier import AsyncNotifier
+from notifier_interface import INotifier, channel_key
+
+
+class TokenBucket:
+    """
+    Seau de jetons thread-safe.
+
+    Args:
+        rate: Jetons ajoutés par seconde (débit soutenu)
+        burst: Capacité du seau (rafale maximale), rate par défaut
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate doit être > 0")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, n: float, max_wait: Optional[float]) -> Optional[float]:
+        """
+        Réserve n jetons. Le solde peut devenir négatif : il représente
+        la file d'attente, et le délai retourné est le temps nécessaire
+        pour la rembourser. Retourne None si ce délai dépasse max_wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = (n - self._tokens) / self.rate if self._tokens < n else 0.0
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= n
+            return wait
+
+    def try_acquire(self, n: float = 1) -> bool:
+        """Prend n jetons s'ils sont disponibles immédiatement."""
+        return self._reserve(n, 0.0) is not None
+
+    def acquire(self, n: float = 1, timeout: Optional[float] = None) -> bool:
+        """Attend n jetons (False si l'attente dépasserait timeout)."""
+        wait = self._reserve(n, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, n: float = 1, timeout: Optional[float] = None) -> bool:
+        """Comme acquire(), sans bloquer la boucle asyncio."""
+        wait = self._reserve(n, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+
+class RateLimiter:
+    """
+    Registre des seaux par canal (ChannelType ou chaîne).
+    Un canal sans limite configurée n'est pas limité.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Args:
+            limits: {canal: (rate, burst)}
+        """
+        self._buckets: Dict[str, TokenBucket] = {
+            channel: TokenBucket(rate, burst) for channel, (rate, burst) in (limits or {}).items()
+        }
+
+    @classmethod
+    def from_config(cls, config) -> "RateLimiter":
+        """Construit le limiteur depuis NotificationConfig.rate_limits."""
+        return cls(config.rate_limits)
+
+    def for_channel(self, channel) -> Optional[TokenBucket]:
+        return self._buckets.get(channel_key(channel))
+
+    def acquire(self, channel, n: float = 1, timeout: Optional[float] = None) -> bool:
+        bucket = self.for_channel(channel)
+        return True if bucket is None else bucket.acquire(n, timeout)
+
+    async def acquire_async(self, channel, n: float = 1,
+                            timeout: Optional[float] = None) -> bool:
+        bucket = self.for_channel(channel)
+        return True if bucket is None else await bucket.acquire_async(n, timeout)
+
+    def wrap(self, notifier: INotifier, channel) -> INotifier:
+        """Enveloppe un notifier si son canal est limité."""
+        bucket = self.for_channel(channel)
+        return notifier if bucket is None else RateLimitedNotifier(notifier, bucket)
+
+    def wrap_async(self, notifier: AsyncNotifier, channel) -> AsyncNotifier:
+        bucket = self.for_channel(channel)
+        return notifier if bucket is None else AsyncRateLimitedNotifier(notifier, bucket)
+
+
+class RateLimitedNotifier(INotifier):
+    """Décorateur : attend un jeton avant chaque envoi."""
+
+    def __init__(self, notifier: INotifier, bucket: TokenBucket):
+        self.notifier = notifier
+        self.bucket = bucket
+
+    def get_channel_name(self) -> str:
+        return self.notifier.get_channel_name()
+
+    def send(self, recipient, message, **kwargs) -> bool:
+        self.bucket.acquire()
+        return self.notifier.send(recipient, message, **kwargs)
+
+    def send_batch(self, items, **kwargs):
+        items = list(items)
+        self.bucket.acquire(len(items))
+        return self.notifier.send_batch(items, **kwargs)
+
+    def close(self) -> None:
+        self.notifier.close()
+
+    def __getattr__(self, name):
+        # validate(), format_message()... restent accessibles
+        return getattr(self.notifier, name)
+
+
+class AsyncRateLimitedNotifier(AsyncNotifier):
+    """Équivalent asyncio de RateLimitedNotifier."""
+
+    def __init__(self, notifier: AsyncNotifier, bucket: TokenBucket):
+        self.notifier = notifier
+        self.bucket = bucket
+
+    def get_channel_name(self) -> str:
+        return self.notifier.get_channel_name()
+
+    async def send(self, recipient: str, message: str) -> bool:
+        await self.bucket.acquire_async()
+        return await self.notifier.send(recipient, message)
+
+    async def close(self) -> None:
+        await self.notifier.close()
@@ -0,0 +1,181 @@
+"""
+RecipientStream - Lecture des destinataires au fil de l'eau pour send_bulk.
+
+send_bulk recevait une liste complète : un export de 5 millions
+d'employés était chargé en mémoire avant le premier envoi. Un
+RecipientStream lit sa source (itérable, CSV, JSONL, fichier texte en
+mmap) ligne à ligne, valide et normalise chaque destinataire
+(VALIDATOR), écarte les doublons et alimente directement les workers :
+la mémoire reste constante et les premiers messages partent tout de suite.
+
+    stream = RecipientStream.from_csv("export.csv", "email", column="email")
+    service.send_bulk(stream, message, "email", max_workers=32, collect_results=False)
+"""
+
+import csv
+import json
+import mmap
+import time
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from dedup import TTLSet, content_key
+from notifier_interface import channel_key
+from recipient_validator import VALIDATOR
+
+# Pas de doublons possibles pendant la durée d'un envoi
+_STREAM_TTL = 7 * 24 * 3600
+
+
+class RecipientStream:
+    """
+    Itérable de destinataires normalisés et dédoublonnés.
+
+    Args:
+        source: Itérable de destinataires (générateur, fichier...)
+        channel: Canal d'envoi (règle de validation)
+        validate: Normaliser et écarter les destinataires invalides
+        dedup: Écarter les doublons
+        dedup_capacity: Nombre maximal d'empreintes gardées (mémoire bornée :
+            au-delà, les plus anciennes sont oubliées)
+        on_progress: Appelé avec stats toutes les progress_every lectures,
+            puis une dernière fois en fin de source
+        on_reject: Appelé avec (destinataire, raison) pour chaque rejet
+    """
+
+    def __init__(self, source: Iterable[str], channel, validate: bool = True,
+                 dedup: bool = True, dedup_capacity: int = 1_000_000,
+                 on_progress: Optional[Callable[[dict], None]] = None,
+                 progress_every: int = 10_000,
+                 on_reject: Optional[Callable[[str, str], None]] = None):
+        self.source = source
+        self.channel = channel_key(channel)
+        self.validate = validate
+        self.dedup = dedup
+        self.dedup_capacity = dedup_capacity
+        self.on_progress = on_progress
+        self.progress_every = progress_every
+        self.on_reject = on_reject
+        self.stats = {"read": 0, "valid": 0, "invalid": 0, "duplicates": 0, "seconds": 0.0}
+
+    # ------------------------------------------------------------------
+    # Sources
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_csv(cls, path: str, channel, column: str = "recipient",
+                 delimiter: str = ",", encoding: str = "utf-8", **kwargs) -> "RecipientStream":
+        """Colonne column d'un CSV avec en-tête."""
+        def rows():
+            with open(path, newline="", encoding=encoding) as f:
+                for row in csv.DictReader(f, delimiter=delimiter):
+                    yield row.get(column)
+        return cls(rows(), channel, **kwargs)
+
+    @classmethod
+    def from_jsonl(cls, path: str, channel, field: str = "recipient",
+                   encoding: str = "utf-8", **kwargs) -> "RecipientStream":
+        """Champ field de chaque ligne JSON ; une ligne illisible est rejetée."""
+        def rows():
+            with open(path, encoding=encoding) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line).get(field)
+                    except (ValueError, AttributeError):
+                        yield None
+        return cls(rows(), channel, **kwargs)
+
+    @classmethod
+    def from_file(cls, path: str, channel, encoding: str = "utf-8",
+                  **kwargs) -> "RecipientStream":
+        """Fichier texte, un destinataire par ligne, lu via mmap."""
+        def rows():
+            with open(path, "rb") as f:
+                try:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    return  # fichier vide
+                with mapped:
+                    for line in iter(mapped.readline, b""):
+                        line = line.strip()
+                        if line:
+                            yield line.decode(encoding)
+        return cls(rows(), channel, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def _reject(self, recipient, reason: str):
+        self.stats["invalid"] += 1
+        if self.on_reject is not None:
+            self.on_reject(recipient, reason)
+
+    def _report(self, start: float):
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+        if self.on_progress is not None:
+            self.on_progress(dict(self.stats))
+
+    def __iter__(self) -> Iterator[str]:
+        stats = self.stats
+        normalize = VALIDATOR.normalize
+        channel = self.channel
+        seen = TTLSet(_STREAM_TTL, self.dedup_capacity) if self.dedup else None
+        start = time.perf_counter()
+        for recipient in self.source:
+            if self.progress_every and stats["read"] and stats["read"] % self.progress_every == 0:
+                self._report(start)
+            stats["read"] += 1
+            if self.validate:
+                normalized = normalize(channel, recipient)
+                if normalized is None:
+                    self._reject(recipient, f"Format invalide pour {channel}")
+                    continue
+                recipient = normalized
+            elif not recipient:
+                self._reject(recipient, "Destinataire manquant")
+                continue
+            if seen is not None and not seen.add(content_key(channel, recipient, "")):
+                stats["duplicates"] += 1
+                continue
+            stats["valid"] += 1
+            yield recipient
+        self._report(start)
+
+    def chunks(self, size: int = 1_000) -> Iterator[List[str]]:
+        """Destinataires par paquets de size (pour les API d'envoi par lot)."""
+        chunk: List[str] = []
+        for recipient in self:
+            chunk.append(recipient)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+# Test
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    from notification_legacy import NotificationService
+
+    path = os.path.join(tempfile.mkdtemp(), "export.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["matricule", "email"])
+        for i in range(50_000):
+            writer.writerow([f"EMP{i:06}", f"employee{i % 45_000}@techflow.com"])
+        writer.writerow(["EMP999999", "pas-un-email"])
+
+    stream = RecipientStream.from_csv(
+        path, "email", column="email", progress_every=20_000,
+        on_progress=lambda s: print(f"⏳ {s['read']:>6} lus, {s['valid']:>6} valides, "
+                                    f"{s['duplicates']:>5} doublons, {s['invalid']} invalides")
+    )
+    service = NotificationService()
+    result = service.send_bulk(stream, "Newsletter", "email", max_workers=16,
+                               collect_results=False)
+    print(f"📨 {result['success']} envoyés, {result['failed']} échecs")
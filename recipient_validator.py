@@ -0,0 +1,147 @@
+"""
+RecipientValidator - Validation et normalisation des destinataires.
+
+Une seule source de vérité pour les règles dispersées dans le code :
+contrôle du message (vide, 5000 caractères max), format email, numéros
+E.164 (SMS/WhatsApp, avec le préfixe +33 par défaut du code legacy),
+canaux Slack/Teams et jetons push.
+
+Les expressions régulières sont compilées une fois par canal, et les
+destinataires normalisés sont mémorisés dans un cache LRU : un envoi en
+masse qui revoit la même adresse ne la ré-analyse pas.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from notifier_interface import channel_key
+
+MAX_MESSAGE_LENGTH = 5000
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+'-]+@[A-Za-z0-9-]+(\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+E164_RE = re.compile(r"\+[1-9]\d{7,14}")
+PHONE_SEPARATORS_RE = re.compile(r"[\s.\-()/]")
+CHAT_CHANNEL_RE = re.compile(r"[#@][\w.\-]{1,80}|[CGUW][A-Z0-9]{8,}")
+PUSH_TOKEN_RE = re.compile(r"[\w:.\-]{8,4096}")
+
+
+def _normalize_email(recipient: str) -> Optional[str]:
+    recipient = recipient.strip()
+    if not EMAIL_RE.fullmatch(recipient):
+        return None
+    local, domain = recipient.rsplit("@", 1)
+    return f"{local}@{domain.lower()}"
+
+
+def _phone_normalizer(default_country_code: str) -> Callable[[str], Optional[str]]:
+    def normalize(recipient: str) -> Optional[str]:
+        number = PHONE_SEPARATORS_RE.sub("", recipient)
+        if number.startswith("00"):
+            number = "+" + number[2:]
+        elif not number.startswith("+"):
+            number = default_country_code + number.lstrip("0")
+        return number if E164_RE.fullmatch(number) else None
+    return normalize
+
+
+def _normalize_chat(recipient: str) -> Optional[str]:
+    recipient = recipient.strip()
+    return recipient if CHAT_CHANNEL_RE.fullmatch(recipient) else None
+
+
+def _normalize_push(recipient: str) -> Optional[str]:
+    recipient = recipient.strip()
+    return recipient if PUSH_TOKEN_RE.fullmatch(recipient) else None
+
+
+class RecipientValidator:
+    """
+    Moteur de validation par canal.
+
+    Args:
+        default_country_code: Préfixe ajouté aux numéros nationaux
+        cache_size: Taille du cache LRU des destinataires normalisés
+    """
+
+    def __init__(self, default_country_code: str = "+33", cache_size: int = 100_000):
+        self.rules: Dict[str, Callable[[str], Optional[str]]] = {
+            "email": _normalize_email,
+            "sms": _phone_normalizer(default_country_code),
+            "whatsapp": _phone_normalizer(default_country_code),
+            "slack": _normalize_chat,
+            "teams": _normalize_chat,
+            "push": _normalize_push,
+        }
+        self._normalize_cached = lru_cache(maxsize=cache_size)(self._normalize_uncached)
+
+    def register(self, channel, rule: Callable[[str], Optional[str]]):
+        """Ajoute une règle : rule(recipient) -> forme normalisée ou None."""
+        self.rules[channel_key(channel)] = rule
+        self._normalize_cached.cache_clear()
+
+    def _normalize_uncached(self, channel: str, recipient: str) -> Optional[str]:
+        rule = self.rules.get(channel)
+        if rule is None:
+            # Canal sans règle (console...) : seul le vide est refusé
+            return recipient.strip() or None
+        return rule(recipient)
+
+    def normalize(self, channel, recipient) -> Optional[str]:
+        """Forme normalisée du destinataire, None s'il est invalide."""
+        if not recipient or not isinstance(recipient, str):
+            return None
+        return self._normalize_cached(channel_key(channel), recipient)
+
+    @staticmethod
+    def check_message(message) -> Optional[str]:
+        """Raison du refus du message, None s'il est valide."""
+        if not message or not message.strip():
+            return "Message manquant"
+        if len(message) > MAX_MESSAGE_LENGTH:
+            return f"Message trop long (max {MAX_MESSAGE_LENGTH} caractères)"
+        return None
+
+    def validate(self, channel, recipient, message=None) -> Tuple[bool, str]:
+        """
+        Valide un envoi (même forme de retour que EmailNotifier.validate).
+
+        Le message n'est contrôlé que s'il est fourni.
+        """
+        if not recipient or not str(recipient).strip():
+            return False, "Destinataire manquant"
+        if message is not None:
+            reason = self.check_message(message)
+            if reason:
+                return False, reason
+        if self.normalize(channel, recipient) is None:
+            return False, f"Format invalide pour {channel_key(channel)}: '{recipient}'"
+        return True, ""
+
+    def validate_many(self, channel, recipients: Iterable[str]
+                      ) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """
+        Valide une liste complète en une passe.
+
+        Returns:
+            (destinataires normalisés valides, [(destinataire, raison), ...])
+        """
+        channel = channel_key(channel)
+        normalize = self._normalize_cached
+        valid: List[str] = []
+        rejected: List[Tuple[str, str]] = []
+        append_valid = valid.append
+        for recipient in recipients:
+            normalized = normalize(channel, recipient) if recipient and isinstance(recipient, str) else None
+            if normalized is None:
+                rejected.append((recipient, f"Format invalide pour {channel}"))
+            else:
+                append_valid(normalized)
+        return valid, rejected
+
+    def cache_info(self):
+        return self._normalize_cached.cache_info()
+
+
+# Instance partagée par les notifiers et le service legacy
+VALIDATOR = RecipientValidator()
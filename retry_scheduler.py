@@ -0,0 +1,155 @@
+"""
+RetryScheduler - Relance non bloquante des envois échoués.
+
+Les relances en attente sont de simples entrées dans un tas trié par
+échéance : un seul thread "timer" dort jusqu'à la prochaine échéance et
+confie les relances dues à un petit pool de workers. Aucun thread n'est
+bloqué par relance en attente.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from event_sink import ERROR, INFO, WARNING, emit
+
+
+class RetryPolicy:
+    """
+    Backoff exponentiel avec jitter.
+
+    délai(n) = min(max_delay, base_delay * multiplier ** (n - 1)),
+    dont une fraction `jitter` est tirée au hasard pour désynchroniser
+    les relances (évite que tout reparte au même instant après une panne).
+    """
+
+    def __init__(self, base_delay: float = 0.5, multiplier: float = 2.0,
+                 max_delay: float = 60.0, jitter: float = 0.5):
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter doit être entre 0 et 1")
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        """Délai avant la relance numéro attempt (à partir de 1)."""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+
+class _RetryTask:
+    __slots__ = ("func", "attempt", "max_retries", "on_give_up")
+
+    def __init__(self, func, attempt, max_retries, on_give_up):
+        self.func = func
+        self.attempt = attempt
+        self.max_retries = max_retries
+        self.on_give_up = on_give_up
+
+
+class RetryScheduler:
+    """
+    File de relances à échéance (tas + un thread timer).
+
+    La fonction relancée ne prend pas d'argument et retourne un booléen
+    de succès (une exception compte comme un échec).
+    """
+
+    def __init__(self, policy: Optional[RetryPolicy] = None, max_workers: int = 4):
+        self.policy = policy or RetryPolicy()
+        self.stats = {"scheduled": 0, "succeeded": 0, "given_up": 0}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retry")
+        self._timer = threading.Thread(target=self._run, name="retry-timer", daemon=True)
+        self._timer.start()
+
+    def schedule(self, func: Callable[[], bool], attempt: int = 1, max_retries: int = 3,
+                 on_give_up: Optional[Callable[[], None]] = None):
+        """
+        Planifie la relance numéro attempt de func.
+
+        Args:
+            func: Envoi à relancer
+            attempt: Numéro de la relance (détermine le délai)
+            max_retries: Nombre maximum de relances
+            on_give_up: Appelé si toutes les relances échouent
+        """
+        if attempt > max_retries:
+            return
+        due = time.monotonic() + self.policy.delay(attempt)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("RetryScheduler fermé")
+            heapq.heappush(self._heap, (due, next(self._seq),
+                                        _RetryTask(func, attempt, max_retries, on_give_up)))
+            self.stats["scheduled"] += 1
+            self._cond.notify()
+
+    def pending(self) -> int:
+        """Nombre de relances en attente d'échéance."""
+        with self._cond:
+            return len(self._heap)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._cond.wait(wait)
+                if self._closed:
+                    return
+                now = time.monotonic()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[2])
+            for task in due:
+                self._executor.submit(self._attempt, task)
+
+    def _attempt(self, task: _RetryTask):
+        try:
+            ok = bool(task.func())
+        except Exception as e:
+            emit(WARNING, "retry.error", attempt=task.attempt, error=str(e))
+            ok = False
+
+        if ok:
+            self.stats["succeeded"] += 1
+            emit(INFO, "retry.succeeded", attempt=task.attempt)
+        elif task.attempt < task.max_retries:
+            self.schedule(task.func, task.attempt + 1, task.max_retries, task.on_give_up)
+        else:
+            self.stats["given_up"] += 1
+            emit(ERROR, "retry.given_up", attempts=task.attempt)
+            if task.on_give_up is not None:
+                task.on_give_up()
+
+    def close(self, wait: bool = True):
+        """Arrête le timer ; les relances non échues sont abandonnées."""
+        with self._cond:
+            self._closed = True
+            dropped = len(self._heap)
+            self._heap.clear()
+            self._cond.notify()
+        self._timer.join()
+        self._executor.shutdown(wait=wait)
+        if dropped:
+            emit(WARNING, "retry.dropped", count=dropped)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,251 @@
+"""
+SMTPConnectionPool - Pool de connexions SMTP persistantes.
+
+Évite de payer connexion + STARTTLS + AUTH à chaque email : les sessions
+sont gardées ouvertes (keep-alive), vérifiées par NOOP avant réutilisation
+et recréées automatiquement si le serveur les a fermées.
+"""
+
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Optional
+
+
+# Erreurs SMTP qui signifient "la session est morte, il faut en rouvrir une".
+# SMTPException hérite d'OSError : les refus du serveur (SMTPRecipientsRefused,
+# SMTPDataError...) ne doivent pas être pris pour des déconnexions.
+SMTP_DISCONNECTS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """True si l'erreur invalide la session (déconnexion, erreur socket ou TLS)."""
+    if isinstance(exc, smtplib.SMTPException):
+        return isinstance(exc, SMTP_DISCONNECTS)
+    return isinstance(exc, OSError)
+
+
+class SMTPPoolTimeout(Exception):
+    """Aucune connexion disponible dans le délai imparti."""
+
+
+class SMTPConnectionPool:
+    """
+    Pool thread-safe de connexions SMTP.
+
+    Args:
+        host, port: Serveur SMTP (voir NotificationConfig.get_email_config)
+        user, password: Identifiants AUTH (optionnels)
+        use_tls: Active STARTTLS après EHLO
+        pool_size: Nombre maximum de connexions ouvertes
+        idle_timeout: Une connexion inutilisée plus longtemps est fermée
+        health_check_interval: Au-delà de ce délai d'inactivité, un NOOP
+            vérifie la connexion avant de la réutiliser
+        connection_factory: Fabrique de connexions (par défaut smtplib.SMTP),
+            injectable pour les tests
+    """
+
+    def __init__(self, host: str, port: int, user: Optional[str] = None,
+                 password: Optional[str] = None, use_tls: bool = False,
+                 pool_size: int = 4, idle_timeout: float = 60.0,
+                 health_check_interval: float = 5.0, timeout: float = 10.0,
+                 connection_factory: Optional[Callable] = None):
+        if pool_size < 1:
+            raise ValueError("pool_size doit être >= 1")
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self.connection_factory = connection_factory or smtplib.SMTP
+
+        self._idle = deque()  # (connexion, dernière utilisation)
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    @classmethod
+    def from_config(cls, config, **kwargs) -> "SMTPConnectionPool":
+        """Construit le pool depuis NotificationConfig."""
+        options = config.get_email_pool_config()
+        options.update(kwargs)
+        return cls(**options)
+
+    # ------------------------------------------------------------------
+    # Cycle de vie d'une connexion
+    # ------------------------------------------------------------------
+
+    def _connect(self):
+        conn = self.connection_factory(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.ehlo()
+            if self.use_tls:
+                conn.starttls()
+                conn.ehlo()
+            if self.user and self.password:
+                conn.login(self.user, self.password)
+        except Exception:
+            self._quit(conn)
+            raise
+        self.stats["created"] += 1
+        return conn
+
+    @staticmethod
+    def _quit(conn):
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, conn) -> bool:
+        try:
+            return conn.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        self._quit(conn)
+        with self._cond:
+            self._open -= 1
+            self.stats["discarded"] += 1
+            self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Emprunte une connexion (à rendre avec release()).
+
+        Raises:
+            SMTPPoolTimeout: Si le pool est saturé au-delà de timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Pool SMTP fermé")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                elif self._open < self.pool_size:
+                    self._open += 1
+                    conn = None
+                else:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise SMTPPoolTimeout(
+                            f"Aucune connexion SMTP libre après {timeout}s"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_timeout:
+                self._discard(conn)
+                continue
+            if idle_for > self.health_check_interval and not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+            self.stats["reused"] += 1
+            return conn
+
+    def release(self, conn, broken: bool = False):
+        """Rend une connexion au pool (ou la ferme si elle est cassée)."""
+        if broken or self._closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager : with pool.connection() as conn: ..."""
+        conn = self.acquire(timeout)
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            broken = is_connection_error(e)
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+    # ------------------------------------------------------------------
+    # Envoi
+    # ------------------------------------------------------------------
+
+    def send_message(self, msg, retries: int = 1):
+        """
+        Envoie un message, en se reconnectant si la session est morte.
+        Un refus du serveur (SMTPException) est levé tel quel, sans relance.
+        """
+        for attempt in range(retries + 1):
+            try:
+                with self.connection() as conn:
+                    return conn.send_message(msg)
+            except Exception as e:
+                if not is_connection_error(e) or attempt == retries:
+                    raise
+
+    def send_messages(self, messages: Iterable, retries: int = 1) -> List[bool]:
+        """
+        Envoie un lot de messages sur une même connexion.
+        Une déconnexion en cours de lot ouvre une nouvelle session et
+        reprend au message interrompu.
+        """
+        pending = list(messages)
+        results = []
+        attempts = 0
+        while len(results) < len(pending):
+            try:
+                with self.connection() as conn:
+                    for msg in pending[len(results):]:
+                        try:
+                            conn.send_message(msg)
+                            results.append(True)
+                        except smtplib.SMTPException as e:
+                            if is_connection_error(e):
+                                raise
+                            # Refus du destinataire ou du contenu : la session reste valide
+                            results.append(False)
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+                attempts += 1
+                if attempts > retries:
+                    results.extend([False] * (len(pending) - len(results)))
+        return results
+
+    def close(self):
+        """Ferme toutes les connexions inactives ; les autres à leur retour."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._quit(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
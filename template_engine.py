@@ -0,0 +1,149 @@
+"""
+TemplateEngine - Gabarits de messages précompilés, avec cache de rendu.
+
+Les préfixes de priorité, bandeaux d'urgence et messages du workflow
+étaient reconstruits par des f-strings à chaque appel. Ici, chaque gabarit
+est analysé une seule fois en une suite de (texte, champ), indexé par
+canal × priorité × locale. Les rendus identiques sont servis depuis un
+cache LRU, et bind() pré-rend la partie commune d'une campagne pour ne
+substituer que les champs propres à chaque destinataire.
+"""
+
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, Mapping, Optional, Tuple
+
+DEFAULT_LOCALE = "fr"
+DEFAULT_PRIORITY = "normal"
+
+
+class CompiledTemplate:
+    """Gabarit analysé : alternance de littéraux et de noms de champs."""
+
+    __slots__ = ("source", "_parts", "fields")
+
+    def __init__(self, source: str, parts=None):
+        self.source = source
+        if parts is None:
+            parts = []
+            for literal, field, spec, conversion in Formatter().parse(source):
+                if spec or conversion:
+                    raise ValueError(f"Format non supporté dans le gabarit: '{source}'")
+                if literal:
+                    parts.append((False, literal))
+                if field is not None:
+                    if not field.isidentifier():
+                        raise ValueError(f"Champ invalide '{field}' dans: '{source}'")
+                    parts.append((True, field))
+        self._parts: Tuple[Tuple[bool, str], ...] = tuple(parts)
+        self.fields = frozenset(text for is_field, text in self._parts if is_field)
+
+    def render(self, values: Mapping[str, object]) -> str:
+        """Substitue les champs (KeyError si un champ manque)."""
+        return "".join([str(values[text]) if is_field else text
+                        for is_field, text in self._parts])
+
+    def bind(self, **values) -> "CompiledTemplate":
+        """
+        Pré-rend les champs fournis et retourne le gabarit restant,
+        à compléter ensuite par destinataire.
+        """
+        merged = []
+        for is_field, text in self._parts:
+            if is_field and text in values:
+                is_field, text = False, str(values[text])
+            if not is_field and merged and not merged[-1][0]:
+                merged[-1] = (False, merged[-1][1] + text)
+            else:
+                merged.append((is_field, text))
+        return CompiledTemplate(self.source, merged)
+
+    def __repr__(self):
+        return f"CompiledTemplate({self.source!r})"
+
+
+class TemplateEngine:
+    """
+    Registre de gabarits indexé par (canal, priorité, locale).
+
+    Repli : priorité demandée puis 'normal', locale demandée puis locale
+    par défaut.
+    """
+
+    def __init__(self, default_locale: str = DEFAULT_LOCALE, cache_size: int = 10_000):
+        self.default_locale = default_locale
+        self._templates: Dict[Tuple[str, str, str], CompiledTemplate] = {}
+        self._render_cached = lru_cache(maxsize=cache_size)(self._render_uncached)
+
+    def register(self, channel: str, source: str, priority: str = DEFAULT_PRIORITY,
+                 locale: Optional[str] = None):
+        self._templates[(channel, priority, locale or self.default_locale)] = CompiledTemplate(source)
+        self._render_cached.cache_clear()
+
+    def get(self, channel: str, priority: str = DEFAULT_PRIORITY,
+            locale: Optional[str] = None) -> CompiledTemplate:
+        """Gabarit compilé, avec repli sur la priorité/locale par défaut."""
+        locale = locale or self.default_locale
+        for key in ((channel, priority, locale),
+                    (channel, DEFAULT_PRIORITY, locale),
+                    (channel, priority, self.default_locale),
+                    (channel, DEFAULT_PRIORITY, self.default_locale)):
+            template = self._templates.get(key)
+            if template is not None:
+                return template
+        raise KeyError(f"Aucun gabarit pour {channel}/{priority}/{locale}")
+
+    def _render_uncached(self, channel, priority, locale, items) -> str:
+        return self.get(channel, priority, locale).render(dict(items))
+
+    def render(self, channel: str, priority: str = DEFAULT_PRIORITY,
+               locale: Optional[str] = None, **values) -> str:
+        """Rend un gabarit ; les rendus aux valeurs identiques sont mis en cache."""
+        try:
+            return self._render_cached(channel, priority, locale,
+                                       tuple(sorted(values.items())))
+        except TypeError:
+            # Valeur non hachable : rendu direct, sans cache
+            return self.get(channel, priority, locale).render(values)
+
+    def cache_info(self):
+        return self._render_cached.cache_info()
+
+
+def _default_engine() -> TemplateEngine:
+    engine = TemplateEngine()
+    # EmailNotifier : sujet selon la priorité
+    engine.register("email.subject", "{subject}")
+    engine.register("email.subject", "🚨 URGENT: {subject}", "urgent")
+    engine.register("email.subject", "⚠️ IMPORTANT: {subject}", "high")
+    engine.register("email.subject", "📎 NOTE: {subject}", "low")
+    # NotificationService (legacy)
+    engine.register("legacy.email.subject", "{subject}")
+    engine.register("legacy.email.subject", "[URGENT] {subject}", "urgent")
+    engine.register("legacy.email.subject", "[IMPORTANT] {subject}", "high")
+    engine.register("sms", "{message}")
+    engine.register("sms", "🚨 URGENT: {message}", "urgent")
+    engine.register("whatsapp", "{message}")
+    engine.register("whatsapp", "🚨 {message}", "urgent")
+    engine.register("slack", "{message}")
+    engine.register("slack", "🚨 *URGENT* 🚨\n{message}", "urgent")
+    engine.register("slack", "⚠️ *Important*\n{message}", "high")
+    engine.register("teams", "{message}")
+    engine.register("teams", "🚨 **URGENT** 🚨\n\n{message}", "urgent")
+    engine.register("teams", "⚠️ **Important**\n\n{message}", "high")
+    # Workflow des congés (LeaveRequest._notify)
+    engine.register("leave.submitted", "Nouvelle demande de congés de l'employé {employee_id}")
+    engine.register("leave.manager_approved",
+                    "Demande {request_id} approuvée par manager, en attente RH")
+    engine.register("leave.manager_rejected", "Votre demande de congés a été refusée: {comment}")
+    engine.register("leave.approved",
+                    "Votre demande de congés du {start_date} au {end_date} est approuvée !")
+    engine.register("leave.hr_rejected",
+                    "Votre demande de congés a été refusée par les RH: {comment}")
+    engine.register("leave.cancelled", "Demande de congés {request_id} annulée")
+    engine.register("leave.bulk", "{count} demande(s) de congés passée(s) en {status}")
+    return engine
+
+
+# Moteur partagé, pré-rempli avec les gabarits existants
+TEMPLATES = _default_engine()
@@ -0,0 +1,517 @@
+from recipient_validator import MAX_MESSAGE_LENGTH, RecipientValidator
+
+
+def test_validator_channel_rules():
+    print("=== Test règles par canal ===")
+    validator = RecipientValidator()
+
+    assert validator.normalize("email", " Marie.Dupont@TechFlow.COM ") == "Marie.Dupont@techflow.com"
+    assert validator.normalize("email", "not-an-email") is None
+    assert validator.normalize("email", "a@b") is None
+    assert validator.normalize("sms", "06 12 34 56 78") == "+33612345678"
+    assert validator.normalize("sms", "0033612345678") == "+33612345678"
+    assert validator.normalize("whatsapp", "+44 20 7946 0958") == "+442079460958"
+    assert validator.normalize("sms", "12") is None
+    assert validator.normalize("slack", "#rh-notifications") == "#rh-notifications"
+    assert validator.normalize("slack", "rh notifications") is None
+    assert validator.normalize("push", "user_token_abc123") == "user_token_abc123"
+    assert validator.normalize("push", "abc") is None
+    assert validator.normalize("console", "anything") == "anything"
+    assert validator.normalize("email", "") is None
+
+
+def test_validator_messages_and_validate():
+    print("\n=== Test validate ===")
+    validator = RecipientValidator()
+
+    assert validator.validate("email", "rh@techflow.com", "Bonjour") == (True, "")
+    assert validator.validate("email", "", "Bonjour")[0] is False
+    assert validator.validate("email", "rh@techflow.com", "   ")[1] == "Message manquant"
+    assert "trop long" in validator.validate("sms", "0612345678", "x" * (MAX_MESSAGE_LENGTH + 1))[1]
+
+
+def test_validate_many_and_cache():
+    print("\n=== Test validate_many + cache LRU ===")
+    validator = RecipientValidator(cache_size=100)
+    recipients = ["0612345678", "+33612345678", "bad", None, "07-00-00-00-00"] * 1000
+
+    valid, rejected = validator.validate_many("sms", recipients)
+
+    assert len(valid) == 3000
+    assert set(valid) == {"+33612345678", "+33700000000"}
+    assert len(rejected) == 2000
+    info = validator.cache_info()
+    assert info.misses == 4
+    assert info.hits == 4 * 999
+
+
+def test_notifiers_share_validator():
+    print("\n=== Test intégration validation ===")
+    from email_notifier import EmailNotifier
+    from notification_legacy import NotificationService
+
+    notifier = EmailNotifier()
+    assert notifier.validate("user@example.com", "Hello")[0]
+    assert not notifier.validate("user@", "Hello")[0]
+
+    service = NotificationService()
+    assert service.send_notification("0612345678", "Code: 1234", "sms")
+    assert not service.send_notification("pas-un-numero", "Code: 1234", "sms")
+    assert service.send_notification("612345678", "Hi", "whatsapp")
+
+
+def test_template_compile_bind_and_cache():
+    print("\n=== Test TemplateEngine ===")
+    import pytest
+    from template_engine import CompiledTemplate, TemplateEngine
+
+    template = CompiledTemplate("Bonjour {name}, {{code}}: {code} ({campaign})")
+    assert template.fields == {"name", "code", "campaign"}
+    shared = template.bind(campaign="Noël 2024")
+    assert shared.fields == {"name", "code"}
+    assert shared.render({"name": "Marie", "code": 42}) == "Bonjour Marie, {code}: 42 (Noël 2024)"
+    with pytest.raises(KeyError):
+        shared.render({"name": "Marie"})
+    with pytest.raises(ValueError):
+        CompiledTemplate("{value:>10}")
+
+    engine = TemplateEngine()
+    engine.register("sms", "{message}")
+    engine.register("sms", "URGENT {message}", "urgent")
+    engine.register("sms", "EMERGENCY {message}", "urgent", "en")
+    assert engine.render("sms", "urgent", "en", message="x") == "EMERGENCY x"
+    assert engine.render("sms", "urgent", "de", message="x") == "URGENT x"
+    assert engine.render("sms", "low", message="x") == "x"
+    for _ in range(100):
+        engine.render("sms", "urgent", message="Serveur HS")
+    assert engine.cache_info().hits >= 99
+
+
+def test_default_templates_match_legacy_formats():
+    print("\n=== Test gabarits par défaut ===")
+    from email_notifier import EmailNotifier
+    from template_engine import TEMPLATES
+
+    assert TEMPLATES.render("slack", "urgent", message="Hi") == "🚨 *URGENT* 🚨\nHi"
+    assert TEMPLATES.render("teams", "high", message="Hi") == "⚠️ **Important**\n\nHi"
+    assert TEMPLATES.render("legacy.email.subject", "normal", subject="Hi") == "Hi"
+    assert EmailNotifier()._format_subject("Alerte", "urgent") == "🚨 URGENT: Alerte"
+    # Pas de gabarit "en" dédié : repli sur la locale par défaut
+    assert TEMPLATES.render("email.subject", "high", "en", subject="Hi") == "⚠️ IMPORTANT: Hi"
+
+
+def test_fan_out_modes_and_timeouts():
+    print("\n=== Test FanOut ===")
+    import time
+    import pytest
+    from fan_out import FanOut
+
+    def provider(latency, ok=True):
+        def send():
+            time.sleep(latency)
+            if ok is None:
+                raise RuntimeError("fournisseur HS")
+            return ok
+        return send
+
+    tasks = {"email": provider(0.2), "sms": provider(0.05), "push": provider(0.1, None)}
+    with FanOut() as fan_out:
+        start = time.perf_counter()
+        assert fan_out.run(tasks) == {"email": True, "sms": True, "push": False}
+        assert time.perf_counter() - start < 0.3  # le plus lent, pas la somme
+
+        start = time.perf_counter()
+        assert fan_out.run(tasks, mode="first_success") == {"email": False, "sms": True, "push": False}
+        assert time.perf_counter() - start < 0.15
+
+        assert fan_out.run(tasks, timeouts={"email": 0.08})["email"] is False
+        assert fan_out.run(tasks, mode="quorum", quorum=2, timeout=1)["email"] is True
+        with pytest.raises(ValueError):
+            fan_out.run(tasks, mode="any")
+
+
+def test_send_multi_channel_parallel():
+    print("\n=== Test send_multi_channel parallèle ===")
+    from notification_legacy import NotificationService
+
+    service = NotificationService()
+    channels = ["email", "sms", "slack"]
+    sequential = service.send_multi_channel("0612345678", "Alerte", channels, "urgent")
+    parallel = service.send_multi_channel("0612345678", "Alerte", channels, "urgent",
+                                          parallel=True)
+    assert parallel == sequential
+    assert list(parallel) == channels
+    service.fan_out.close()
+
+
+def test_priority_scheduler_weighted_fair_order():
+    print("\n=== Test PriorityScheduler ===")
+    from priority_scheduler import PriorityScheduler
+
+    order = []
+    scheduler = PriorityScheduler(lambda r, m, c, p: order.append(p) or True, workers=1)
+    low = scheduler.submit_many((f"u{i}@techflow.com" for i in range(30)), "News", "email", "low")
+    normal = scheduler.submit_many((f"u{i}@techflow.com" for i in range(30)), "Info", "email")
+    urgent = scheduler.submit("0612345678", "Code 847291", "sms", "urgent")
+    assert scheduler.pending() == {"urgent": 1, "high": 0, "normal": 1, "low": 1}
+
+    scheduler.start()
+    assert urgent.result(timeout=5) is True
+    assert low.result(timeout=5) == {"success": 30, "failed": 0}
+    assert normal.result(timeout=5) == {"success": 30, "failed": 0}
+    scheduler.stop()
+
+    assert order[0] == "urgent"
+    # Poids normal=2, low=1 : le lot "low" avance aussi, sans être affamé
+    first = order[1:31]
+    assert first.count("normal") == 20 and first.count("low") == 10
+
+
+def test_priority_scheduler_reads_recipients_outside_global_lock():
+    print("\n=== Test PriorityScheduler source lente ===")
+    import threading
+    import time
+    from priority_scheduler import PriorityScheduler
+
+    release = threading.Event()
+
+    def slow_source():
+        release.wait(5)  # curseur de base de données bloqué
+        yield "u1@techflow.com"
+
+    with PriorityScheduler(lambda r, m, c, p: True, workers=2) as scheduler:
+        newsletter = scheduler.submit_many(slow_source(), "News", "email", "low")
+        time.sleep(0.05)  # un worker attend la source
+        code = scheduler.submit("0612345678", "Code 847291", "sms", "urgent")
+        assert code.result(timeout=2) is True
+        assert not newsletter.done()
+        release.set()
+        assert newsletter.result(timeout=5) == {"success": 1, "failed": 0}
+
+
+def test_priority_scheduler_default_send_uses_factory(capsys):
+    print("\n=== Test PriorityScheduler via la factory ===")
+    from console_notifier import ConsoleNotifier
+    from notification_factory_complete import ChannelType, NotificationFactory
+    from priority_scheduler import PriorityScheduler
+
+    previous = NotificationFactory._registry.get(ChannelType.CONSOLE)
+    NotificationFactory.register(ChannelType.CONSOLE, ConsoleNotifier)
+    try:
+        with PriorityScheduler(workers=1) as scheduler:
+            assert scheduler.submit("admin", "Code 847291", "console", "urgent").result(timeout=5)
+            assert scheduler.submit_many(["a", "b"], "Info", "console", "low").result(
+                timeout=5) == {"success": 2, "failed": 0}
+    finally:
+        if previous is None:
+            NotificationFactory._registry.pop(ChannelType.CONSOLE, None)
+        else:
+            NotificationFactory._registry[ChannelType.CONSOLE] = previous
+    assert "Code 847291" in capsys.readouterr().out
+
+
+def test_priority_scheduler_passes_priority_to_notifier():
+    print("\n=== Test PriorityScheduler : priorité transmise au notifier ===")
+    from console_notifier import ConsoleNotifier
+    from metrics import DeliveryMetrics
+    from notification_factory_complete import ChannelType, NotificationFactory
+    from notifier_interface import INotifier
+    from priority_scheduler import PriorityScheduler
+
+    class OptionsNotifier(INotifier):
+        def get_channel_name(self):
+            return "email"
+
+        def send(self, recipient, message, **kwargs):
+            priorities.append(kwargs.get("priority"))
+            return True
+
+    priorities = []
+    previous = dict(NotificationFactory._registry)
+    NotificationFactory.register(ChannelType.EMAIL, OptionsNotifier)
+    NotificationFactory.register(ChannelType.CONSOLE, ConsoleNotifier)
+    NotificationFactory.set_metrics(DeliveryMetrics())  # couche autour des notifiers
+    try:
+        with PriorityScheduler(workers=1) as scheduler:
+            assert scheduler.submit("a@b.fr", "Incident", "email", "urgent").result(timeout=5)
+            # ConsoleNotifier.send ne prend pas d'options : appel INotifier habituel
+            assert scheduler.submit("admin", "Incident", "console", "urgent").result(timeout=5)
+    finally:
+        NotificationFactory.set_metrics(None)
+        NotificationFactory._registry.clear()
+        NotificationFactory._registry.update(previous)
+    assert priorities == ["urgent"]
+
+
+def test_urgent_preempts_legacy_bulk():
+    print("\n=== Test urgent devant send_bulk ===")
+    import threading
+    import time
+    from notification_legacy import NotificationService
+
+    service = NotificationService(scheduler_workers=1)
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (service.send_bulk(
+        (f"employee{i}@techflow.com" for i in range(20_000)), "Newsletter", "email", "low"),
+        done.set()))
+    thread.start()
+    time.sleep(0.01)
+    assert service.enqueue("0612345678", "Code 847291", "sms", "urgent").result(timeout=5)
+    assert not done.is_set()
+    thread.join()
+    service.close()
+    assert service.get_stats()["total_sent"] == 20_001
+
+
+def test_deduplicator_window_and_bound():
+    print("\n=== Test Deduplicator ===")
+    import time
+    from dedup import Deduplicator, TTLSet
+
+    dedup = Deduplicator(window=0.05)
+    recipients = ["a@techflow.com", "b@techflow.com", "a@techflow.com"]
+    assert list(dedup.filter("email", recipients, "News")) == ["a@techflow.com", "b@techflow.com"]
+    assert list(dedup.filter("email", recipients, "News")) == []
+    assert dedup.claim("sms", "a@techflow.com", "News")  # autre canal
+    assert dedup.claim("email", "a@techflow.com", "Autre")  # autre contenu
+    dedup.release("email", "b@techflow.com", "News")
+    assert not dedup.is_duplicate("email", "b@techflow.com", "News")
+    time.sleep(0.06)
+    assert dedup.claim("email", "a@techflow.com", "News")  # fenêtre expirée
+
+    keys = TTLSet(ttl=60, max_entries=100)
+    for i in range(1_000):
+        keys.add(i.to_bytes(4, "big"))
+    assert len(keys) == 100 and keys.evicted == 900
+    assert (999).to_bytes(4, "big") in keys
+
+
+def test_legacy_dedup_and_coalescer():
+    print("\n=== Test dédoublonnage legacy et Coalescer ===")
+    from dedup import Coalescer
+    from notification_legacy import NotificationService
+
+    service = NotificationService(dedup_window=60)
+    recipients = [f"employee{i}@techflow.com" for i in range(50)]
+    assert service.send_bulk(recipients, "Newsletter", "email")["success"] == 50
+    assert service.send_bulk(recipients, "Newsletter", "email")["success"] == 50
+    assert service.get_stats()["total_sent"] == 50  # pas de second appel fournisseur
+    assert not service.send_notification("0612", "Code", "sms")  # échec non mémorisé
+    assert service.dedup.claim("sms", "0612", "Code")
+
+    sent = []
+    coalescer = Coalescer(lambda r, m, c: sent.append((r, m)) or True, window=60)
+    for i in range(3):
+        coalescer.add("email", "manager@techflow.com", f"Demande {i}")
+    coalescer.add("email", "rh@techflow.com", "Demande 0")
+    assert sent == [] and coalescer.pending() == 4
+    assert coalescer.flush() == 2
+    assert sent[0] == ("manager@techflow.com",
+                       "Vous avez 3 notifications :\n- Demande 0\n- Demande 1\n- Demande 2")
+    assert sent[1] == ("rh@techflow.com", "Demande 0")
+    coalescer.close()
+
+
+def test_coalescer_flushes_on_its_own():
+    print("\n=== Test Coalescer (envoi à échéance) ===")
+    import threading
+    from dedup import Coalescer
+
+    delivered = threading.Event()
+    sent = []
+
+    def send(recipient, message, channel):
+        sent.append(message)
+        delivered.set()
+        return True
+
+    coalescer = Coalescer(send, window=0.05)
+    coalescer.add("email", "manager@techflow.com", "Demande 1")
+    coalescer.add("email", "manager@techflow.com", "Demande 2")
+    # Aucun ajout ni flush ensuite : le thread envoie à l'échéance
+    assert delivered.wait(timeout=2)
+    assert sent == ["Vous avez 2 notifications :\n- Demande 1\n- Demande 2"]
+
+    coalescer.add("email", "rh@techflow.com", "Demande 3")
+    coalescer.close()  # envoie le reste sans attendre l'échéance
+    assert sent[-1] == "Demande 3" and coalescer.pending() == 0
+
+
+def test_notification_record_and_batch():
+    print("\n=== Test NotificationRecord / NotificationBatch ===")
+    from notification_record import (NotificationBatch, NotificationRecord, Priority,
+                                     ChannelType)
+
+    record = NotificationRecord("0612345678", "Code", "sms", "urgent")
+    assert record.channel is ChannelType.SMS and record.priority is Priority.URGENT
+    assert NotificationRecord("x", "y", ChannelType.EMAIL, "inconnue").priority is Priority.NORMAL
+    assert NotificationRecord.from_dict(record.to_dict()) == record
+    assert not hasattr(record, "__dict__")
+
+    batch = NotificationBatch()
+    batch.extend((f"employé{i}@techflow.com" for i in range(10_000)), "Newsletter", "email", "low")
+    batch.append("#rh", "Newsletter", ChannelType.SLACK)
+    assert len(batch) == 10_001
+    assert batch[3].recipient == "employé3@techflow.com"
+    assert batch[-1].channel is ChannelType.SLACK and batch[-1].priority is Priority.NORMAL
+    assert batch.message(0) is batch.message(10_000)  # message stocké une fois
+    assert batch.memory_bytes() / len(batch) < 60
+
+
+def test_bulk_sender_send_batch_resumes_pending():
+    print("\n=== Test BulkSender.send_batch ===")
+    from bulk_sender import BulkSender
+    from notification_record import NotificationBatch
+
+    calls = []
+
+    def fake_send(recipient, message, channel, priority):
+        calls.append((recipient, channel, priority))
+        return not recipient.startswith("bad")
+
+    batch = NotificationBatch()
+    batch.extend([f"u{i}@techflow.com" for i in range(100)] + ["bad@techflow.com"],
+                 "Info", "email", "high")
+    batch.mark(0, True)  # déjà envoyé lors d'une exécution précédente
+    with BulkSender(fake_send, max_workers=4) as sender:
+        assert sender.send_batch(batch) == {"success": 100, "failed": 1, "pending": 0}
+    assert len(calls) == 100
+    assert ("u1@techflow.com", "email", "high") in calls
+
+
+def test_recipient_stream_sources(tmp_path):
+    print("\n=== Test RecipientStream ===")
+    import json
+    from recipient_stream import RecipientStream
+
+    csv_path = tmp_path / "export.csv"
+    csv_path.write_text("matricule;email\nE1;a@techflow.com\nE2;a@TECHFLOW.com\n"
+                        "E3;pas-un-email\nE4;b@techflow.com\n", encoding="utf-8")
+    rejected = []
+    stream = RecipientStream.from_csv(str(csv_path), "email", column="email", delimiter=";",
+                                      on_reject=lambda r, reason: rejected.append(r))
+    assert list(stream) == ["a@techflow.com", "b@techflow.com"]
+    assert stream.stats["duplicates"] == 1 and rejected == ["pas-un-email"]
+
+    jsonl_path = tmp_path / "export.jsonl"
+    jsonl_path.write_text("\n".join([json.dumps({"phone": "06 12 34 56 78"}), "{cassé",
+                                     json.dumps({"phone": "+33612345678"})]), encoding="utf-8")
+    stream = RecipientStream.from_jsonl(str(jsonl_path), "sms", field="phone")
+    assert list(stream) == ["+33612345678"]
+    assert stream.stats == {**stream.stats, "read": 3, "valid": 1, "invalid": 1, "duplicates": 1}
+
+    text_path = tmp_path / "export.txt"
+    text_path.write_text("\n".join(f"u{i}@techflow.com" for i in range(2_500)) + "\n",
+                         encoding="utf-8")
+    progress = []
+    stream = RecipientStream.from_file(str(text_path), "email", progress_every=1_000,
+                                       on_progress=lambda s: progress.append(s["read"]))
+    assert [len(chunk) for chunk in stream.chunks(1_000)] == [1_000, 1_000, 500]
+    assert progress == [1_000, 2_000, 2_500]
+    (tmp_path / "vide.txt").write_text("")
+    assert list(RecipientStream.from_file(str(tmp_path / "vide.txt"), "email")) == []
+
+
+def test_send_bulk_consumes_stream_lazily():
+    print("\n=== Test send_bulk en flux ===")
+    from notification_legacy import NotificationService
+    from recipient_stream import RecipientStream
+
+    pulled = []
+
+    def source():
+        for i in range(5_000):
+            pulled.append(i)
+            yield f"employee{i}@techflow.com"
+
+    service = NotificationService()
+    stream = RecipientStream(source(), "email", dedup_capacity=100)
+    first = next(iter(stream))
+    assert first == "employee0@techflow.com" and len(pulled) == 1
+    result = service.send_bulk(RecipientStream(source(), "email"), "Info", "email",
+                               max_workers=4, collect_results=False)
+    assert result == {"success": 5_000, "failed": 0}
+
+
+def test_bulk_job_resumes_from_checkpoint(tmp_path):
+    print("\n=== Test BulkJob ===")
+    import pytest
+    from bulk_job import BulkJob, FileCheckpointStore, SQLiteCheckpointStore
+
+    def export(crash_after=None):
+        for i in range(2_000):
+            if i == crash_after:
+                raise IOError("export interrompu")
+            yield f"employee{i}@techflow.com"
+
+    for store in (SQLiteCheckpointStore(str(tmp_path / "jobs.db")),
+                  FileCheckpointStore(str(tmp_path / "jobs"))):
+        sent = []
+
+        def send(recipient, message, channel, priority):
+            sent.append(recipient)
+            return not recipient.startswith("employee7")
+
+        job = BulkJob("campagne", send, store, max_workers=4, checkpoint_every=100)
+        with pytest.raises(IOError):
+            job.run(export(crash_after=1_200), "News", "email")
+        assert store.load("campagne").offset == 1_200
+
+        result = BulkJob("campagne", send, store, max_workers=4).run(export(), "News", "email")
+        assert result["resumed"] and result["skipped"] == 1_200
+        assert len(sent) == 2_000 and len(set(sent)) == 2_000
+        assert result["failed"] == 111 and result["success"] == 1_889
+        checkpoint = store.load("campagne")
+        assert checkpoint.finished
+        # Fenêtre vide sous offset : seuls les échecs (employee7*) restent, en plages
+        assert checkpoint.base == 2_000 and not checkpoint.done
+        assert checkpoint.failures == [[7, 8], [70, 80], [700, 800]]
+
+        result = BulkJob("campagne", send, store).run(export(), "News", "email",
+                                                      retry_failed=True)
+        assert len(sent) == 2_111 and result["failed"] == 111
+        assert not store.load("campagne").is_ok(75) and store.load("campagne").is_ok(69)
+        with pytest.raises(ValueError):
+            BulkJob("campagne", send, store).run(export(), "Autre message", "email")
+        store.close()
+
+
+def test_checkpoint_window_and_failure_runs(tmp_path, monkeypatch):
+    print("\n=== Test Checkpoint compact ===")
+    import sqlite3
+    import pytest
+    from bulk_job import BulkJob, Checkpoint
+
+    checkpoint = Checkpoint("j", "f")
+    for index in reversed(range(20)):  # fins d'envoi dans le désordre
+        checkpoint.mark(index, index not in (3, 4, 17))
+    checkpoint.compact()
+    assert checkpoint.offset == 20 and checkpoint.base == 16
+    assert checkpoint.failures == [[3, 5]] and len(checkpoint.done) == 1
+    assert (checkpoint.success, checkpoint.failed) == (17, 3)
+    checkpoint.mark(3, True)  # renvoi réussi (retry_failed)
+    assert checkpoint.failures == [[4, 5]] and checkpoint.is_ok(3) and not checkpoint.is_ok(4)
+    assert (checkpoint.success, checkpoint.failed) == (18, 2)
+
+    # Store par défaut : créé et fermé par le job
+    monkeypatch.chdir(tmp_path)
+    with BulkJob("j", lambda *args: True) as job:
+        job.run(["a@techflow.com"], "Info", "email")
+    with pytest.raises(sqlite3.ProgrammingError):
+        job.store.load("j")
+
+
+def test_legacy_send_bulk_with_job_id(tmp_path):
+    print("\n=== Test send_bulk avec job_id ===")
+    from bulk_job import SQLiteCheckpointStore
+    from notification_legacy import NotificationService
+
+    store = SQLiteCheckpointStore(str(tmp_path / "jobs.db"))
+    service = NotificationService()
+    recipients = [f"employee{i}@techflow.com" for i in range(300)]
+    first = service.send_bulk(recipients, "Info", "email", job_id="j1", checkpoint_store=store)
+    again = service.send_bulk(recipients, "Info", "email", job_id="j1", checkpoint_store=store)
+    assert first["success"] == again["success"] == 300
+    assert again["skipped"] == 300
+    assert service.get_stats()["total_sent"] == 300
+    store.close()
@@ -0,0 +1,494 @@
+import asyncio
+import socketserver
+import threading
+
+from bulk_sender import BulkSender
+from notification_legacy import NotificationService
+
+
+def test_bulk_sender_threads():
+    print("=== Test BulkSender (threads) ===")
+    sender = BulkSender(lambda r, m, c, p: "@" in r, max_workers=8)
+    recipients = [f"user{i}@techflow.com" for i in range(100)] + ["invalide"]
+    result = sender.send(recipients, "Bonjour", "email")
+    sender.close()
+
+    assert result["success"] == 100
+    assert result["failed"] == 1
+    assert sorted(result["results"]) == sorted((r, "@" in r) for r in recipients)
+
+
+def test_bulk_sender_caps_in_flight():
+    print("\n=== Test plafond par canal ===")
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_send(recipient, message, channel, priority):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        threading.Event().wait(0.002)
+        with lock:
+            in_flight -= 1
+        return True
+
+    with BulkSender(slow_send, max_workers=16, max_in_flight={"sms": 3}) as sender:
+        result = sender.send((f"+3361234{i:04d}" for i in range(60)), "Code", "sms")
+
+    assert result["success"] == 60
+    assert peak <= 3
+
+
+def test_bulk_sender_async():
+    print("\n=== Test BulkSender (asyncio) ===")
+
+    async def async_send(recipient, message, channel, priority):
+        await asyncio.sleep(0)
+        if recipient == "boom":
+            raise RuntimeError("fournisseur indisponible")
+        return True
+
+    sender = BulkSender(async_send, max_in_flight={"push": 4})
+    result = asyncio.run(sender.send_async(["a", "b", "boom", "c"], "Hello", "push"))
+
+    assert result["success"] == 3
+    assert ("boom", False) in result["results"]
+
+
+def test_legacy_send_bulk_concurrent():
+    print("\n=== Test send_bulk concurrent ===")
+    service = NotificationService()
+    result = service.send_bulk(["#rh", "#dev", ""], "Réunion", "slack", max_workers=4)
+
+    assert result["success"] == 2
+    assert result["failed"] == 1
+    assert len(result["results"]) == 3
+
+
+def test_send_batch_default_fallback():
+    print("\n=== Test send_batch par défaut ===")
+    from notifier_interface import INotifier
+
+    class RecordingNotifier(INotifier):
+        def __init__(self):
+            self.sent = []
+
+        def get_channel_name(self):
+            return "recording"
+
+        def send(self, recipient, message):
+            self.sent.append((recipient, message))
+            return bool(recipient)
+
+    notifier = RecordingNotifier()
+    results = notifier.send_batch([("a", "1"), ("", "2"), ("c", "3")])
+
+    assert results == [True, False, True]
+    assert len(notifier.sent) == 3
+
+
+def test_console_and_email_send_batch():
+    print("\n=== Test send_batch Console/Email ===")
+    from console_notifier import ConsoleNotifier
+    from email_notifier import EmailNotifier
+    from event_sink import BufferedSink, set_sink
+
+    sink = BufferedSink()
+    previous = set_sink(sink)
+    try:
+        assert ConsoleNotifier().send_batch([("a", "x"), ("b", "y")]) == [True, True]
+        results = EmailNotifier().send_batch(
+            [("marie@techflow.com", "Congés validés"), ("pas-un-email", "Test"), ("rh@techflow.com", "")],
+            priority="high",
+        )
+    finally:
+        set_sink(previous)
+
+    assert results == [True, False, False]
+    assert sink.find("email.batch_sent") == [
+        {"sent": 1, "total": 3, "server": "smtp.techflow.com:587", "simulated": True}
+    ]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Serveur SMTP local minimal (stand-in de smtpd pour les tests)."""
+
+    def reply(self, line):
+        self.wfile.write(line + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply(b"220 localhost ESMTP")
+        in_data, lines = False, []
+        for raw in self.rfile:
+            line = raw.rstrip(b"\r\n")
+            if in_data:
+                if line == b".":
+                    in_data = False
+                    self.server.messages.append(b"\n".join(lines))
+                    lines = []
+                    self.reply(b"250 OK")
+                else:
+                    lines.append(line)
+                continue
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                self.reply(b"250 localhost")
+            elif command == b"DATA":
+                in_data = True
+                self.reply(b"354 End data with <CR><LF>.<CR><LF>")
+            elif command == b"QUIT":
+                self.reply(b"221 Bye")
+                return
+            else:
+                self.reply(b"250 OK")
+
+
+def _start_smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_smtp_pool_reuses_connection():
+    print("\n=== Test pool SMTP (keep-alive) ===")
+    from email_notifier import EmailNotifier
+    from smtp_pool import SMTPConnectionPool
+
+    server = _start_smtp_server()
+    pool = SMTPConnectionPool("127.0.0.1", server.server_address[1], pool_size=2)
+    notifier = EmailNotifier(pool=pool)
+    try:
+        for i in range(10):
+            assert notifier.send(f"user{i}@techflow.com", f"Message {i}")
+        assert notifier.send_batch([("a@techflow.com", "x"), ("bad", "y")]) == [True, False]
+        # Pool partagé : la fermeture d'un notifier (éviction du cache...) ne le ferme pas
+        EmailNotifier(pool=pool).close()
+        assert notifier.send("after@techflow.com", "Toujours ouvert")
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+
+    assert len(server.messages) == 12
+    assert server.connections == 1
+    assert pool.stats["created"] == 1
+
+    owner = EmailNotifier(use_pool=True)  # pool propre, fermé avec le notifier
+    owner.close()
+    assert owner.pool._closed
+
+
+def test_smtp_pool_reconnects_dead_connection():
+    print("\n=== Test pool SMTP (reconnexion) ===")
+    from email.message import EmailMessage
+    from smtp_pool import SMTPConnectionPool
+
+    server = _start_smtp_server()
+    pool = SMTPConnectionPool("127.0.0.1", server.server_address[1],
+                              pool_size=1, health_check_interval=0)
+    msg = EmailMessage()
+    msg["From"], msg["To"], msg["Subject"] = "a@techflow.com", "b@techflow.com", "Test"
+    msg.set_content("Bonjour")
+    try:
+        pool.send_message(msg)
+        conn = pool.acquire()
+        conn.close()  # La session meurt pendant qu'elle est inactive
+        pool.release(conn)
+        pool.send_message(msg)
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+
+    assert len(server.messages) == 2
+    assert pool.stats["created"] == 2
+    assert pool.stats["discarded"] == 1
+
+
+def test_smtp_pool_refusal_keeps_session():
+    print("\n=== Test pool SMTP (refus destinataire) ===")
+    import smtplib
+    from smtp_pool import SMTPConnectionPool, is_connection_error
+
+    class FakeSMTP:
+        def __init__(self, host, port, timeout=None):
+            self.sent = []
+
+        def ehlo(self):
+            pass
+
+        def quit(self):
+            pass
+
+        def send_message(self, msg):
+            if msg == "refusé":
+                raise smtplib.SMTPRecipientsRefused({"x@techflow.com": (550, b"Unknown")})
+            if msg == "rejeté":
+                raise smtplib.SMTPDataError(554, b"Rejected")
+            self.sent.append(msg)
+
+    assert is_connection_error(smtplib.SMTPServerDisconnected())
+    assert is_connection_error(ConnectionResetError())
+    assert not is_connection_error(smtplib.SMTPDataError(554, b"Rejected"))
+
+    pool = SMTPConnectionPool("localhost", 25, pool_size=1, connection_factory=FakeSMTP)
+    assert pool.send_messages(["a", "refusé", "b", "rejeté", "c"]) == [True, False, True, False, True]
+    try:
+        pool.send_message("refusé")
+    except smtplib.SMTPRecipientsRefused:
+        pass
+    else:
+        raise AssertionError("le refus doit remonter")
+    pool.close()
+    assert pool.stats["created"] == 1 and pool.stats["discarded"] == 0
+
+
+def test_factory_cache_reuses_instances():
+    print("\n=== Test cache de la Factory ===")
+    from notification_factory_complete import ChannelType, NotificationFactory, setup_factory
+
+    setup_factory()
+    assert NotificationFactory.create(ChannelType.CONSOLE) is not NotificationFactory.create(ChannelType.CONSOLE)
+
+    NotificationFactory.enable_cache()
+    try:
+        first = NotificationFactory.create(ChannelType.CONSOLE)
+        assert NotificationFactory.create(ChannelType.CONSOLE) is first
+        assert NotificationFactory.create(ChannelType.CONSOLE, config_key="other") is not first
+    finally:
+        NotificationFactory.shutdown()
+
+    assert NotificationFactory.create(ChannelType.CONSOLE) is not first
+
+
+def test_factories_share_code_not_state():
+    print("\n=== Test NotificationFactoryBase ===")
+    import notification_factory
+    import notification_factory_complete
+    from notification_factory_base import NotificationFactoryBase
+
+    simple = notification_factory.NotificationFactory
+    complete = notification_factory_complete.NotificationFactory
+    assert issubclass(simple, NotificationFactoryBase) and issubclass(complete, NotificationFactoryBase)
+    assert simple._registry is not complete._registry
+    complete.set_rate_limiter(object())
+    try:
+        assert simple._rate_limiter is None
+    finally:
+        complete.set_rate_limiter(None)
+
+
+def test_factory_reconfiguration_keeps_handed_out_notifiers_open():
+    print("\n=== Test reconfiguration de la Factory ===")
+    import notification_factory
+    import notification_factory_complete
+    from console_notifier import ConsoleNotifier
+    from metrics import DeliveryMetrics
+
+    class PooledNotifier(ConsoleNotifier):
+        closed = 0
+
+        def close(self):
+            PooledNotifier.closed += 1
+
+    for module in (notification_factory, notification_factory_complete):
+        factory, channel = module.NotificationFactory, module.ChannelType.CONSOLE
+        previous = factory._registry.get(channel)
+        factory.register(channel, PooledNotifier)
+        factory.enable_cache()
+        try:
+            held = factory.create(channel)
+            factory.set_metrics(DeliveryMetrics())
+            factory.set_metrics(None)
+            assert PooledNotifier.closed == 0  # toujours utilisable par son détenteur
+            assert factory.create(channel) is not held  # nouvelles couches appliquées
+        finally:
+            factory.shutdown()
+            PooledNotifier.closed = 0
+            if previous is None:
+                factory._registry.pop(channel, None)
+            else:
+                factory.register(channel, previous)
+
+
+def test_factory_cache_key_includes_options():
+    print("\n=== Test clé de cache avec options ===")
+    import notification_factory
+    import notification_factory_complete
+    from console_notifier import ConsoleNotifier
+
+    class SenderNotifier(ConsoleNotifier):
+        def __init__(self, sender="rh@techflow.com"):
+            self.sender = sender
+
+    for module in (notification_factory, notification_factory_complete):
+        factory, channel = module.NotificationFactory, module.ChannelType.CONSOLE
+        previous = factory._registry.get(channel)
+        factory.register(channel, SenderNotifier)
+        factory.enable_cache()
+        try:
+            rh = factory.create(channel, sender="rh@techflow.com")
+            assert factory.create(channel, sender="rh@techflow.com") is rh
+            it = factory.create(channel, sender="it@techflow.com")
+            assert it is not rh and it.sender == "it@techflow.com"
+            # Options non hachables : instance non partagée
+            first = factory.create(channel, sender=["rh@techflow.com"])
+            assert factory.create(channel, sender=["rh@techflow.com"]) is not first
+        finally:
+            factory.shutdown()
+            if previous is None:
+                factory._registry.pop(channel, None)
+            else:
+                factory.register(channel, previous)
+
+
+def test_notifier_cache_lru_and_close():
+    print("\n=== Test NotifierCache (LRU + close) ===")
+    from notifier_cache import NotifierCache
+
+    closed = []
+    created = []
+
+    class Closable:
+        def __init__(self, name):
+            self.name = name
+            created.append(name)
+
+        def close(self):
+            closed.append(self.name)
+
+    cache = NotifierCache(max_size=2)
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        cache.get_or_create(("email", None), lambda: Closable("email"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert created == ["email"]
+
+    cache.get_or_create(("sms", None), lambda: Closable("sms"))
+    cache.get_or_create(("email", None), lambda: Closable("email-bis"))  # touche email
+    cache.get_or_create(("push", None), lambda: Closable("push"))         # évince sms
+    assert closed == ["sms"]
+
+    cache.close()
+    assert sorted(closed) == ["email", "push", "sms"]
+    assert len(cache) == 0
+
+
+def test_async_factory_and_send_many():
+    print("\n=== Test AsyncNotifier via la Factory ===")
+    from async_notifier import AsyncConsoleNotifier, AsyncNotifierAdapter
+    from notification_factory_complete import ChannelType, NotificationFactory, setup_factory
+
+    setup_factory()
+    console = NotificationFactory.create_async(ChannelType.CONSOLE)
+    email = NotificationFactory.create_async(ChannelType.EMAIL)
+    assert isinstance(console, AsyncConsoleNotifier)
+    assert isinstance(email, AsyncNotifierAdapter)
+    assert email.get_channel_name() == "email"
+
+    results = asyncio.run(console.send_many([("a", "1"), ("b", "2")], concurrency=1))
+    assert results == [True, True]
+
+    # Même API dans la factory simple
+    import notification_factory
+    simple = notification_factory.NotificationFactory
+    notification_factory.setup_factory()
+    assert isinstance(simple.create_async(notification_factory.ChannelType.CONSOLE),
+                      AsyncConsoleNotifier)
+    simple._async_registry.pop(notification_factory.ChannelType.CONSOLE)
+    adapted = simple.create_async(notification_factory.ChannelType.CONSOLE)
+    assert isinstance(adapted, AsyncNotifierAdapter)
+    assert asyncio.run(adapted.send("a", "1")) is True
+
+
+def test_async_send_many_respects_concurrency():
+    print("\n=== Test send_many (workers) ===")
+    from async_notifier import AsyncNotifier
+
+    class Probe(AsyncNotifier):
+        def __init__(self):
+            self.in_flight = 0
+            self.peak = 0
+            self.done = 0
+            self.read_ahead = 0
+
+        def get_channel_name(self):
+            return "probe"
+
+        async def send(self, recipient, message):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.read_ahead = max(self.read_ahead, pulled - self.done)
+            await asyncio.sleep(0.001)
+            self.in_flight -= 1
+            self.done += 1
+            if recipient == "boom":
+                raise ConnectionError("timeout")
+            return True
+
+    probe = Probe()
+    pulled = 0
+
+    def items():
+        nonlocal pulled
+        for i in range(50):
+            pulled += 1
+            yield f"r{i}", "x"
+        pulled += 1
+        yield "boom", "x"
+
+    results = asyncio.run(probe.send_many(items(), concurrency=5))
+
+    assert results == [True] * 50 + [False]
+    assert probe.peak == 5
+    # L'itérable est lu au rythme des envois, pas en entier d'avance
+    assert probe.read_ahead == 5
+
+
+def test_event_sinks():
+    print("\n=== Test event sinks ===")
+    import logging
+    from event_sink import INFO, WARNING, BufferedSink, NullSink, QueueSink, emit, get_sink, set_sink
+
+    assert isinstance(get_sink(), NullSink)
+
+    sink = BufferedSink(level=WARNING)
+    previous = set_sink(sink)
+    try:
+        service = NotificationService()
+        service.send_notification("#rh", "Hello", "slack")
+        service.send_notification("", "Hello", "slack")
+    finally:
+        set_sink(previous)
+    assert sink.names() == ["notification.invalid"]
+
+    records = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            records.append(record.getMessage())
+
+    logger = logging.getLogger("test_event_sinks")
+    logger.addHandler(ListHandler())
+    logger.setLevel(logging.INFO)
+    queue_sink = QueueSink(logger, level=INFO)
+    set_sink(queue_sink)
+    try:
+        emit(INFO, "email.sent", recipient="a@b.com")
+    finally:
+        set_sink(previous)
+        queue_sink.close()
+    assert records == ["email.sent {'recipient': 'a@b.com'}"]
@@ -0,0 +1,453 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from notifier_interface import INotifier
+from outbox import Outbox, OutboxDispatcher, OutboxFull
+
+
+class FlakyNotifier(INotifier):
+    """Échoue pour les destinataires listés dans fail."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def get_channel_name(self):
+        return "flaky"
+
+    def send(self, recipient, message):
+        with self.lock:
+            if recipient in self.fail:
+                return False
+            self.sent.append(recipient)
+            return True
+
+
+def test_outbox_dispatcher_delivers_and_dead_letters():
+    print("=== Test Outbox + Dispatcher ===")
+    outbox = Outbox(":memory:", max_attempts=2)
+    notifier = FlakyNotifier(fail={"bad"})
+    dispatcher = OutboxDispatcher(outbox, lambda channel: notifier, workers=3,
+                                  batch_size=7, retry_delay=0.01, poll_interval=0.01)
+    dispatcher.start()
+    outbox.enqueue_many([(f"user{i}", "Hello") for i in range(50)] + [("bad", "Hello")], "sms")
+    dispatcher.stop(timeout=5)
+
+    assert sorted(notifier.sent) == sorted(f"user{i}" for i in range(50))
+    assert outbox.pending_count() == 0
+    assert [row[2] for row in outbox.dead_letters()] == ["bad"]
+
+
+def test_outbox_lease_expiry_redelivers(tmp_path):
+    print("\n=== Test Outbox at-least-once ===")
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    outbox.enqueue("marie@techflow.com", "Congés validés", "email")
+
+    claimed = outbox.claim(lease_seconds=0.05)  # Le worker "meurt" sans ack
+    assert [m.recipient for m in claimed] == ["marie@techflow.com"]
+    assert outbox.claim() == []
+    outbox.close()
+
+    time.sleep(0.06)
+    reopened = Outbox(path)
+    assert reopened.pending_count() == 1
+    again = reopened.claim()
+    assert again[0].id == claimed[0].id
+    assert again[0].attempts == 2
+    reopened.ack([again[0].id, again[0].id])
+    assert reopened.pending_count() == 0
+
+
+def test_outbox_backpressure():
+    print("\n=== Test Outbox backpressure ===")
+    outbox = Outbox(":memory:", max_pending=3)
+    outbox.enqueue_many([("a", "1"), ("b", "2"), ("c", "3")], "push")
+
+    with pytest.raises(OutboxFull):
+        outbox.enqueue("d", "4", "push", timeout=0.01)
+
+    threading.Timer(0.05, lambda: outbox.ack(m.id for m in outbox.claim(1))).start()
+    outbox.enqueue("d", "4", "push", timeout=2)
+    assert outbox.pending_count() == 3
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_retry_policy_backoff_bounds():
+    print("\n=== Test RetryPolicy ===")
+    from retry_scheduler import RetryPolicy
+
+    policy = RetryPolicy(base_delay=1.0, multiplier=2.0, max_delay=5.0, jitter=0.5)
+    for attempt, full in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)]:
+        for _ in range(20):
+            assert full * 0.5 <= policy.delay(attempt) <= full
+
+
+def test_retry_scheduler_retries_then_gives_up():
+    print("\n=== Test RetryScheduler ===")
+    from retry_scheduler import RetryPolicy, RetryScheduler
+
+    calls = {"flaky": 0, "dead": 0}
+    given_up = threading.Event()
+
+    def flaky():
+        calls["flaky"] += 1
+        return calls["flaky"] >= 3
+
+    def dead():
+        calls["dead"] += 1
+        raise ConnectionError("provider down")
+
+    with RetryScheduler(RetryPolicy(base_delay=0.001, jitter=0)) as scheduler:
+        scheduler.schedule(flaky, max_retries=5)
+        scheduler.schedule(dead, max_retries=2, on_give_up=given_up.set)
+        assert given_up.wait(2)
+        assert _wait_until(lambda: scheduler.stats["succeeded"] == 1)
+
+    assert calls == {"flaky": 3, "dead": 2}
+    assert scheduler.stats["given_up"] == 1
+
+
+def test_retry_scheduler_does_not_hold_threads():
+    print("\n=== Test RetryScheduler sans thread par relance ===")
+    from retry_scheduler import RetryPolicy, RetryScheduler
+
+    before = threading.active_count()
+    scheduler = RetryScheduler(RetryPolicy(base_delay=60), max_workers=2)
+    for _ in range(1000):
+        scheduler.schedule(lambda: True)
+    assert scheduler.pending() == 1000
+    assert threading.active_count() <= before + 1
+    scheduler.close()
+
+
+def test_legacy_send_notification_uses_retry_count():
+    print("\n=== Test send_notification + retry_count ===")
+    from notification_legacy import NotificationService
+    from retry_scheduler import RetryPolicy, RetryScheduler
+
+    class FlakySmsService(NotificationService):
+        attempts = 0
+
+        def _send_sms(self, recipient, message, priority):
+            self.attempts += 1
+            return self.attempts >= 3
+
+    with RetryScheduler(RetryPolicy(base_delay=0.001, jitter=0)) as scheduler:
+        service = FlakySmsService(retry_scheduler=scheduler)
+        assert service.send_notification("+33612345678", "Code: 1234", "sms", retry_count=3) is False
+        assert _wait_until(lambda: scheduler.stats["succeeded"] == 1)
+
+    assert service.attempts == 3
+
+
+def test_token_bucket_burst_then_rate():
+    print("\n=== Test TokenBucket ===")
+    from rate_limiter import TokenBucket
+
+    bucket = TokenBucket(rate=200, burst=10)
+    assert all(bucket.try_acquire() for _ in range(10))
+    assert not bucket.try_acquire()
+    assert not bucket.acquire(timeout=0.001)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(10)])
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    assert 0.15 <= elapsed < 0.5  # 40 jetons à 200/s
+
+
+def test_token_bucket_async():
+    print("\n=== Test TokenBucket asyncio ===")
+    import asyncio
+    from rate_limiter import RateLimiter
+
+    limiter = RateLimiter({"sms": (100, 1)})
+
+    async def burst():
+        start = time.perf_counter()
+        await asyncio.gather(*(limiter.acquire_async("sms") for _ in range(11)))
+        return time.perf_counter() - start
+
+    assert asyncio.run(burst()) >= 0.09
+    assert asyncio.run(limiter.acquire_async("email"))  # canal non limité
+
+
+@pytest.mark.parametrize("module_name", ["notification_factory_complete", "notification_factory"])
+def test_factory_wraps_rate_limited_channels(module_name):
+    print("\n=== Test Factory + RateLimiter ===")
+    import importlib
+    from config_singleton import NotificationConfig
+    from rate_limiter import RateLimitedNotifier, RateLimiter
+
+    module = importlib.import_module(module_name)
+    ChannelType, NotificationFactory = module.ChannelType, module.NotificationFactory
+    module.setup_factory()
+    NotificationFactory.register(ChannelType.SMS, FlakyNotifier)
+    NotificationFactory.set_rate_limiter(RateLimiter.from_config(NotificationConfig()))
+    try:
+        sms = NotificationFactory.create(ChannelType.SMS)
+        console = NotificationFactory.create(ChannelType.CONSOLE)
+        assert isinstance(sms, RateLimitedNotifier)
+        assert sms.get_channel_name() == "flaky"
+        assert not isinstance(console, RateLimitedNotifier)
+    finally:
+        NotificationFactory.set_rate_limiter(None)
+        NotificationFactory._registry.pop(ChannelType.SMS)
+
+    assert NotificationConfig().get_rate_limit(ChannelType.SMS) == (10, 20)
+
+
+def test_metrics_histogram_buckets():
+    print("\n=== Test histogramme de latence ===")
+    from metrics import bucket_index, bucket_value
+
+    for micros in [0, 1, 15, 16, 31, 32, 1000, 123_456, 3_600_000_000]:
+        low = bucket_value(bucket_index(micros))
+        assert low <= micros
+        assert micros - low <= max(1, micros / 16)
+
+
+def test_metrics_sharded_counts_are_exact():
+    print("\n=== Test DeliveryMetrics multi-threads ===")
+    from metrics import DeliveryMetrics
+
+    metrics = DeliveryMetrics()
+
+    def worker():
+        for i in range(5000):
+            metrics.record("sms", i % 10 != 0, 0.002)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["total_sent"] == 36_000
+    assert snapshot["total_failed"] == 4_000
+    assert 1.8 <= snapshot["by_channel"]["sms"]["p99_ms"] <= 2.0
+    # Threads terminés : fragments repliés dans la base, totaux conservés
+    assert metrics._shards == []
+
+    for _ in range(3):
+        thread = threading.Thread(target=metrics.record, args=("email", True))
+        thread.start()
+        thread.join()
+    metrics.record("email", False)  # thread principal, toujours vivant
+    assert len(metrics._shards) == 1
+    assert metrics.counts()["email"] == [3, 1]
+
+    metrics.reset()
+    assert metrics.snapshot()["total_sent"] == 0
+
+
+def test_legacy_stats_cover_all_channels():
+    print("\n=== Test get_stats legacy ===")
+    from notification_legacy import NotificationService
+
+    service = NotificationService()
+    service.send_bulk([f"#canal{i}" for i in range(200)], "Hello", "teams", max_workers=8)
+    service.send_notification("+33600000000", "Hi", "whatsapp")
+    service.send_notification("", "Hi", "whatsapp")
+
+    stats = service.get_stats()
+    assert stats["total_sent"] == service.sent_count == 201
+    assert stats["total_failed"] == service.failed_count == 1
+    assert stats["by_channel"]["teams"] == 200
+    assert stats["by_channel"]["whatsapp"] == 1
+    assert set(stats["latency_ms"]) == {"teams", "whatsapp"}
+
+    service.reset_stats()
+    assert service.get_stats()["total_sent"] == 0
+
+
+@pytest.mark.parametrize("module_name", ["notification_factory_complete", "notification_factory"])
+def test_factory_metrics_wrapper(module_name):
+    print("\n=== Test Factory + DeliveryMetrics ===")
+    import importlib
+    from metrics import DeliveryMetrics
+
+    module = importlib.import_module(module_name)
+    ChannelType, NotificationFactory = module.ChannelType, module.NotificationFactory
+    module.setup_factory()
+    metrics = DeliveryMetrics()
+    NotificationFactory.set_metrics(metrics)
+    try:
+        notifier = NotificationFactory.create(ChannelType.CONSOLE)
+        notifier.send("dev@techflow.com", "Hello")
+        notifier.send_batch([("a", "1"), ("b", "2")])
+        native = NotificationFactory.create_async(ChannelType.CONSOLE)  # AsyncConsoleNotifier
+        assert asyncio.run(native.send_many([("c", "3"), ("d", "4")])) == [True, True]
+    finally:
+        NotificationFactory.set_metrics(None)
+
+    assert metrics.counts() == {"console": [5, 0]}
+
+
+def test_circuit_breaker_opens_and_recovers():
+    print("\n=== Test CircuitBreaker ===")
+    from circuit_breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker,
+                                 CircuitOpenError)
+
+    breaker = CircuitBreaker("sms", min_calls=4, error_rate=0.5, open_seconds=0.05,
+                             half_open_calls=2)
+    for ok in (True, False, True, False):
+        breaker.record(ok)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: True)
+    assert breaker.snapshot()["rejected"] == 1
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() and breaker.allow() and not breaker.allow()
+    breaker.record(False)  # essai raté : réouverture
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.call(lambda: True) and breaker.call(lambda: True)
+    assert breaker.state == CLOSED and breaker.snapshot()["calls"] == 0
+
+    slow = CircuitBreaker("push", min_calls=2, slow_call=0.01, slow_rate=0.5)
+    slow.record(True, latency=0.5)
+    slow.record(True, latency=0.5)
+    assert slow.state == OPEN
+
+
+@pytest.mark.parametrize("module_name", ["notification_factory_complete", "notification_factory"])
+def test_factory_circuit_breaker_fallback(module_name):
+    print("\n=== Test Factory + CircuitBreaker ===")
+    import importlib
+    from circuit_breaker import CircuitBreakerRegistry
+
+    module = importlib.import_module(module_name)
+    ChannelType, NotificationFactory = module.ChannelType, module.NotificationFactory
+    setup_factory = module.setup_factory
+
+    class DownNotifier(FlakyNotifier):
+        calls = 0
+
+        def send(self, recipient, message, **kwargs):
+            DownNotifier.calls += 1
+            return False
+
+    setup_factory()
+    NotificationFactory.register(ChannelType.SMS, DownNotifier)
+    NotificationFactory.set_circuit_breakers(
+        CircuitBreakerRegistry(min_calls=3, open_seconds=60),
+        fallbacks={ChannelType.SMS: ChannelType.CONSOLE},
+    )
+    try:
+        sms = NotificationFactory.create(ChannelType.SMS)
+        results = [sms.send("0612345678", "Code 847291") for _ in range(10)]
+        health = NotificationFactory.health()
+    finally:
+        NotificationFactory.set_circuit_breakers(None)
+        NotificationFactory._registry.pop(ChannelType.SMS)
+
+    assert DownNotifier.calls == 3  # ensuite le fournisseur n'est plus appelé
+    assert results == [False] * 3 + [True] * 7  # repli sur la console
+    assert health["sms"]["state"] == "open" and health["sms"]["rejected"] == 7
+    assert NotificationFactory.health() == {}
+
+
+@pytest.mark.parametrize("module_name", ["notification_factory_complete", "notification_factory"])
+def test_factory_async_circuit_breaker_fallback(module_name):
+    print("\n=== Test Factory asyncio + CircuitBreaker ===")
+    import importlib
+    from async_notifier import AsyncNotifier
+    from circuit_breaker import CircuitBreakerRegistry
+
+    module = importlib.import_module(module_name)
+    ChannelType, NotificationFactory = module.ChannelType, module.NotificationFactory
+    module.setup_factory()
+
+    class DownAsyncNotifier(AsyncNotifier):
+        calls = 0
+
+        def get_channel_name(self):
+            return "down"
+
+        async def send(self, recipient, message):
+            DownAsyncNotifier.calls += 1
+            return False
+
+    NotificationFactory.register_async(ChannelType.SMS, DownAsyncNotifier)
+    NotificationFactory.set_circuit_breakers(
+        CircuitBreakerRegistry(min_calls=3, open_seconds=60),
+        fallbacks={ChannelType.SMS: ChannelType.CONSOLE},
+    )
+    try:
+        sms = NotificationFactory.create_async(ChannelType.SMS)
+        results = asyncio.run(sms.send_many([("0612345678", "Code 847291")] * 10,
+                                            concurrency=1))
+        health = NotificationFactory.health()
+    finally:
+        NotificationFactory.set_circuit_breakers(None)
+        NotificationFactory._async_registry.pop(ChannelType.SMS)
+
+    assert DownAsyncNotifier.calls == 3
+    assert results == [False] * 3 + [True] * 7  # repli sur l'AsyncConsoleNotifier
+    assert health["sms"]["state"] == "open" and health["sms"]["rejected"] == 7
+
+
+def test_legacy_circuit_breaker_fails_fast():
+    print("\n=== Test NotificationService + CircuitBreaker ===")
+    from circuit_breaker import CircuitBreakerRegistry
+    from notification_legacy import NotificationService
+
+    registry = CircuitBreakerRegistry(min_calls=5, open_seconds=60)
+    service = NotificationService(circuit_breakers=registry)
+    for _ in range(20):  # un numéro invalide n'est pas une panne
+        assert not service.send_notification("numéro-invalide", "Code", "sms")
+    assert registry.get("sms").state == "closed"
+    assert service.send_notification("+33612345678", "Code", "sms")
+    for _ in range(20):  # idem pour tout canal ayant une règle de validation
+        assert not service.send_notification("numéro-invalide", "Code", "whatsapp")
+    assert registry.get("whatsapp").state == "closed"
+    assert service.send_notification("+33612345678", "Code", "whatsapp")
+
+    service._send_sms = lambda recipient, message, priority: False  # fournisseur en panne
+    for _ in range(20):
+        service.send_notification("+33612345678", "Code", "sms", retry_count=0)
+    assert service.send_notification("marie@techflow.com", "Hello", "email")
+    health = registry.health()
+    # 1 succès puis 4 échecs : le circuit s'ouvre, les 16 envois suivants sont refusés
+    assert health["sms"]["state"] == "open" and health["sms"]["rejected"] == 16
+    assert health["email"]["state"] == "closed"
+    assert service.get_stats()["total_failed"] == 60
+
+
+def test_circuit_breaker_ignores_validation_rejections():
+    print("\n=== Test CircuitBreakerNotifier et validation ===")
+    from circuit_breaker import CircuitBreaker, CircuitBreakerNotifier
+
+    class CheckedNotifier(FlakyNotifier):
+        def validate(self, recipient, message):
+            return recipient != "bad", "Format invalide"
+
+        def send(self, recipient, message, **kwargs):
+            return self.validate(recipient, message)[0]
+
+    breaker = CircuitBreaker("sms", min_calls=3, open_seconds=60)
+    notifier = CircuitBreakerNotifier(CheckedNotifier(), breaker)
+    assert [notifier.send("bad", "x") for _ in range(10)] == [False] * 10
+    assert notifier.send_batch([("bad", "x"), ("ok", "y")] * 5) == [False, True] * 5
+    assert breaker.state == "closed" and breaker.snapshot()["error_rate"] == 0.0
+    assert notifier.send("ok", "x")
@@ -0,0 +1,377 @@
+import pytest
+
+from leave_repository import IntervalIndex, LeaveRepository
+from leave_state_machine import (ACTIONS, APPROVED, CANCELLED, DRAFT, HR_REVIEW, LEAVE_MACHINE,
+                                 STATES, SUBMITTED, StateMachine)
+from workflow_legacy import LeaveRequest
+
+
+def _request(employee_id="EMP001"):
+    return LeaveRequest(employee_id, "2024-12-20", "2024-12-25", "CP", "Vacances")
+
+
+def test_state_machine_table_matches_legacy_rules():
+    print("=== Test table de transitions ===")
+    assert LEAVE_MACHINE.available_actions("draft") == ("submit", "cancel")
+    assert LEAVE_MACHINE.available_actions(SUBMITTED) == ("start_manager_review", "cancel")
+    assert LEAVE_MACHINE.available_actions("manager_review") == ("manager_approve", "manager_reject")
+    assert LEAVE_MACHINE.available_actions(HR_REVIEW) == ("hr_approve", "hr_reject")
+    assert LEAVE_MACHINE.final_states == {APPROVED, STATES.index("rejected"), CANCELLED}
+
+    # Annulation acceptée mais non proposée pendant les validations
+    assert LEAVE_MACHINE.can(HR_REVIEW, "cancel")
+    assert not LEAVE_MACHINE.can(APPROVED, "cancel")
+    assert LEAVE_MACHINE.next_state("draft", "submit") == SUBMITTED
+    with pytest.raises(ValueError):
+        LEAVE_MACHINE.next_state(APPROVED, "submit")
+    with pytest.raises(KeyError):
+        LEAVE_MACHINE.can("draft", "archive")
+
+
+def test_state_machine_bulk_apply():
+    print("\n=== Test apply() en lot ===")
+
+    class Item:
+        __slots__ = ("state_id",)
+
+        def __init__(self, state_id):
+            self.state_id = state_id
+
+    machine = StateMachine(("a", "b"), ("go",), [("a", "go", "b")])
+    items = [Item(0) for _ in range(5_000)] + [Item(1)]
+    applied, refused = machine.apply("go", items)
+    assert len(applied) == 5_000 and len(refused) == 1
+    assert all(item.state_id == 1 for item in items)
+
+
+def test_leave_request_uses_state_machine(capsys):
+    print("\n=== Test LeaveRequest ===")
+    request = _request()
+    assert request.status == "draft" and request.state_id == DRAFT
+    assert request.submit() and request.start_manager_review()
+    assert request.get_available_actions() == ["manager_approve", "manager_reject"]
+    assert not request.hr_approve()
+    assert request.cancel()
+    assert request.status == "cancelled" and request.get_available_actions() == []
+    assert not request.cancel()
+    assert "Impossible d'annuler: état actuel = cancelled" in capsys.readouterr().out
+
+    request.status = "draft"  # compatibilité : status reste assignable
+    assert request.state_id == DRAFT
+
+
+def test_leave_request_apply_bulk(capsys):
+    print("\n=== Test LeaveRequest.apply_bulk ===")
+    requests = [_request(f"EMP{i:04}") for i in range(1_000)]
+    requests[0].cancel()
+    undated = LeaveRequest("EMP9999", "", "", "CP")
+    capsys.readouterr()
+    applied, refused = LeaveRequest.apply_bulk("submit", requests + [undated])
+    assert len(applied) == 999 and refused == [undated, requests[0]]
+    assert undated.status == "draft"  # même garde que submit()
+    assert requests[1].status == "submitted"
+    assert requests[1].history[-1]["status"] == "submitted"
+    assert set(ACTIONS) >= set(requests[1].get_available_actions())
+    # Un seul récapitulatif pour le manager, pas 999 notifications
+    out = capsys.readouterr().out
+    assert out.count("📧 NOTIFICATION") == 1
+    assert "999 demande(s) de congés passée(s) en submitted" in out
+
+    LeaveRequest.apply_bulk("start_manager_review", requests[1:3])
+    applied, _ = LeaveRequest.apply_bulk("manager_reject", requests[1:3], "Effectif insuffisant")
+    assert [r.manager_comment for r in applied] == ["Effectif insuffisant"] * 2
+    assert requests[1].history[-1]["action"] == "manager_reject (lot): Effectif insuffisant"
+    assert capsys.readouterr().out.count("📧 NOTIFICATION") == 2  # un par employé
+
+
+def test_leave_dedup_does_not_leak_across_requests(capsys):
+    print("\n=== Test dédoublonnage par demande ===")
+    import gc
+
+    for _ in range(50):  # demandes libérées aussitôt : adresses mémoire réutilisées
+        _request("EMP042").submit()
+        gc.collect()
+    assert capsys.readouterr().out.count("📧 NOTIFICATION") == 50
+
+
+def test_interval_index_matches_full_scan():
+    print("\n=== Test index d'intervalles ===")
+    import random
+    random.seed(7)
+    index = IntervalIndex()
+    spans = {}
+    for key in range(2_000):
+        start = random.randrange(365)
+        spans[key] = (start, start + random.randrange(30))
+    index.add_many((key, start, end) for key, (start, end) in spans.items())
+    index.remove(0)
+    del spans[0]
+    for first, last in ((0, 0), (100, 110), (350, 400), (-10, -1)):
+        expected = {k for k, (s, e) in spans.items() if s <= last and e >= first}
+        assert set(index.overlapping(first, last)) == expected
+    with pytest.raises(ValueError):
+        index.add(9_999, 10, 5)
+
+    # Un intervalle très long est rangé dans sa propre classe de durée
+    index.add(10_000, -5_000, 20_000)
+    expected = {k for k, (s, e) in spans.items() if s <= 110 and e >= 100} | {10_000}
+    assert set(index.overlapping(100, 110)) == expected
+    assert len(index._classes[(25_000).bit_length()]) == 1  # classe à part
+    index.remove(10_000)
+    assert 10_000 not in index.overlapping(100, 110)
+
+
+def test_repository_indexes_follow_transitions():
+    print("\n=== Test LeaveRepository ===")
+    repository = LeaveRepository()
+    first, second = _request("EMP001"), _request("EMP002")
+    other = LeaveRequest("EMP001", "2025-01-10", "2025-01-12", "RTT")
+    ids = repository.add_many([first, second])
+    assert ids == [first.id, second.id] and repository.add(other) == other.id
+    assert repository.get(other.id) is other and len(repository) == 3
+    with pytest.raises(ValueError):
+        repository.add(first)
+
+    first.submit()
+    LeaveRequest.apply_bulk("submit", [second])
+    second.cancel()
+    assert repository.by_status("submitted") == [first]
+    assert repository.by_status("cancelled") == [second]
+    assert repository.count_by_status()["draft"] == 1
+
+    assert repository.by_employee("EMP001") == [first, other]
+    assert repository.overlapping("2024-12-24", "2024-12-31") == [first, second]
+    assert repository.overlapping("2024-12-01", "2025-01-31", employee_id="EMP001") == [first, other]
+    assert repository.overlapping("2024-12-01", "2025-01-31", status="draft") == [other]
+
+    other.start_date, other.end_date = "2024-12-25", "2024-12-26"
+    repository.update(other)
+    assert repository.overlapping("2024-12-25", "2024-12-25") == [first, second, other]
+
+    repository.remove(second.id)
+    second.submit()  # plus suivie par le dépôt
+    assert second.id not in repository and repository.by_status("cancelled") == []
+
+
+def test_repository_rejects_invalid_dates_atomically():
+    print("\n=== Test LeaveRepository et dates invalides ===")
+    repository = LeaveRepository()
+    backwards = LeaveRequest("EMP001", "2024-12-25", "2024-12-20", "CP")
+    with pytest.raises(ValueError):
+        repository.add(backwards)
+    with pytest.raises(ValueError):
+        repository.add_many([_request(), LeaveRequest("EMP002", "2024-13-01", "2024-12-31", "CP")])
+    assert len(repository) == 0 and repository.count_by_status()["draft"] == 0
+
+    undated = LeaveRequest("EMP003", "", None, "RTT")  # brouillon sans dates
+    repository.add(undated)
+    assert repository.by_employee("EMP003") == [undated]
+    assert repository.overlapping("2000-01-01", "2100-01-01", employee_id="EMP003") == []
+
+    undated.start_date, undated.end_date = "2024-12-31", "2024-12-01"
+    with pytest.raises(ValueError):
+        repository.update(undated)
+    undated.end_date = "2025-01-02"
+    repository.update(undated)
+    assert repository.overlapping("2025-01-01", "2025-01-01") == [undated]
+    repository.remove(undated.id)
+    assert len(repository) == 0
+
+
+def test_id_generator_unique_sorted_and_parsable(tmp_path):
+    print("\n=== Test IdGenerator ===")
+    import threading
+
+    from id_generator import MAX_SEQUENCE, IdGenerator
+
+    generator = IdGenerator(worker_id=5, lease_dir=str(tmp_path))
+    ids = []
+    threads = [threading.Thread(target=lambda: ids.extend(generator.next_id() for _ in range(5_000)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(ids)) == 20_000
+
+    block = generator.next_ids(3 * (MAX_SEQUENCE + 1))  # plusieurs millisecondes
+    assert block == sorted(block) and len(set(block)) == len(block) and block[0] > max(ids)
+    parsed = generator.parse(block[-1])
+    assert parsed["worker_id"] == 5 and parsed["sequence"] == MAX_SEQUENCE
+    with pytest.raises(ValueError):
+        IdGenerator(worker_id=1024, lease_dir=str(tmp_path))
+
+    first, second = _request(), _request()
+    assert second.id > first.id
+
+
+def test_id_generator_worker_leases(tmp_path):
+    print("\n=== Test baux des worker ids ===")
+    import os
+    import sys
+
+    from id_generator import IdGenerator, WorkerIdConflict
+
+    lease_dir = str(tmp_path)
+    first = IdGenerator(worker_id=7, lease_dir=lease_dir)
+    with pytest.raises(WorkerIdConflict):
+        IdGenerator(worker_id=7, lease_dir=lease_dir)
+    others = [IdGenerator(lease_dir=lease_dir) for _ in range(3)]
+    assert sorted(g.worker_id for g in others) == [0, 1, 2]
+    first.close()
+    assert IdGenerator(worker_id=7, lease_dir=lease_dir).worker_id == 7
+
+    if sys.platform == "win32":
+        return
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # l'enfant ne peut pas réutiliser le générateur du parent
+        try:
+            others[0].next_id()
+            os.write(write_end, b"reused")
+        except WorkerIdConflict:
+            os.write(write_end, b"refused")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read_end, 16) == b"refused"
+
+
+def test_event_store_history_snapshot_and_replay(tmp_path):
+    print("\n=== Test EventStore ===")
+    from event_store import EventStore
+
+    path = str(tmp_path / "events.jsonl")
+    store = EventStore(path, sync_every=3, sync_interval=60)
+    store.append(1, "Création", "draft")
+    store.append(12, "Création", "draft")
+    store.append_many([(1, "submit (lot)", "submitted"), (12, "cancel", "cancelled")])
+    assert store.syncs == 1  # fsync par lot, pas par événement
+    assert [e["status"] for e in store.history(1)] == ["draft", "submitted"]
+    assert [e["action"] for e in store.history(12)] == ["Création", "cancel"]
+    assert store.history(2) == []
+
+    assert store.snapshot() == {1: "submitted", 12: "cancelled"}
+    store.append(1, "start_manager_review", "manager_review")
+    store.close()
+    with open(path, "ab") as f:
+        f.write(b'[1,17')  # ligne tronquée par un arrêt brutal
+
+    with EventStore(path) as reopened:
+        assert reopened.rebuild() == {1: "manager_review", 12: "cancelled"}
+        assert len(list(reopened.events())) == 5
+        # Index id -> dernier événement reconstruit (snapshot + fin du journal)
+        assert [e["status"] for e in reopened.history(1)] == [
+            "draft", "submitted", "manager_review"]
+        reopened.append(12, "Annulation: cancel", "draft")
+        assert [e["action"] for e in reopened.history(12)][-1] == "Annulation: cancel"
+
+
+def test_event_store_syncs_without_new_writes(tmp_path):
+    print("\n=== Test EventStore fsync périodique ===")
+    import time
+
+    from event_store import EventStore
+
+    store = EventStore(str(tmp_path / "events.jsonl"), sync_every=1000, sync_interval=0.05)
+    try:
+        store.append(1, "Création", "draft")
+        deadline = time.monotonic() + 2
+        while store.syncs == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.syncs == 1  # sans autre append ni flush
+    finally:
+        store.close()
+    assert not store._syncer.is_alive()
+    store.close()  # idempotent (appelé aussi par atexit)
+
+
+def test_leave_request_logs_to_event_store(tmp_path):
+    print("\n=== Test LeaveRequest + EventStore ===")
+    from event_store import EventStore
+
+    store = EventStore(str(tmp_path / "events.jsonl"))
+    LeaveRequest.events = store
+    try:
+        requests = [_request(f"EMP{i}") for i in range(3)]
+        requests[0].submit()
+        LeaveRequest.apply_bulk("submit", requests[1:])
+        assert requests[0]._history == []
+        assert [e["status"] for e in requests[1].history] == ["draft", "submitted"]
+        assert store.rebuild() == {r.id: "submitted" for r in requests}
+    finally:
+        LeaveRequest.events = None
+        store.close()
+
+
+def test_command_log_undo_redo(capsys):
+    print("\n=== Test CommandLog undo/redo ===")
+    from leave_commands import COMMANDS, CommandLog, make_command
+
+    assert set(COMMANDS) == set(ACTIONS)
+    with pytest.raises(ValueError):
+        make_command("approve_all", _request())
+
+    repository = LeaveRepository()
+    request = _request()
+    repository.add(request)
+    log = CommandLog(requests=repository)
+    for action, comment in (("submit", ""), ("start_manager_review", ""),
+                            ("manager_approve", "OK"), ("hr_reject", "Période chargée")):
+        assert log.execute(action, request, comment)
+    assert not log.execute("hr_approve", request) and len(log) == 4
+
+    assert log.undo() is request
+    assert request.state_id == HR_REVIEW and request.hr_comment == ""
+    assert repository.by_status("hr_review") == [request]
+    assert request.history[-1]["action"] == "Annulation: hr_reject"
+    assert log.redo() is request and request.hr_comment == "Période chargée"
+    assert log.redo() is None
+
+    log.undo()
+    log.execute("hr_approve", request, "Bonnes vacances")  # efface le redo
+    assert log.redo() is None and request.state_id == APPROVED
+    assert [e["action"] for e in log.entries()][-1] == "hr_approve"
+
+    gone = _request()
+    repository.add(gone)
+    log.execute("submit", gone)
+    repository.remove(gone.id)  # l'entrée est sautée, l'undo continue
+    assert log.undo() is request and request.state_id == HR_REVIEW
+
+    other = _request()
+    repository.add(other)
+    log.execute("submit", other)
+    other.cancel()  # modifiée hors du journal
+    with pytest.raises(ValueError):
+        log.undo()
+    assert other.status == "cancelled" and len(log) == 4
+
+    owned = CommandLog()
+    owned.execute("submit", _request())  # seule référence : celle du journal
+    assert owned.undo().state_id == DRAFT
+
+    command = make_command("cancel", _request())
+    with pytest.raises(ValueError):
+        command.undo()
+    assert command.execute() and command.request.state_id == CANCELLED
+    command.undo()
+    assert command.request.state_id == DRAFT
+
+
+def test_command_log_replay_on_snapshot():
+    print("\n=== Test CommandLog.replay ===")
+    from leave_commands import CommandLog
+
+    log = CommandLog(requests={})
+    for request_id in range(1_000):
+        log.record(request_id, "submit", "draft")
+        log.record(request_id, "cancel" if request_id % 2 else "start_manager_review", "submitted")
+    log.record(5_000, "submit", "draft")  # absente du snapshot
+    log.record(1, "submit", "cancelled")  # transition impossible au rejeu
+
+    states, refused = log.replay({request_id: "draft" for request_id in range(1_000)})
+    assert states[0] == "manager_review" and states[1] == "cancelled"
+    assert refused == [2_000, 2_001]
+
+    states, refused = log.replay({0: "submitted"}, start=1, end=2)
+    assert states == {0: "manager_review"} and refused == []
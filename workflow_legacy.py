@@ -16,6 +16,14 @@ Code Smells présents :
 - Couplage fort (pas d'Observer pour les notifications)
 """
 
+import time
+from datetime import datetime
+
+from dedup import Deduplicator
+from id_generator import next_id
+from leave_state_machine import DRAFT, LEAVE_MACHINE, STATES
+from template_engine import TEMPLATES
+
 
 class LeaveRequest:
     """
@@ -30,59 +38,124 @@ class LeaveRequest:
     - rejected : Refusée
     - cancelled : Annulée
 
+    Les transitions sont décrites par la table de LEAVE_MACHINE
+    (leave_state_machine.py).
+
     ❌ Problèmes :
-    - États gérés par strings (pas de typage)
-    - Transitions validées par if/elif géant
     - Pas d'historique des changements
     - Pas de possibilité d'Undo
     - Notifications mélangées avec la logique métier
     """
 
-    VALID_STATES = ["draft", "submitted", "manager_review", "hr_review",
-                    "approved", "rejected", "cancelled"]
+    VALID_STATES = list(STATES)
+
+    # Même message d'une même demande au même destinataire : ignoré pendant 24 h.
+    # La clé porte self.id, unique sur toute la vie du processus (id_generator) :
+    # surtout pas id(self), dont l'adresse est réutilisée bien avant 24 h.
+    dedup = Deduplicator(window=24 * 3600)
+    # Coalescer optionnel : regroupe les messages par destinataire
+    coalescer = None
+    # Dépôt (leave_repository.py) prévenu des changements d'état
+    _repository = None
+    # Journal d'événements (event_store.py) ; sans journal, l'historique
+    # reste en mémoire sous forme de tuples (horodatage, action, statut).
+    # Le journal se ferme (fsync compris) à la sortie du programme.
+    events = None
+
+    # apply_bulk : commentaire et destinataires de chaque action, comme dans
+    # les méthodes individuelles ("employee" = l'employé de la demande)
+    _COMMENT_ATTRS = {
+        "manager_approve": "manager_comment", "manager_reject": "manager_comment",
+        "hr_approve": "hr_comment", "hr_reject": "hr_comment",
+    }
+    _RECIPIENTS = {
+        "submit": ("manager@techflow.com",),
+        "manager_approve": ("rh@techflow.com",),
+        "manager_reject": ("employee",),
+        "hr_approve": ("employee", "manager@techflow.com"),
+        "hr_reject": ("employee",),
+        "cancel": ("manager@techflow.com", "rh@techflow.com"),
+    }
 
     def __init__(self, employee_id, start_date, end_date, leave_type, reason=""):
-        self.id = id(self)  # Génération ID simple
+        self.id = next_id()  # Unique et croissant (id_generator.py)
         self.employee_id = employee_id
         self.start_date = start_date
         self.end_date = end_date
         self.leave_type = leave_type  # "CP", "RTT", "maladie", "sans_solde"
         self.reason = reason
 
-        # ❌ État géré par string
-        self.status = "draft"
+        # État : identifiant entier de LEAVE_MACHINE (status en donne le nom)
+        self.state_id = DRAFT
 
-        # ❌ Pas d'historique propre
-        self.history = []
+        self._history = []
         self._log_change("Création", "draft")
 
         # ❌ Commentaires mélangés avec les données
         self.manager_comment = ""
         self.hr_comment = ""
 
+    @property
+    def state_id(self):
+        return self._state_id
+
+    @state_id.setter
+    def state_id(self, value):
+        previous = self.__dict__.get("_state_id")
+        self._state_id = value
+        if self._repository is not None and previous is not None:
+            self._repository._state_changed(self, previous, value)
+
+    @property
+    def status(self):
+        return STATES[self.state_id]
+
+    @status.setter
+    def status(self, value):
+        self.state_id = LEAVE_MACHINE.state_id(value)
+
+    def _can(self, action):
+        """Transition permise depuis l'état courant (table compilée, O(1))"""
+        return LEAVE_MACHINE.can(self.state_id, action)
+
     def _log_change(self, action, new_status):
-        """❌ Logging basique sans structure"""
-        from datetime import datetime
-        self.history.append({
-            "timestamp": datetime.now().isoformat(),
-            "action": action,
-            "status": new_status
-        })
+        """Historise une transition (journal sur disque si configuré)"""
+        if self.events is not None:
+            self.events.append(self.id, action, new_status)
+        else:
+            self._history.append((time.time(), action, new_status))
+
+    @property
+    def history(self):
+        """Historique des transitions : [{"timestamp", "action", "status"}]"""
+        history = [{"timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                    "action": action, "status": status}
+                   for timestamp, action, status in self._history]
+        if self.events is not None:
+            history.extend(self.events.history(self.id))
+        return history
 
     def _notify(self, message, recipients):
         """
         ❌ Notifications mélangées avec la logique métier
         ❌ Couplage fort - pas d'Observer pattern
         """
+        recipients = [r for r in dict.fromkeys(recipients)
+                      if self.dedup.claim(f"leave:{self.id}", r, message)]
+        if not recipients:
+            return
+        if self.coalescer is not None:
+            for recipient in recipients:
+                self.coalescer.add("email", recipient, message)
+            return
         print(f"📧 NOTIFICATION: {message}")
         print(f"   Destinataires: {recipients}")
 
     def submit(self):
         """
         Soumettre la demande.
-        ❌ Validation d'état par if/elif
         """
-        if self.status != "draft":
+        if not self._can("submit"):
             print(f"❌ Impossible de soumettre: état actuel = {self.status}")
             return False
 
@@ -91,127 +164,165 @@ class LeaveRequest:
             print("❌ Dates manquantes")
             return False
 
-        self.status = "submitted"
+        self.state_id = LEAVE_MACHINE.next_state(self.state_id, "submit")
         self._log_change("Soumission", "submitted")
         self._notify(
-            f"Nouvelle demande de congés de l'employé {self.employee_id}",
+            TEMPLATES.render("leave.submitted", employee_id=self.employee_id),
             ["manager@techflow.com"]
         )
         print(f"✓ Demande {self.id} soumise")
         return True
 
     def start_manager_review(self):
-        """❌ Encore un if/elif pour la transition"""
-        if self.status != "submitted":
+        """Début de la validation manager"""
+        if not self._can("start_manager_review"):
             print(f"❌ Impossible: état actuel = {self.status}")
             return False
 
-        self.status = "manager_review"
+        self.state_id = LEAVE_MACHINE.next_state(self.state_id, "start_manager_review")
         self._log_change("Début validation manager", "manager_review")
         print(f"✓ Demande {self.id} en cours de validation manager")
         return True
 
     def manager_approve(self, comment=""):
-        """❌ Validation manager avec if/elif"""
-        if self.status != "manager_review":
+        """Validation manager"""
+        if not self._can("manager_approve"):
             print(f"❌ Impossible: état actuel = {self.status}")
             return False
 
         self.manager_comment = comment
-        self.status = "hr_review"
+        self.state_id = LEAVE_MACHINE.next_state(self.state_id, "manager_approve")
         self._log_change("Approuvé par manager", "hr_review")
         self._notify(
-            f"Demande {self.id} approuvée par manager, en attente RH",
+            TEMPLATES.render("leave.manager_approved", request_id=self.id),
             ["rh@techflow.com"]
         )
         print(f"✓ Demande {self.id} approuvée par manager → validation RH")
         return True
 
     def manager_reject(self, comment=""):
-        """❌ Rejet manager avec if/elif"""
-        if self.status != "manager_review":
+        """Rejet manager"""
+        if not self._can("manager_reject"):
             print(f"❌ Impossible: état actuel = {self.status}")
             return False
 
         self.manager_comment = comment
-        self.status = "rejected"
+        self.state_id = LEAVE_MACHINE.next_state(self.state_id, "manager_reject")
         self._log_change(f"Refusé par manager: {comment}", "rejected")
         self._notify(
-            f"Votre demande de congés a été refusée: {comment}",
+            TEMPLATES.render("leave.manager_rejected", comment=comment),
             [f"employee_{self.employee_id}@techflow.com"]
         )
         print(f"✓ Demande {self.id} refusée par manager")
         return True
 
     def hr_approve(self, comment=""):
-        """❌ Validation RH avec if/elif"""
-        if self.status != "hr_review":
+        """Validation RH"""
+        if not self._can("hr_approve"):
             print(f"❌ Impossible: état actuel = {self.status}")
             return False
 
         self.hr_comment = comment
-        self.status = "approved"
+        self.state_id = LEAVE_MACHINE.next_state(self.state_id, "hr_approve")
         self._log_change("Approuvé par RH", "approved")
         self._notify(
-            f"Votre demande de congés du {self.start_date} au {self.end_date} est approuvée !",
+            TEMPLATES.render("leave.approved", start_date=self.start_date, end_date=self.end_date),
             [f"employee_{self.employee_id}@techflow.com", "manager@techflow.com"]
         )
         print(f"✓ Demande {self.id} APPROUVÉE")
         return True
 
     def hr_reject(self, comment=""):
-        """❌ Rejet RH avec if/elif"""
-        if self.status != "hr_review":
+        """Rejet RH"""
+        if not self._can("hr_reject"):
             print(f"❌ Impossible: état actuel = {self.status}")
             return False
 
         self.hr_comment = comment
-        self.status = "rejected"
+        self.state_id = LEAVE_MACHINE.next_state(self.state_id, "hr_reject")
         self._log_change(f"Refusé par RH: {comment}", "rejected")
         self._notify(
-            f"Votre demande de congés a été refusée par les RH: {comment}",
+            TEMPLATES.render("leave.hr_rejected", comment=comment),
             [f"employee_{self.employee_id}@techflow.com"]
         )
         print(f"✓ Demande {self.id} refusée par RH")
         return True
 
     def cancel(self):
-        """❌ Annulation avec if/elif complexe"""
-        # ❌ Logique complexe de qui peut annuler quand
-        if self.status in ["approved", "rejected", "cancelled"]:
+        """Annulation (possible tant que la demande n'est pas dans un état final)"""
+        if not self._can("cancel"):
             print(f"❌ Impossible d'annuler: état actuel = {self.status}")
             return False
 
-        self.status = "cancelled"
+        self.state_id = LEAVE_MACHINE.next_state(self.state_id, "cancel")
         self._log_change("Annulée", "cancelled")
         self._notify(
-            f"Demande de congés {self.id} annulée",
+            TEMPLATES.render("leave.cancelled", request_id=self.id),
             ["manager@techflow.com", "rh@techflow.com"]
         )
         print(f"✓ Demande {self.id} annulée")
         return True
 
     def get_available_actions(self):
+        """Actions proposées dans l'état courant (tuples précalculés par état)"""
+        return list(LEAVE_MACHINE.available_actions(self.state_id))
+
+    @classmethod
+    def apply_bulk(cls, action, requests, comment=""):
         """
-        ❌ ÉNORME if/elif pour déterminer les actions possibles
-        ❌ Doit être modifié à chaque nouvel état
+        Applique une action à un lot de demandes en un seul appel.
+
+        Mêmes règles que les méthodes individuelles (pas de soumission sans
+        dates, commentaire manager/RH enregistré), mais une seule
+        notification récapitulative par destinataire au lieu d'une par
+        demande.
+
+        Returns:
+            (demandes modifiées, demandes refusées)
         """
-        if self.status == "draft":
-            return ["submit", "cancel"]
-        elif self.status == "submitted":
-            return ["start_manager_review", "cancel"]
-        elif self.status == "manager_review":
-            return ["manager_approve", "manager_reject"]
-        elif self.status == "hr_review":
-            return ["hr_approve", "hr_reject"]
-        elif self.status == "approved":
-            return []  # État final
-        elif self.status == "rejected":
-            return []  # État final
-        elif self.status == "cancelled":
-            return []  # État final
+        requests = list(requests)
+        refused = []
+        if action == "submit":
+            # Même garde que submit() : pas de soumission sans dates
+            refused = [r for r in requests if not r.start_date or not r.end_date]
+            if refused:
+                requests = [r for r in requests if r.start_date and r.end_date]
+        applied, invalid = LEAVE_MACHINE.apply(action, requests)
+        refused.extend(invalid)
+
+        comment_attr = cls._COMMENT_ATTRS.get(action)
+        if comment_attr:
+            for request in applied:
+                setattr(request, comment_attr, comment)
+        label = f"{action} (lot): {comment}" if comment else f"{action} (lot)"
+        if cls.events is not None:
+            cls.events.append_many((request.id, label, request.status) for request in applied)
         else:
-            return []
+            for request in applied:
+                request._log_change(label, request.status)
+        cls._notify_summary(action, applied)
+        return applied, refused
+
+    @classmethod
+    def _notify_summary(cls, action, requests):
+        """Récapitulatif d'apply_bulk : un message par destinataire"""
+        counts = {}
+        for request in requests:
+            for recipient in cls._RECIPIENTS.get(action, ()):
+                if recipient == "employee":
+                    recipient = f"employee_{request.employee_id}@techflow.com"
+                counts[recipient] = counts.get(recipient, 0) + 1
+        if not counts:
+            return
+        # Statut commun pré-rendu une fois, seul le nombre varie par destinataire
+        template = TEMPLATES.get("leave.bulk").bind(status=requests[0].status)
+        for recipient, count in counts.items():
+            message = template.render({"count": count})
+            if cls.coalescer is not None:
+                cls.coalescer.add("email", recipient, message)
+            else:
+                print(f"📧 NOTIFICATION: {message}")
+                print(f"   Destinataires: {[recipient]}")
 
     def __str__(self):
         return (f"LeaveRequest(id={self.id}, employee={self.employee_id}, "